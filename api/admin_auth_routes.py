@@ -1,8 +1,30 @@
-from flask import Blueprint, request, jsonify
-from models.admin import admin_model
-from utils.auth import auth_utils
+import csv
+import itertools
+import logging
+import os
+from bson import ObjectId
+from flask import Blueprint, Response, current_app, g, request, jsonify, send_file, stream_with_context
+from utils.services import service_proxy
+from utils.rate_limit import throttled_response
+from utils.profiler import PROFILE_HEADER, sign_profile_request
+from utils.idempotency import idempotent
+from models.payment import present, to_rupees
+from jobs.registry import get_job_type
+from utils.farmer_import import FarmerImport, is_excel, read_rows
+from utils.search import MIN_QUERY_LENGTH
 import json
 
+logger = logging.getLogger(__name__)
+
+# Resolved per request from the app's services (see app.create_app)
+admin_model = service_proxy('admin_model')
+farmer_model = service_proxy('farmer_model')
+payment_model = service_proxy('payment_model')
+job_model = service_proxy('job_model')
+auth_utils = service_proxy('auth_utils')
+login_limiter = service_proxy('login_limiter')
+profile_store = service_proxy('profile_store')
+
 admin_auth_bp = Blueprint('admin_auth', __name__)
 
 @admin_auth_bp.route('/register', methods=['POST'])
@@ -38,18 +60,18 @@ def register_admin():
         
         new_admin = admin_model.create_admin(admin_data)
         
-        # Generate token
-        token = auth_utils.generate_token(new_admin)
+        # Generate access and refresh tokens
+        tokens = auth_utils.generate_token_pair(new_admin, 'admin')
         
         return jsonify({
             'success': True,
             'message': 'Admin registered successfully',
             'user': new_admin,
-            'token': token
+            **tokens
         }), 201
         
     except Exception as e:
-        print(f"Admin registration error: {e}")
+        logger.exception("Admin registration error")
         return jsonify({'success': False, 'error': 'Internal server error'}), 500
 
 @admin_auth_bp.route('/login', methods=['POST'])
@@ -62,8 +84,14 @@ def login_admin():
         if not data.get('employee_id') or not data.get('password'):
             return jsonify({'success': False, 'error': 'Employee ID and password are required'}), 400
         
+        # Throttle brute force before spending a bcrypt check
+        retry_after = login_limiter.check('admin', data['employee_id'])
+        if retry_after:
+            return throttled_response(retry_after)
+        
         # Verify password
         if not admin_model.verify_password(data['employee_id'], data['password']):
+            login_limiter.failed('admin', data['employee_id'])
             return jsonify({'success': False, 'error': 'Invalid employee ID or password'}), 401
         
         # Get admin data
@@ -74,18 +102,18 @@ def login_admin():
         if 'password' in admin:
             del admin['password']
         
-        # Generate token
-        token = auth_utils.generate_token(admin)
+        # Generate access and refresh tokens
+        tokens = auth_utils.generate_token_pair(admin, 'admin')
         
         return jsonify({
             'success': True,
             'message': 'Admin login successful',
             'user': admin,
-            'token': token
+            **tokens
         }), 200
         
     except Exception as e:
-        print(f"Admin login error: {e}")
+        logger.exception("Admin login error")
         return jsonify({'success': False, 'error': 'Internal server error'}), 500
 
 @admin_auth_bp.route('/profile', methods=['GET'])
@@ -110,7 +138,7 @@ def get_admin_profile():
         return jsonify({'success': True, 'admin': admin}), 200
         
     except Exception as e:
-        print(f"Get admin profile error: {e}")
+        logger.exception("Get admin profile error")
         return jsonify({'error': 'Internal server error'}), 500
 
 @admin_auth_bp.route('/profile', methods=['PUT'])
@@ -134,6 +162,8 @@ def update_admin_profile():
         data.pop('password', None)
         data.pop('employee_id', None)
         data.pop('_id', None)
+        # Permissions end up in token claims; only granted outside this endpoint
+        data.pop('permissions', None)
         
         success = admin_model.update_admin(payload['user_id'], data)
         
@@ -148,7 +178,7 @@ def update_admin_profile():
             return jsonify({'success': False, 'error': 'Failed to update admin profile'}), 500
         
     except Exception as e:
-        print(f"Update admin profile error: {e}")
+        logger.exception("Update admin profile error")
         return jsonify({'error': 'Internal server error'}), 500
 
 @admin_auth_bp.route('/farmers', methods=['GET'])
@@ -167,12 +197,21 @@ def get_all_farmers():
             return jsonify({'error': 'Invalid or expired token'}), 401
         
         # Verify it's an admin
-        admin = admin_model.get_admin_by_id(payload['user_id'])
-        if not admin:
+        if not _is_admin(payload):
             return jsonify({'error': 'Admin access required'}), 403
         
+        # Opt-in streaming (raw=1 is the older name): serialize batch by batch instead of building the full list
+        if any(request.args.get(name, '').lower() in ('1', 'true', 'yes') for name in ('stream', 'raw')):
+            fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+            batches = farmer_model.iter_farmer_batches(fields)
+            # Fetch the first batch before the 200 goes out, so a failing query is still a JSON 500
+            first = next(batches, [])
+            return Response(
+                stream_with_context(_stream_farmers_json(itertools.chain([first], batches))),
+                mimetype='application/json'
+            )
+        
         # Get all farmers
-        from models.farmer import farmer_model
         farmers = farmer_model.get_all_farmers()
         
         return jsonify({
@@ -182,9 +221,88 @@ def get_all_farmers():
         }), 200
         
     except Exception as e:
-        print(f"Get all farmers error: {e}")
+        logger.exception("Get all farmers error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@admin_auth_bp.route('/farmers/search', methods=['GET'])
+def search_farmers():
+    """Find farmers by name, village, phone or PAN card prefix (admin only)"""
+    try:
+        error = _require_admin()
+        if error:
+            return error
+        
+        query = request.args.get('q', '').strip()
+        if len(query) < MIN_QUERY_LENGTH:
+            return jsonify({'error': f'q must be at least {MIN_QUERY_LENGTH} characters'}), 400
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        
+        farmers = farmer_model.search_farmers(query, limit)
+        return jsonify({'success': True, 'farmers': farmers, 'count': len(farmers)}), 200
+        
+    except Exception as e:
+        logger.exception("Search farmers error")
         return jsonify({'error': 'Internal server error'}), 500
 
+@admin_auth_bp.route('/farmers/import', methods=['POST'])
+def import_farmers():
+    """Queue the registration of farmers from a CSV or Excel upload (admin only); the job result reports every row"""
+    try:
+        error = _require_admin()
+        if error:
+            return error
+        
+        # A multipart upload in the `file` field, or the file itself as the request body
+        upload = request.files.get('file')
+        if upload:
+            stream, excel = upload.stream, is_excel(upload.filename, upload.mimetype)
+        elif request.mimetype in ('text/csv', 'application/octet-stream') or is_excel(content_type=request.mimetype):
+            stream, excel = request.stream, is_excel(content_type=request.mimetype)
+        else:
+            return jsonify({'error': 'Upload a CSV or Excel file in the `file` field'}), 400
+        
+        # Rows are checked as the upload streams in; bcrypt for thousands of rows is slow, so it runs as a job
+        config = current_app.config
+        importer = FarmerImport(None, max_rows=int(config.get('FARMER_IMPORT_MAX_ROWS', 5000)))
+        try:
+            staged = importer.stage(read_rows(stream, excel))
+        except UnicodeDecodeError:
+            return jsonify({'error': 'CSV files must be UTF-8 encoded'}), 400
+        except (ValueError, csv.Error) as e:
+            # Also raised part-way through, for a malformed CSV line
+            return jsonify({'error': str(e)}), 400
+        
+        # The accepted rows carry passwords, so they go in the job's secret parameters (encrypted at rest)
+        params = {'filename': upload.filename if upload else None,
+                  'rows': len(staged['results']) + len(staged['farmers'])}
+        job = job_model.enqueue('import_farmers', params, {'upload': staged}, created_by=g.get('user_id'),
+                                max_attempts=get_job_type('import_farmers').max_attempts)
+        response = jsonify({'success': True, 'message': 'Import queued', 'job': _job_response(job)})
+        response.headers['Location'] = f"/api/admin/jobs/{job['_id']}"
+        return response, 202
+        
+    except Exception as e:
+        logger.exception("Import farmers error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+def _stream_farmers_json(farmer_batches):
+    """Serialize farmer batches into the envelope and JSON encoding (dates included) of the regular listing"""
+    yield '{"success": true, "farmers": ['
+    count = 0
+    try:
+        for batch in farmer_batches:
+            if not batch:
+                continue
+            # The app's JSON provider, as jsonify uses, minus the list brackets
+            body = current_app.json.dumps(batch)[1:-1]
+            yield body if count == 0 else ',' + body
+            count += len(batch)
+    except Exception:
+        # The 200 is already sent; the client sees a truncated (invalid) JSON body
+        logger.exception("Farmer listing stream failed after %d farmers", count)
+        raise
+    yield '], "count": %d}' % count
+
 @admin_auth_bp.route('/farmers/<farmer_id>/password', methods=['PUT'])
 def update_farmer_password(farmer_id):
     """Update farmer password (admin only)"""
@@ -196,16 +314,9 @@ def update_farmer_password(farmer_id):
         
         token = auth_header.split(' ')[1]
         
-        # Verify token and get admin
-        try:
-            payload = auth_utils.verify_token(token)
-            admin_id = payload.get('user_id')
-            admin = admin_model.get_admin_by_id(admin_id)
-            
-            if not admin:
-                return jsonify({'success': False, 'message': 'Invalid token'}), 401
-                
-        except Exception as e:
+        # Verify token and admin role
+        payload = auth_utils.verify_token(token)
+        if not payload or not _is_admin(payload):
             return jsonify({'success': False, 'message': 'Invalid token'}), 401
         
         # Get request data
@@ -216,7 +327,6 @@ def update_farmer_password(farmer_id):
             return jsonify({'success': False, 'message': 'New password is required'}), 400
         
         # Update farmer password
-        from models.farmer import farmer_model
         result = farmer_model.update_farmer_password(farmer_id, new_password)
         
         if result:
@@ -228,9 +338,243 @@ def update_farmer_password(farmer_id):
             return jsonify({'success': False, 'message': 'Farmer not found'}), 404
         
     except Exception as e:
-        print(f"Update farmer password error: {e}")
+        logger.exception("Update farmer password error")
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@admin_auth_bp.route('/farmers/<farmer_id>/assessments', methods=['POST'])
+@idempotent('assessments')
+def create_assessment(farmer_id):
+    """Post tax due for a farmer and tax year to the ledger (admin only; negative amounts adjust)"""
+    try:
+        error = _require_admin()
+        if error:
+            return error
+        
+        data = request.get_json() or {}
+        for field in ('tax_year', 'amount'):
+            if data.get(field) in (None, ''):
+                return jsonify({'error': f'{field} is required'}), 400
+        
+        if not farmer_model.get_farmer_version(farmer_id):
+            return jsonify({'error': 'Farmer not found'}), 404
+        
+        try:
+            # _require_admin verified the token, which put the caller's id on g
+            entry, balance = payment_model.record_assessment(
+                farmer_id, int(data['tax_year']), data['amount'], note=data.get('note'), created_by=g.get('user_id')
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'message': 'Assessment recorded successfully',
+            'assessment': present(entry),
+            'balance': present(balance)
+        }), 201
+        
+    except Exception as e:
+        logger.exception("Create assessment error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@admin_auth_bp.route('/farmers/<farmer_id>/balance', methods=['GET'])
+def get_farmer_balance(farmer_id):
+    """Outstanding balances of a farmer for every tax year (admin only)"""
+    try:
+        error = _require_admin()
+        if error:
+            return error
+        
+        balances = payment_model.get_balances(farmer_id)
+        return jsonify({
+            'farmer_id': farmer_id,
+            'balances': [present(balance) for balance in balances],
+            'total_outstanding': to_rupees(sum(balance['balance_paise'] for balance in balances))
+        }), 200
+        
+    except Exception as e:
+        logger.exception("Get farmer balance error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@admin_auth_bp.route('/payments', methods=['GET'])
+def list_payment_submissions():
+    """Payments reported by farmers, newest first (admin only; status=pending for the review queue)"""
+    try:
+        error = _require_admin()
+        if error:
+            return error
+        
+        try:
+            limit = min(max(int(request.args.get('limit', 50)), 1), 200)
+        except ValueError:
+            return jsonify({'error': 'limit must be a number'}), 400
+        
+        submissions = payment_model.get_submissions(request.args.get('farmer_id'), request.args.get('status'),
+                                                    limit, request.args.get('before'))
+        return jsonify({
+            'payments': [present(submission) for submission in submissions],
+            'count': len(submissions),
+            'next_before': str(submissions[-1]['_id']) if len(submissions) == limit else None
+        }), 200
+        
+    except Exception as e:
+        logger.exception("List payment submissions error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@admin_auth_bp.route('/payments/<submission_id>/confirm', methods=['POST'])
+def confirm_payment(submission_id):
+    """Post a farmer's pending payment to the ledger (admin only; repeating a confirm never pays twice)"""
+    try:
+        error = _require_admin()
+        if error:
+            return error
+        
+        if not ObjectId.is_valid(submission_id):
+            return jsonify({'error': 'Payment not found'}), 404
+        
+        submission, balance = payment_model.confirm_submission(submission_id, confirmed_by=g.get('user_id'))
+        if submission is None:
+            return jsonify({'error': 'Payment not found'}), 404
+        if balance is None:
+            return jsonify({'error': f"Payment is already {submission['status']}"}), 409
+        
+        return jsonify({
+            'message': 'Payment confirmed',
+            'payment': present(submission),
+            'balance': present(balance)
+        }), 200
+        
+    except Exception as e:
+        logger.exception("Confirm payment error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@admin_auth_bp.route('/payments/<submission_id>/reject', methods=['POST'])
+def reject_payment(submission_id):
+    """Reject a farmer's pending payment (admin only; optional `reason`)"""
+    try:
+        error = _require_admin()
+        if error:
+            return error
+        
+        if not ObjectId.is_valid(submission_id):
+            return jsonify({'error': 'Payment not found'}), 404
+        
+        data = request.get_json(silent=True) or {}
+        submission = payment_model.reject_submission(submission_id, rejected_by=g.get('user_id'),
+                                                     reason=data.get('reason'))
+        if submission is None:
+            return jsonify({'error': 'Payment not found or no longer pending'}), 409
+        
+        return jsonify({'message': 'Payment rejected', 'payment': present(submission)}), 200
+        
+    except Exception as e:
+        logger.exception("Reject payment error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+def _job_response(job):
+    job['_id'] = str(job['_id'])
+    return job
+
+@admin_auth_bp.route('/jobs', methods=['POST'])
+@idempotent('jobs')
+def create_job():
+    """Queue a background job (admin only): export_farmers, bulk_password_reset, year_end_assessments, ..."""
+    try:
+        error = _require_admin()
+        if error:
+            return error
+        
+        data = request.get_json() or {}
+        job_type = get_job_type(data.get('type'))
+        if not job_type:
+            return jsonify({'error': f"Unknown job type {data.get('type')!r}"}), 400
+        
+        # Secret parameters (e.g. new passwords) never appear in the job document the API returns
+        params = dict(data.get('params') or {})
+        secret_params = {field: params.pop(field) for field in job_type.secret_fields if field in params}
+        if job_type.prepare:
+            try:
+                secret_params = job_type.prepare(secret_params, current_app.config)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        
+        job = job_model.enqueue(job_type.name, params, secret_params, created_by=g.get('user_id'),
+                                max_attempts=job_type.max_attempts)
+        response = jsonify({'message': 'Job queued', 'job': _job_response(job)})
+        response.headers['Location'] = f"/api/admin/jobs/{job['_id']}"
+        return response, 202
+        
+    except Exception as e:
+        logger.exception("Create job error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@admin_auth_bp.route('/jobs', methods=['GET'])
+def list_jobs():
+    """Recent background jobs, newest first (admin only; filter by status and type)"""
+    try:
+        error = _require_admin()
+        if error:
+            return error
+        
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+        jobs = job_model.list_jobs(request.args.get('status'), request.args.get('type'), limit)
+        return jsonify({'jobs': [_job_response(job) for job in jobs], 'count': len(jobs)}), 200
+        
+    except Exception as e:
+        logger.exception("List jobs error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@admin_auth_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status, progress and result of a background job (admin only)"""
+    try:
+        error = _require_admin()
+        if error:
+            return error
+        
+        job = job_model.get_job(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify({'job': _job_response(job)}), 200
+        
+    except Exception as e:
+        logger.exception("Get job error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@admin_auth_bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancel a queued job, or ask the worker running it to stop (admin only)"""
+    try:
+        error = _require_admin()
+        if error:
+            return error
+        
+        job = job_model.cancel(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify({'job': _job_response(job)}), 200
+        
+    except Exception as e:
+        logger.exception("Cancel job error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@admin_auth_bp.route('/jobs/<job_id>/download', methods=['GET'])
+def download_job_file(job_id):
+    """File produced by a finished job, e.g. a farmer export (admin only)"""
+    try:
+        error = _require_admin()
+        if error:
+            return error
+        
+        job = job_model.get_job(job_id)
+        path = ((job or {}).get('result') or {}).get('file')
+        if not job or job.get('status') != 'succeeded' or not path or not os.path.isfile(path):
+            return jsonify({'error': 'No file available for this job'}), 404
+        return send_file(os.path.abspath(path), as_attachment=True, conditional=True)
+        
+    except Exception as e:
+        logger.exception("Download job file error")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @admin_auth_bp.route('/exists', methods=['GET'])
 def admin_exists():
     employee_id = request.args.get('employee_id', '').upper()
@@ -238,3 +582,104 @@ def admin_exists():
         return jsonify({'exists': False, 'error': 'Employee ID is required'}), 400
     admin = admin_model.get_admin_by_employee_id(employee_id)
     return jsonify({'exists': bool(admin)})
+
+def _is_admin(payload):
+    """Admin check from the token alone: its role claim must say admin
+
+    Access tokens are short-lived and /api/auth/refresh reloads the account from
+    the admins collection, so a deleted admin loses access within ACCESS_TOKEN_TTL.
+    Tokens without a role claim are denied.
+    """
+    return payload.get('user_type') == 'admin'
+
+def _require_admin():
+    """Return an error response unless the request carries a valid admin token"""
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return jsonify({'error': 'Authorization token required'}), 401
+    
+    token = auth_header.split(' ')[1]
+    payload = auth_utils.verify_token(token)
+    
+    if not payload:
+        return jsonify({'error': 'Invalid or expired token'}), 401
+    
+    # Verify it's an admin
+    if not _is_admin(payload):
+        return jsonify({'error': 'Admin access required'}), 403
+    return None
+
+@admin_auth_bp.route('/profiles', methods=['GET'])
+def list_profiles():
+    """List profiled routes with their sample counts (admin only)"""
+    try:
+        error = _require_admin()
+        if error:
+            return error
+        
+        return jsonify({'success': True, 'profiles': profile_store.summary()}), 200
+        
+    except Exception as e:
+        logger.exception("List profiles error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@admin_auth_bp.route('/profiles/<route>', methods=['GET'])
+def download_profile(route):
+    """Download aggregated collapsed stacks for a route (admin only)"""
+    try:
+        error = _require_admin()
+        if error:
+            return error
+        
+        collapsed = profile_store.collapsed(route)
+        if collapsed is None:
+            return jsonify({'error': 'No profile for this route'}), 404
+        
+        return Response(collapsed, mimetype='text/plain', headers={
+            'Content-Disposition': f'attachment; filename={route}.folded'
+        })
+        
+    except Exception as e:
+        logger.exception("Download profile error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@admin_auth_bp.route('/profiles', methods=['DELETE'])
+def clear_profiles():
+    """Discard collected profiles (admin only)"""
+    try:
+        error = _require_admin()
+        if error:
+            return error
+        
+        profile_store.clear()
+        return jsonify({'success': True, 'message': 'Profiles cleared'}), 200
+        
+    except Exception as e:
+        logger.exception("Clear profiles error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@admin_auth_bp.route('/profiles/token', methods=['POST'])
+def create_profile_token():
+    """Issue a signed header value that forces profiling of requests that send it (admin only)"""
+    try:
+        error = _require_admin()
+        if error:
+            return error
+        
+        secret = current_app.config.get('PROFILE_SECRET')
+        if not secret:
+            return jsonify({'error': 'Signed profiling is not enabled (PROFILE_SECRET)'}), 400
+        
+        data = request.get_json(silent=True) or {}
+        ttl = min(int(data.get('ttl', 300)), 3600)
+        
+        return jsonify({
+            'success': True,
+            'header': PROFILE_HEADER,
+            'value': sign_profile_request(secret, ttl),
+            'expires_in': ttl
+        }), 200
+        
+    except Exception as e:
+        logger.exception("Create profile token error")
+        return jsonify({'error': 'Internal server error'}), 500
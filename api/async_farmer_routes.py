@@ -0,0 +1,168 @@
+import asyncio
+import logging
+from quart import Blueprint, current_app, request, jsonify, make_response
+from models.async_farmer import async_farmer_model
+from utils.auth import auth_utils
+from utils.conditional import document_etag, is_not_modified, set_validators
+from utils.route_helpers import FARMER_REQUIRED_FIELDS, FARMER_PROTECTED_FIELDS, farmer_document, missing_field, without_fields
+from utils.rate_limit import throttled_response
+
+logger = logging.getLogger(__name__)
+
+async_farmer_bp = Blueprint('async_farmer_auth', __name__)
+
+@async_farmer_bp.route('/register', methods=['POST'])
+async def register_farmer():
+    """Register a new farmer"""
+    try:
+        data = await request.get_json()
+        
+        # Validate required fields
+        field = missing_field(data, FARMER_REQUIRED_FIELDS)
+        if field:
+            return jsonify({'error': f'{field} is required'}), 400
+        
+        # Check if farmer already exists
+        existing_farmer = await async_farmer_model.get_farmer_by_pan(data['pan_card'])
+        if existing_farmer:
+            return jsonify({'error': 'Farmer with this PAN card already exists'}), 409
+        
+        # Create farmer
+        farmer_data = farmer_document(data)
+        
+        new_farmer = await async_farmer_model.create_farmer(farmer_data)
+        
+        # Generate access and refresh tokens
+        tokens = auth_utils.generate_token_pair(new_farmer, 'farmer')
+        
+        return jsonify({
+            'success': True,
+            'message': 'Farmer registered successfully',
+            'user': new_farmer,
+            **tokens
+        }), 201
+        
+    except Exception as e:
+        logger.exception("Farmer registration error")
+        return jsonify({'success': False, 'error': 'Internal server error'}), 500
+
+@async_farmer_bp.route('/login', methods=['POST'])
+async def login_farmer():
+    """Login farmer with PAN card and password"""
+    try:
+        data = await request.get_json()
+        
+        # Validate required fields
+        if not data.get('pan_card') or not data.get('password'):
+            return jsonify({'success': False, 'error': 'PAN card and password are required'}), 400
+        
+        # Throttle brute force before spending a bcrypt check (the MongoDB bucket store blocks, so off the loop)
+        limiter = current_app.extensions['login_limiter']
+        loop = asyncio.get_running_loop()
+        retry_after = await loop.run_in_executor(None, limiter.check, 'farmer', data['pan_card'],
+                                                 limiter.client_ip(request))
+        if retry_after:
+            return throttled_response(retry_after, jsonify)
+        
+        # Verify password
+        if not await async_farmer_model.verify_password(data['pan_card'], data['password']):
+            await loop.run_in_executor(None, limiter.failed, 'farmer', data['pan_card'])
+            return jsonify({'success': False, 'error': 'Invalid PAN card or password'}), 401
+        
+        # Get farmer data
+        farmer = await async_farmer_model.get_farmer_by_pan(data['pan_card'])
+        if not farmer:
+            return jsonify({'success': False, 'error': 'Farmer not found'}), 404
+        
+        # Generate access and refresh tokens
+        tokens = auth_utils.generate_token_pair(farmer, 'farmer')
+        
+        return jsonify({
+            'success': True,
+            'message': 'Farmer login successful',
+            'user': farmer,
+            **tokens
+        }), 200
+        
+    except Exception as e:
+        logger.exception("Farmer login error")
+        return jsonify({'success': False, 'error': 'Internal server error'}), 500
+
+@async_farmer_bp.route('/profile', methods=['GET'])
+async def get_farmer_profile():
+    """Get farmer profile"""
+    try:
+        # Get token from header
+        auth_header = request.headers.get('Authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return jsonify({'error': 'Authorization token required'}), 401
+        
+        token = auth_header.split(' ')[1]
+        payload = auth_utils.verify_token(token)
+        
+        if not payload:
+            return jsonify({'error': 'Invalid or expired token'}), 401
+        
+        # Polling clients send back the ETag; answer from _id/updated_at alone while it still matches
+        if request.if_none_match or request.if_modified_since:
+            version = await async_farmer_model.get_farmer_version(payload['user_id'])
+            if not version:
+                return jsonify({'error': 'Farmer not found'}), 404
+            etag = document_etag(version['_id'], version.get('updated_at'))
+            if is_not_modified(request, etag, version.get('updated_at')):
+                return set_validators(await make_response('', 304), etag, version.get('updated_at'))
+        
+        farmer = await async_farmer_model.get_farmer_by_id(payload['user_id'])
+        if not farmer:
+            return jsonify({'error': 'Farmer not found'}), 404
+        
+        response = jsonify({'success': True, 'farmer': farmer})
+        return set_validators(response, document_etag(farmer['_id'], farmer.get('updated_at')), farmer.get('updated_at')), 200
+        
+    except Exception as e:
+        logger.exception("Get farmer profile error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@async_farmer_bp.route('/profile', methods=['PUT'])
+async def update_farmer_profile():
+    """Update farmer profile"""
+    try:
+        # Get token from header
+        auth_header = request.headers.get('Authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return jsonify({'error': 'Authorization token required'}), 401
+        
+        token = auth_header.split(' ')[1]
+        payload = auth_utils.verify_token(token)
+        
+        if not payload:
+            return jsonify({'error': 'Invalid or expired token'}), 401
+        
+        data = await request.get_json()
+        
+        # Remove sensitive fields that shouldn't be updated via this endpoint
+        data = without_fields(data, FARMER_PROTECTED_FIELDS)
+        
+        success = await async_farmer_model.update_farmer(payload['user_id'], data)
+        
+        if success:
+            updated_farmer = await async_farmer_model.get_farmer_by_id(payload['user_id'])
+            return jsonify({
+                'success': True,
+                'message': 'Farmer profile updated successfully',
+                'farmer': updated_farmer
+            }), 200
+        else:
+            return jsonify({'success': False, 'error': 'Failed to update farmer profile'}), 500
+        
+    except Exception as e:
+        logger.exception("Update farmer profile error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@async_farmer_bp.route('/exists', methods=['GET'])
+async def farmer_exists():
+    pan_card = request.args.get('pan_card', '').upper()
+    if not pan_card:
+        return jsonify({'exists': False, 'error': 'PAN card is required'}), 400
+    farmer = await async_farmer_model.get_farmer_by_pan(pan_card)
+    return jsonify({'exists': bool(farmer)})
@@ -0,0 +1,228 @@
+import logging
+from quart import Blueprint, request, jsonify, make_response
+from models.async_tax_record import async_tax_record_model
+from utils.auth import auth_utils
+from utils.tax import calculate_tax_amount
+from utils.conditional import document_etag, is_not_modified, set_validators
+from utils.route_helpers import TAX_RECORD_REQUIRED_FIELDS, TAX_RECORD_PROTECTED_FIELDS, missing_field, without_fields
+from utils.idempotency import async_idempotent
+
+logger = logging.getLogger(__name__)
+
+async_tax_bp = Blueprint('async_tax', __name__)
+
+@async_tax_bp.route('/records', methods=['POST'])
+@async_idempotent('tax_records')
+async def create_tax_record():
+    """Create a new tax record"""
+    try:
+        # Get token from header
+        auth_header = request.headers.get('Authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return jsonify({'error': 'Authorization token required'}), 401
+        
+        token = auth_header.split(' ')[1]
+        payload = auth_utils.verify_token(token)
+        
+        if not payload:
+            return jsonify({'error': 'Invalid or expired token'}), 401
+        
+        data = await request.get_json()
+        
+        # Validate required fields
+        field = missing_field(data, TAX_RECORD_REQUIRED_FIELDS)
+        if field:
+            return jsonify({'error': f'{field} is required'}), 400
+        
+        # Add user_id to the tax record
+        data['user_id'] = payload['user_id']
+        
+        # Create tax record
+        new_record = await async_tax_record_model.create_tax_record(data)
+        
+        return jsonify({
+            'message': 'Tax record created successfully',
+            'record': new_record
+        }), 201
+        
+    except Exception as e:
+        logger.exception("Create tax record error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@async_tax_bp.route('/records', methods=['GET'])
+async def get_tax_records():
+    """Get all tax records for the authenticated user"""
+    try:
+        # Get token from header
+        auth_header = request.headers.get('Authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return jsonify({'error': 'Authorization token required'}), 401
+        
+        token = auth_header.split(' ')[1]
+        payload = auth_utils.verify_token(token)
+        
+        if not payload:
+            return jsonify({'error': 'Invalid or expired token'}), 401
+        
+        # A count/max(updated_at) aggregate is enough to tell a polling client nothing changed
+        if request.if_none_match:
+            version = await async_tax_record_model.get_records_version(payload['user_id'])
+            if version:
+                etag = document_etag(payload['user_id'], version['count'], version['updated_at'])
+                if is_not_modified(request, etag):
+                    return set_validators(await make_response('', 304), etag)
+        
+        # Get tax records for the user
+        records = await async_tax_record_model.get_tax_records_by_user(payload['user_id'])
+        
+        response = jsonify({
+            'records': records,
+            'count': len(records)
+        })
+        # No Last-Modified: deleting a record changes the list without moving its newest timestamp
+        updated_at = max((record['updated_at'] for record in records if record.get('updated_at')), default=None)
+        return set_validators(response, document_etag(payload['user_id'], len(records), updated_at)), 200
+        
+    except Exception as e:
+        logger.exception("Get tax records error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@async_tax_bp.route('/records/<record_id>', methods=['GET'])
+async def get_tax_record(record_id):
+    """Get a specific tax record"""
+    try:
+        # Get token from header
+        auth_header = request.headers.get('Authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return jsonify({'error': 'Authorization token required'}), 401
+        
+        token = auth_header.split(' ')[1]
+        payload = auth_utils.verify_token(token)
+        
+        if not payload:
+            return jsonify({'error': 'Invalid or expired token'}), 401
+        
+        # Get tax record
+        record = await async_tax_record_model.get_tax_record_by_id(record_id)
+        
+        if not record:
+            return jsonify({'error': 'Tax record not found'}), 404
+        
+        # Check if the record belongs to the authenticated user
+        if record.get('user_id') != payload['user_id']:
+            return jsonify({'error': 'Unauthorized access'}), 403
+        
+        return jsonify({'record': record}), 200
+        
+    except Exception as e:
+        logger.exception("Get tax record error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@async_tax_bp.route('/records/<record_id>', methods=['PUT'])
+async def update_tax_record(record_id):
+    """Update a tax record"""
+    try:
+        # Get token from header
+        auth_header = request.headers.get('Authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return jsonify({'error': 'Authorization token required'}), 401
+        
+        token = auth_header.split(' ')[1]
+        payload = auth_utils.verify_token(token)
+        
+        if not payload:
+            return jsonify({'error': 'Invalid or expired token'}), 401
+        
+        # Check if record exists and belongs to user
+        record = await async_tax_record_model.get_tax_record_by_id(record_id)
+        if not record:
+            return jsonify({'error': 'Tax record not found'}), 404
+        
+        if record.get('user_id') != payload['user_id']:
+            return jsonify({'error': 'Unauthorized access'}), 403
+        
+        data = await request.get_json()
+        
+        # Remove fields that shouldn't be updated
+        data = without_fields(data, TAX_RECORD_PROTECTED_FIELDS)
+        
+        # Update tax record
+        success = await async_tax_record_model.update_tax_record(record_id, data)
+        
+        if success:
+            updated_record = await async_tax_record_model.get_tax_record_by_id(record_id)
+            return jsonify({
+                'message': 'Tax record updated successfully',
+                'record': updated_record
+            }), 200
+        else:
+            return jsonify({'error': 'Failed to update tax record'}), 500
+        
+    except Exception as e:
+        logger.exception("Update tax record error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@async_tax_bp.route('/records/<record_id>', methods=['DELETE'])
+async def delete_tax_record(record_id):
+    """Delete a tax record"""
+    try:
+        # Get token from header
+        auth_header = request.headers.get('Authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return jsonify({'error': 'Authorization token required'}), 401
+        
+        token = auth_header.split(' ')[1]
+        payload = auth_utils.verify_token(token)
+        
+        if not payload:
+            return jsonify({'error': 'Invalid or expired token'}), 401
+        
+        # Check if record exists and belongs to user
+        record = await async_tax_record_model.get_tax_record_by_id(record_id)
+        if not record:
+            return jsonify({'error': 'Tax record not found'}), 404
+        
+        if record.get('user_id') != payload['user_id']:
+            return jsonify({'error': 'Unauthorized access'}), 403
+        
+        # Delete tax record
+        success = await async_tax_record_model.delete_tax_record(record_id)
+        
+        if success:
+            return jsonify({'message': 'Tax record deleted successfully'}), 200
+        else:
+            return jsonify({'error': 'Failed to delete tax record'}), 500
+        
+    except Exception as e:
+        logger.exception("Delete tax record error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@async_tax_bp.route('/calculate', methods=['POST'])
+async def calculate_tax():
+    """Calculate tax based on income and other factors"""
+    try:
+        # Get token from header
+        auth_header = request.headers.get('Authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return jsonify({'error': 'Authorization token required'}), 401
+        
+        token = auth_header.split(' ')[1]
+        payload = auth_utils.verify_token(token)
+        
+        if not payload:
+            return jsonify({'error': 'Invalid or expired token'}), 401
+        
+        data = await request.get_json()
+        
+        # Validate required fields
+        if not data.get('income'):
+            return jsonify({'error': 'Income is required'}), 400
+        
+        income = float(data['income'])
+        tax_type = data.get('tax_type', 'federal')
+        
+        return jsonify(calculate_tax_amount(income, tax_type)), 200
+        
+    except Exception as e:
+        logger.exception("Calculate tax error")
+        return jsonify({'error': 'Internal server error'}), 500 
\ No newline at end of file
@@ -1,8 +1,19 @@
+import logging
 from flask import Blueprint, request, jsonify
-from models.user import user_model
-from utils.auth import auth_utils
+from utils.services import service_proxy
+from utils.rate_limit import throttled_response
 import json
 
+logger = logging.getLogger(__name__)
+
+# Resolved per request from the app's services (see app.create_app)
+user_model = service_proxy('user_model')
+farmer_model = service_proxy('farmer_model')
+admin_model = service_proxy('admin_model')
+auth_utils = service_proxy('auth_utils')
+login_limiter = service_proxy('login_limiter')
+refresh_tokens = service_proxy('refresh_tokens')
+
 auth_bp = Blueprint('auth', __name__)
 
 @auth_bp.route('/register', methods=['POST'])
@@ -36,17 +47,17 @@ def register():
         
         new_user = user_model.create_user(user_data)
         
-        # Generate token
-        token = auth_utils.generate_token(new_user)
+        # Generate access and refresh tokens
+        tokens = auth_utils.generate_token_pair(new_user, 'user')
         
         return jsonify({
             'message': 'User registered successfully',
             'user': new_user,
-            'token': token
+            **tokens
         }), 201
         
     except Exception as e:
-        print(f"Registration error: {e}")
+        logger.exception("Registration error")
         return jsonify({'error': 'Internal server error'}), 500
 
 @auth_bp.route('/login', methods=['POST'])
@@ -59,8 +70,14 @@ def login():
         if not data.get('email') or not data.get('password'):
             return jsonify({'error': 'Email and password are required'}), 400
         
+        # Throttle brute force before spending a bcrypt check
+        retry_after = login_limiter.check('user', data['email'])
+        if retry_after:
+            return throttled_response(retry_after)
+        
         # Verify password
         if not user_model.verify_password(data['email'], data['password']):
+            login_limiter.failed('user', data['email'])
             return jsonify({'error': 'Invalid email or password'}), 401
         
         # Get user data
@@ -68,17 +85,79 @@ def login():
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Generate token
-        token = auth_utils.generate_token(user)
+        # Generate access and refresh tokens
+        tokens = auth_utils.generate_token_pair(user, 'user')
         
         return jsonify({
             'message': 'Login successful',
             'user': user,
-            'token': token
+            **tokens
         }), 200
         
     except Exception as e:
-        print(f"Login error: {e}")
+        logger.exception("Login error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@auth_bp.route('/refresh', methods=['POST'])
+def refresh_token():
+    """Exchange a refresh token for a new access/refresh token pair"""
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        if not data.get('refresh_token'):
+            return jsonify({'error': 'refresh_token is required'}), 400
+        
+        payload = auth_utils.verify_token(data['refresh_token'], token_type='refresh')
+        if not payload:
+            return jsonify({'error': 'Invalid or expired refresh token'}), 401
+        
+        # Each refresh token is exchanged once; replaying one revokes the account's refresh tokens
+        if not refresh_tokens.spend(payload):
+            return jsonify({'error': 'Refresh token has already been used or was revoked'}), 401
+        
+        # Reload the account from its role's collection, so deleted accounts can't refresh
+        user_type = payload.get('user_type')
+        if user_type == 'farmer':
+            account = farmer_model.get_farmer_by_id(payload['user_id'])
+        elif user_type == 'admin':
+            account = admin_model.get_admin_by_id(payload['user_id'])
+        else:
+            account = user_model.get_user_by_id(payload['user_id'])
+        
+        if not account:
+            return jsonify({'error': 'Account not found'}), 401
+        
+        return jsonify({
+            'message': 'Token refreshed',
+            **auth_utils.generate_token_pair(account, user_type)
+        }), 200
+        
+    except Exception as e:
+        logger.exception("Token refresh error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@auth_bp.route('/logout', methods=['POST'])
+def logout():
+    """Revoke a refresh token (all_devices=true revokes every refresh token of the account)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        if not data.get('refresh_token'):
+            return jsonify({'error': 'refresh_token is required'}), 400
+        
+        payload = auth_utils.verify_token(data['refresh_token'], token_type='refresh')
+        if not payload:
+            return jsonify({'error': 'Invalid or expired refresh token'}), 401
+        
+        if data.get('all_devices'):
+            refresh_tokens.revoke_all(payload.get('user_type'), payload['user_id'])
+        else:
+            refresh_tokens.revoke(payload)
+        
+        return jsonify({'message': 'Logged out'}), 200
+        
+    except Exception as e:
+        logger.exception("Logout error")
         return jsonify({'error': 'Internal server error'}), 500
 
 @auth_bp.route('/profile', methods=['GET'])
@@ -103,7 +182,7 @@ def get_profile():
         return jsonify({'user': user}), 200
         
     except Exception as e:
-        print(f"Get profile error: {e}")
+        logger.exception("Get profile error")
         return jsonify({'error': 'Internal server error'}), 500
 
 @auth_bp.route('/profile', methods=['PUT'])
@@ -140,5 +219,5 @@ def update_profile():
             return jsonify({'error': 'Failed to update profile'}), 500
         
     except Exception as e:
-        print(f"Update profile error: {e}")
+        logger.exception("Update profile error")
         return jsonify({'error': 'Internal server error'}), 500 
\ No newline at end of file
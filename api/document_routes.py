@@ -0,0 +1,83 @@
+import os
+import logging
+from flask import Blueprint, current_app, request, jsonify, send_file
+from utils.services import service_proxy, get_services
+from utils import documents
+
+logger = logging.getLogger(__name__)
+
+# Resolved per request from the app's services (see app.create_app)
+job_model = service_proxy('job_model')
+auth_utils = service_proxy('auth_utils')
+
+document_bp = Blueprint('documents', __name__)
+
+# Seconds a client should wait before asking again for a document that is still rendering
+RETRY_AFTER = 2
+
+def _authenticate():
+    """Token payload of the caller, or None"""
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return None
+    return auth_utils.verify_token(auth_header.split(' ')[1])
+
+def _serve(kind, params):
+    """The cached document if it is rendered, otherwise queue the render and answer 202"""
+    payload = _authenticate()
+    if not payload:
+        return jsonify({'error': 'Valid authorization token required'}), 401
+
+    file_format = request.args.get('format', 'pdf').lower()
+    if file_format not in documents.FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(documents.FORMATS)}"}), 400
+
+    farmer_id = payload['user_id']
+    source = documents.load_source(get_services(), kind, farmer_id, params)
+    if source is None:
+        return jsonify({'error': f'{kind.capitalize()} not found'}), 404
+
+    # The PDF fonts cannot show e.g. Devanagari names; the HTML document can, so send that instead
+    if file_format == 'pdf' and not documents.pdf_can_render(kind, source):
+        file_format = 'html'
+    
+    # The address covers everything the document shows, so a cached file is never stale
+    digest = documents.content_hash(kind, file_format, source)
+    path = documents.cache_path(current_app.config.get('DOCUMENT_CACHE_DIR') or 'document_cache', digest, file_format)
+    if os.path.isfile(path):
+        # conditional=True answers If-None-Match with 304 and Range requests with 206
+        response = send_file(
+            os.path.abspath(path), mimetype=documents.FORMATS[file_format], conditional=True, etag=digest,
+            as_attachment=file_format == 'pdf', download_name=documents.download_name(kind, file_format, source)
+        )
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    job = job_model.enqueue('render_document', {'kind': kind, 'format': file_format, 'farmer_id': farmer_id, **params},
+                            created_by=farmer_id, dedupe_key=digest)
+    response = jsonify({
+        'message': f'{kind.capitalize()} is being prepared; request it again shortly',
+        'job_id': str(job['_id']),
+        'status': job['status']
+    })
+    response.headers['Retry-After'] = str(RETRY_AFTER)
+    response.headers['Location'] = request.full_path.rstrip('?')
+    return response, 202
+
+@document_bp.route('/receipts/<record_id>', methods=['GET'])
+def get_receipt(record_id):
+    """Receipt for one of the authenticated farmer's tax records (format=pdf or html)"""
+    try:
+        return _serve('receipt', {'record_id': record_id})
+    except Exception as e:
+        logger.exception("Get receipt error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@document_bp.route('/statements/<int:tax_year>', methods=['GET'])
+def get_statement(tax_year):
+    """Annual statement of the authenticated farmer: tax records, assessments, payments and balance"""
+    try:
+        return _serve('statement', {'tax_year': tax_year})
+    except Exception as e:
+        logger.exception("Get statement error")
+        return jsonify({'error': 'Internal server error'}), 500
@@ -1,7 +1,16 @@
-from flask import Blueprint, request, jsonify
-from models.farmer import farmer_model
-from utils.auth import auth_utils
-import json
+import logging
+from flask import Blueprint, request, jsonify, make_response
+from utils.services import service_proxy
+from utils.rate_limit import throttled_response
+from utils.conditional import document_etag, is_not_modified, set_validators
+from utils.route_helpers import FARMER_REQUIRED_FIELDS, FARMER_PROTECTED_FIELDS, farmer_document, missing_field, without_fields
+
+logger = logging.getLogger(__name__)
+
+# Resolved per request from the app's services (see app.create_app)
+farmer_model = service_proxy('farmer_model')
+auth_utils = service_proxy('auth_utils')
+login_limiter = service_proxy('login_limiter')
 
 farmer_auth_bp = Blueprint('farmer_auth', __name__)
 
@@ -12,10 +21,9 @@ def register_farmer():
         data = request.get_json()
         
         # Validate required fields
-        required_fields = ['pan_card', 'password', 'first_name', 'last_name']
-        for field in required_fields:
-            if not data.get(field):
-                return jsonify({'error': f'{field} is required'}), 400
+        field = missing_field(data, FARMER_REQUIRED_FIELDS)
+        if field:
+            return jsonify({'error': f'{field} is required'}), 400
         
         # Check if farmer already exists
         existing_farmer = farmer_model.get_farmer_by_pan(data['pan_card'])
@@ -23,32 +31,22 @@ def register_farmer():
             return jsonify({'error': 'Farmer with this PAN card already exists'}), 409
         
         # Create farmer
-        farmer_data = {
-            'pan_card': data['pan_card'].upper(),
-            'password': data['password'],
-            'first_name': data['first_name'],
-            'last_name': data['last_name'],
-            'phone': data.get('phone', ''),
-            'email': data.get('email', ''),
-            'address': data.get('address', {}),
-            'land_details': data.get('land_details', {}),
-            'bank_details': data.get('bank_details', {})
-        }
+        farmer_data = farmer_document(data)
         
         new_farmer = farmer_model.create_farmer(farmer_data)
         
-        # Generate token
-        token = auth_utils.generate_token(new_farmer)
+        # Generate access and refresh tokens
+        tokens = auth_utils.generate_token_pair(new_farmer, 'farmer')
         
         return jsonify({
             'success': True,
             'message': 'Farmer registered successfully',
             'user': new_farmer,
-            'token': token
+            **tokens
         }), 201
         
     except Exception as e:
-        print(f"Farmer registration error: {e}")
+        logger.exception("Farmer registration error")
         return jsonify({'success': False, 'error': 'Internal server error'}), 500
 
 @farmer_auth_bp.route('/login', methods=['POST'])
@@ -61,8 +59,14 @@ def login_farmer():
         if not data.get('pan_card') or not data.get('password'):
             return jsonify({'success': False, 'error': 'PAN card and password are required'}), 400
         
+        # Throttle brute force before spending a bcrypt check
+        retry_after = login_limiter.check('farmer', data['pan_card'])
+        if retry_after:
+            return throttled_response(retry_after)
+        
         # Verify password
         if not farmer_model.verify_password(data['pan_card'], data['password']):
+            login_limiter.failed('farmer', data['pan_card'])
             return jsonify({'success': False, 'error': 'Invalid PAN card or password'}), 401
         
         # Get farmer data
@@ -70,18 +74,18 @@ def login_farmer():
         if not farmer:
             return jsonify({'success': False, 'error': 'Farmer not found'}), 404
         
-        # Generate token
-        token = auth_utils.generate_token(farmer)
+        # Generate access and refresh tokens
+        tokens = auth_utils.generate_token_pair(farmer, 'farmer')
         
         return jsonify({
             'success': True,
             'message': 'Farmer login successful',
             'user': farmer,
-            'token': token
+            **tokens
         }), 200
         
     except Exception as e:
-        print(f"Farmer login error: {e}")
+        logger.exception("Farmer login error")
         return jsonify({'success': False, 'error': 'Internal server error'}), 500
 
 @farmer_auth_bp.route('/profile', methods=['GET'])
@@ -99,14 +103,24 @@ def get_farmer_profile():
         if not payload:
             return jsonify({'error': 'Invalid or expired token'}), 401
         
+        # Polling clients send back the ETag; answer from _id/updated_at alone while it still matches
+        if request.if_none_match or request.if_modified_since:
+            version = farmer_model.get_farmer_version(payload['user_id'])
+            if not version:
+                return jsonify({'error': 'Farmer not found'}), 404
+            etag = document_etag(version['_id'], version.get('updated_at'))
+            if is_not_modified(request, etag, version.get('updated_at')):
+                return set_validators(make_response('', 304), etag, version.get('updated_at'))
+        
         farmer = farmer_model.get_farmer_by_id(payload['user_id'])
         if not farmer:
             return jsonify({'error': 'Farmer not found'}), 404
         
-        return jsonify({'success': True, 'farmer': farmer}), 200
+        response = jsonify({'success': True, 'farmer': farmer})
+        return set_validators(response, document_etag(farmer['_id'], farmer.get('updated_at')), farmer.get('updated_at')), 200
         
     except Exception as e:
-        print(f"Get farmer profile error: {e}")
+        logger.exception("Get farmer profile error")
         return jsonify({'error': 'Internal server error'}), 500
 
 @farmer_auth_bp.route('/profile', methods=['PUT'])
@@ -127,9 +141,7 @@ def update_farmer_profile():
         data = request.get_json()
         
         # Remove sensitive fields that shouldn't be updated via this endpoint
-        data.pop('password', None)
-        data.pop('pan_card', None)
-        data.pop('_id', None)
+        data = without_fields(data, FARMER_PROTECTED_FIELDS)
         
         success = farmer_model.update_farmer(payload['user_id'], data)
         
@@ -144,7 +156,7 @@ def update_farmer_profile():
             return jsonify({'success': False, 'error': 'Failed to update farmer profile'}), 500
         
     except Exception as e:
-        print(f"Update farmer profile error: {e}")
+        logger.exception("Update farmer profile error")
         return jsonify({'error': 'Internal server error'}), 500
 
 @farmer_auth_bp.route('/exists', methods=['GET'])
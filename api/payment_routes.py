@@ -0,0 +1,138 @@
+import logging
+from flask import Blueprint, request, jsonify
+from utils.services import service_proxy
+from utils.idempotency import idempotent
+from models.payment import present, to_rupees
+
+logger = logging.getLogger(__name__)
+
+# Resolved per request from the app's services (see app.create_app)
+payment_model = service_proxy('payment_model')
+auth_utils = service_proxy('auth_utils')
+
+payment_bp = Blueprint('payments', __name__)
+
+MAX_PAGE_SIZE = 200
+
+def _authenticate():
+    """(token payload, None) for a farmer, or (None, error response)"""
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return None, (jsonify({'error': 'Valid authorization token required'}), 401)
+    payload = auth_utils.verify_token(auth_header.split(' ')[1])
+    if not payload:
+        return None, (jsonify({'error': 'Valid authorization token required'}), 401)
+    # Balances and ledgers are keyed by farmer id; other accounts have none
+    if payload.get('user_type') != 'farmer':
+        return None, (jsonify({'error': 'Farmer access required'}), 403)
+    return payload, None
+
+@payment_bp.route('', methods=['POST'])
+@idempotent('payments')
+def create_payment():
+    """Report a tax payment by the authenticated farmer; it reaches the ledger once an admin confirms it"""
+    try:
+        payload, error = _authenticate()
+        if error:
+            return error
+
+        data = request.get_json() or {}
+
+        # Validate required fields
+        for field in ('tax_year', 'amount'):
+            if data.get(field) in (None, ''):
+                return jsonify({'error': f'{field} is required'}), 400
+
+        try:
+            submission = payment_model.submit_payment(
+                payload['user_id'], int(data['tax_year']), data['amount'],
+                method=data.get('method'), reference=data.get('reference')
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify({
+            'message': 'Payment submitted for confirmation',
+            'payment': present(submission)
+        }), 201
+
+    except Exception as e:
+        logger.exception("Create payment error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@payment_bp.route('', methods=['GET'])
+def get_payments():
+    """Ledger history (assessments and payments) of the authenticated farmer, newest first"""
+    try:
+        payload, error = _authenticate()
+        if error:
+            return error
+
+        try:
+            tax_year = request.args.get('tax_year', type=int)
+            limit = min(max(int(request.args.get('limit', 50)), 1), MAX_PAGE_SIZE)
+        except ValueError:
+            return jsonify({'error': 'tax_year and limit must be numbers'}), 400
+
+        entries = payment_model.get_history(payload['user_id'], tax_year, limit, request.args.get('before'))
+
+        return jsonify({
+            'payments': [present(entry) for entry in entries],
+            'count': len(entries),
+            # Pass as ?before= to get the next (older) page
+            'next_before': str(entries[-1]['_id']) if len(entries) == limit else None
+        }), 200
+
+    except Exception as e:
+        logger.exception("Get payments error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@payment_bp.route('/submissions', methods=['GET'])
+def get_submissions():
+    """Payments the authenticated farmer reported, with their status (pending, confirmed or rejected)"""
+    try:
+        payload, error = _authenticate()
+        if error:
+            return error
+
+        try:
+            limit = min(max(int(request.args.get('limit', 50)), 1), MAX_PAGE_SIZE)
+        except ValueError:
+            return jsonify({'error': 'limit must be a number'}), 400
+
+        submissions = payment_model.get_submissions(payload['user_id'], request.args.get('status'), limit,
+                                                    request.args.get('before'))
+        return jsonify({
+            'payments': [present(submission) for submission in submissions],
+            'count': len(submissions),
+            'next_before': str(submissions[-1]['_id']) if len(submissions) == limit else None
+        }), 200
+
+    except Exception as e:
+        logger.exception("Get payment submissions error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@payment_bp.route('/balance', methods=['GET'])
+def get_balance():
+    """Outstanding balance of the authenticated farmer for one tax year, or for every year"""
+    try:
+        payload, error = _authenticate()
+        if error:
+            return error
+
+        tax_year = request.args.get('tax_year', type=int)
+        if tax_year is not None:
+            balance = payment_model.get_balance(payload['user_id'], tax_year)
+            if balance is None:
+                return jsonify({'error': 'Internal server error'}), 500
+            return jsonify({'balance': present(balance)}), 200
+
+        balances = payment_model.get_balances(payload['user_id'])
+        return jsonify({
+            'balances': [present(balance) for balance in balances],
+            'total_outstanding': to_rupees(sum(balance['balance_paise'] for balance in balances))
+        }), 200
+
+    except Exception as e:
+        logger.exception("Get balance error")
+        return jsonify({'error': 'Internal server error'}), 500
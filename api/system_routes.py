@@ -0,0 +1,99 @@
+from flask import Blueprint, jsonify
+from utils.services import service_proxy
+from utils.compression import precompressed
+
+system_bp = Blueprint('system', __name__)
+
+# Resolved per request from the app's services (see app.create_app)
+db = service_proxy('db')
+auth_utils = service_proxy('auth_utils')
+
+@system_bp.route('/api/health', methods=['GET'])
+def health_check():
+    """Health check endpoint"""
+    try:
+        connected = bool(db.client)
+    except Exception:
+        connected = False
+    return jsonify({
+        'status': 'healthy',
+        'message': 'TaxerPay Backend is running',
+        'database': 'connected' if connected else 'disconnected'
+    }), 200
+
+@system_bp.route('/.well-known/jwks.json', methods=['GET'])
+def jwks():
+    """Public token signing keys, so other nodes can verify tokens without a shared secret"""
+    keys = auth_utils.keyset.jwks() if auth_utils.asymmetric else {'keys': []}
+    response = jsonify(keys)
+    response.headers['Cache-Control'] = 'public, max-age=300'
+    return response, 200
+
+@system_bp.route('/api', methods=['GET'])
+@precompressed
+def api_info():
+    """API information endpoint"""
+    return jsonify({
+        'name': 'TaxerPay API',
+        'version': '1.0.0',
+        'description': 'Farmer Land Tax Management System',
+        'endpoints': {
+            'farmer_auth': {
+                'register': 'POST /api/farmer/register',
+                'login': 'POST /api/farmer/login',
+                'profile': 'GET /api/farmer/profile',
+                'update_profile': 'PUT /api/farmer/profile'
+            },
+            'admin_auth': {
+                'register': 'POST /api/admin/register',
+                'login': 'POST /api/admin/login',
+                'profile': 'GET /api/admin/profile',
+                'update_profile': 'PUT /api/admin/profile',
+                'get_all_farmers': 'GET /api/admin/farmers',
+                'search_farmers': 'GET /api/admin/farmers/search?q=',
+                'import_farmers': 'POST /api/admin/farmers/import',
+                'create_assessment': 'POST /api/admin/farmers/<id>/assessments',
+                'get_farmer_balance': 'GET /api/admin/farmers/<id>/balance',
+                'create_job': 'POST /api/admin/jobs',
+                'list_jobs': 'GET /api/admin/jobs',
+                'get_job': 'GET /api/admin/jobs/<id>',
+                'cancel_job': 'POST /api/admin/jobs/<id>/cancel',
+                'download_job_file': 'GET /api/admin/jobs/<id>/download'
+            },
+            'general_auth': {
+                'register': 'POST /api/auth/register',
+                'login': 'POST /api/auth/login',
+                'profile': 'GET /api/auth/profile',
+                'update_profile': 'PUT /api/auth/profile'
+            },
+            'tax': {
+                'create_record': 'POST /api/tax/records',
+                'get_records': 'GET /api/tax/records',
+                'get_record': 'GET /api/tax/records/<id>',
+                'update_record': 'PUT /api/tax/records/<id>',
+                'delete_record': 'DELETE /api/tax/records/<id>',
+                'calculate_tax': 'POST /api/tax/calculate'
+            },
+            'payments': {
+                'create_payment': 'POST /api/payments',
+                'get_payments': 'GET /api/payments',
+                'get_balance': 'GET /api/payments/balance'
+            },
+            'documents': {
+                'get_receipt': 'GET /api/documents/receipts/<record_id>?format=pdf|html',
+                'get_statement': 'GET /api/documents/statements/<tax_year>?format=pdf|html'
+            }
+        }
+    }), 200
+
+@system_bp.route('/', methods=['GET'])
+@precompressed
+def root():
+    """Root endpoint - redirect to API info"""
+    return jsonify({
+        'message': 'TaxerPay Backend is running!',
+        'status': 'healthy',
+        'api_docs': '/api',
+        'health_check': '/api/health',
+        'frontend': 'Start the frontend with: cd ../frontend && npm start'
+    }), 200
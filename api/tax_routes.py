@@ -1,11 +1,21 @@
-from flask import Blueprint, request, jsonify
-from models.tax_record import tax_record_model
-from utils.auth import auth_utils
-import json
+import logging
+from flask import Blueprint, request, jsonify, make_response
+from utils.services import service_proxy
+from utils.tax import calculate_tax_amount
+from utils.conditional import document_etag, is_not_modified, set_validators
+from utils.route_helpers import TAX_RECORD_REQUIRED_FIELDS, TAX_RECORD_PROTECTED_FIELDS, missing_field, without_fields
+from utils.idempotency import idempotent
+
+logger = logging.getLogger(__name__)
+
+# Resolved per request from the app's services (see app.create_app)
+tax_record_model = service_proxy('tax_record_model')
+auth_utils = service_proxy('auth_utils')
 
 tax_bp = Blueprint('tax', __name__)
 
 @tax_bp.route('/records', methods=['POST'])
+@idempotent('tax_records')
 def create_tax_record():
     """Create a new tax record"""
     try:
@@ -23,10 +33,9 @@ def create_tax_record():
         data = request.get_json()
         
         # Validate required fields
-        required_fields = ['tax_year', 'income', 'tax_type']
-        for field in required_fields:
-            if not data.get(field):
-                return jsonify({'error': f'{field} is required'}), 400
+        field = missing_field(data, TAX_RECORD_REQUIRED_FIELDS)
+        if field:
+            return jsonify({'error': f'{field} is required'}), 400
         
         # Add user_id to the tax record
         data['user_id'] = payload['user_id']
@@ -40,7 +49,7 @@ def create_tax_record():
         }), 201
         
     except Exception as e:
-        print(f"Create tax record error: {e}")
+        logger.exception("Create tax record error")
         return jsonify({'error': 'Internal server error'}), 500
 
 @tax_bp.route('/records', methods=['GET'])
@@ -58,16 +67,27 @@ def get_tax_records():
         if not payload:
             return jsonify({'error': 'Invalid or expired token'}), 401
         
+        # A count/max(updated_at) aggregate is enough to tell a polling client nothing changed
+        if request.if_none_match:
+            version = tax_record_model.get_records_version(payload['user_id'])
+            if version:
+                etag = document_etag(payload['user_id'], version['count'], version['updated_at'])
+                if is_not_modified(request, etag):
+                    return set_validators(make_response('', 304), etag)
+        
         # Get tax records for the user
         records = tax_record_model.get_tax_records_by_user(payload['user_id'])
         
-        return jsonify({
+        response = jsonify({
             'records': records,
             'count': len(records)
-        }), 200
+        })
+        # No Last-Modified: deleting a record changes the list without moving its newest timestamp
+        updated_at = max((record['updated_at'] for record in records if record.get('updated_at')), default=None)
+        return set_validators(response, document_etag(payload['user_id'], len(records), updated_at)), 200
         
     except Exception as e:
-        print(f"Get tax records error: {e}")
+        logger.exception("Get tax records error")
         return jsonify({'error': 'Internal server error'}), 500
 
 @tax_bp.route('/records/<record_id>', methods=['GET'])
@@ -98,7 +118,7 @@ def get_tax_record(record_id):
         return jsonify({'record': record}), 200
         
     except Exception as e:
-        print(f"Get tax record error: {e}")
+        logger.exception("Get tax record error")
         return jsonify({'error': 'Internal server error'}), 500
 
 @tax_bp.route('/records/<record_id>', methods=['PUT'])
@@ -127,9 +147,7 @@ def update_tax_record(record_id):
         data = request.get_json()
         
         # Remove fields that shouldn't be updated
-        data.pop('user_id', None)
-        data.pop('_id', None)
-        data.pop('created_at', None)
+        data = without_fields(data, TAX_RECORD_PROTECTED_FIELDS)
         
         # Update tax record
         success = tax_record_model.update_tax_record(record_id, data)
@@ -144,7 +162,7 @@ def update_tax_record(record_id):
             return jsonify({'error': 'Failed to update tax record'}), 500
         
     except Exception as e:
-        print(f"Update tax record error: {e}")
+        logger.exception("Update tax record error")
         return jsonify({'error': 'Internal server error'}), 500
 
 @tax_bp.route('/records/<record_id>', methods=['DELETE'])
@@ -179,7 +197,7 @@ def delete_tax_record(record_id):
             return jsonify({'error': 'Failed to delete tax record'}), 500
         
     except Exception as e:
-        print(f"Delete tax record error: {e}")
+        logger.exception("Delete tax record error")
         return jsonify({'error': 'Internal server error'}), 500
 
 @tax_bp.route('/calculate', methods=['POST'])
@@ -206,34 +224,8 @@ def calculate_tax():
         income = float(data['income'])
         tax_type = data.get('tax_type', 'federal')
         
-        # Simple tax calculation (this is a basic example)
-        # In a real application, you would implement proper tax brackets and calculations
-        if tax_type == 'federal':
-            if income <= 10275:
-                tax = income * 0.10
-            elif income <= 41775:
-                tax = 1027.50 + (income - 10275) * 0.12
-            elif income <= 89075:
-                tax = 4807.50 + (income - 41775) * 0.22
-            elif income <= 170050:
-                tax = 15213.50 + (income - 89075) * 0.24
-            elif income <= 215950:
-                tax = 34647.50 + (income - 170050) * 0.32
-            elif income <= 539900:
-                tax = 49335.50 + (income - 215950) * 0.35
-            else:
-                tax = 162718 + (income - 539900) * 0.37
-        else:
-            # Default to 5% for other tax types
-            tax = income * 0.05
-        
-        return jsonify({
-            'income': income,
-            'tax_type': tax_type,
-            'calculated_tax': round(tax, 2),
-            'effective_rate': round((tax / income) * 100, 2) if income > 0 else 0
-        }), 200
+        return jsonify(calculate_tax_amount(income, tax_type)), 200
         
     except Exception as e:
-        print(f"Calculate tax error: {e}")
+        logger.exception("Calculate tax error")
         return jsonify({'error': 'Internal server error'}), 500 
\ No newline at end of file
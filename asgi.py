@@ -0,0 +1,75 @@
+"""
+ASGI entry point serving the async farmer and tax endpoints
+A single process multiplexes thousands of in-flight MongoDB requests on one event loop.
+Usage: uvicorn asgi:app --host 0.0.0.0 --port 8000 --workers 2
+"""
+
+import os
+from quart import Quart, jsonify
+from dotenv import load_dotenv
+from api.async_farmer_routes import async_farmer_bp
+from api.async_tax_routes import async_tax_bp
+from config.async_database import async_db
+from config.database import db
+from config.settings import load_config
+from utils.rate_limit import create_login_limiter
+from utils.idempotency import AsyncIdempotencyStore
+from utils.log import init_async_request_logging
+from utils.passwords import init_password_hashing
+from utils.metrics import init_async_metrics
+
+# Load environment variables
+load_dotenv()
+
+# Initialize Quart app (Flask-compatible API on asyncio)
+app = Quart(__name__)
+config = load_config()
+app.config.from_mapping(config)
+app.config['SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'default-secret-key')
+
+# Structured JSON logs through a background queue, with request ids (as in the WSGI app)
+init_async_request_logging(app)
+
+# bcrypt cost for new hashes and rehash-on-login (BCRYPT_ROUNDS, or 'auto' to fit BCRYPT_TARGET_MS)
+init_password_hashing(app)
+
+# Request and MongoDB metrics, and GET /metrics
+init_async_metrics(app, async_db)
+
+# Same LOGIN_* throttling as the WSGI app; with LOGIN_RATE_LIMIT_BACKEND=mongo both share the buckets
+app.extensions['login_limiter'] = create_login_limiter(config, db)
+
+# Idempotency-Key claims live in the same collection as the WSGI app's, so a retry may land on either server
+app.extensions['idempotency'] = AsyncIdempotencyStore(async_db, ttl=config['IDEMPOTENCY_TTL'],
+                                                      lock_timeout=config['IDEMPOTENCY_LOCK_TIMEOUT'])
+
+# Register blueprints under the same prefixes as the threaded server
+app.register_blueprint(async_farmer_bp, url_prefix='/api/farmer')
+app.register_blueprint(async_tax_bp, url_prefix='/api/tax')
+
+@app.after_request
+async def add_cors_headers(response):
+    """Enable CORS for all routes"""
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
+    return response
+
+@app.after_serving
+async def close_database():
+    """Close the Motor client on shutdown"""
+    async_db.close()
+
+@app.route('/api/health', methods=['GET'])
+async def health_check():
+    """Health check endpoint"""
+    try:
+        await async_db.ping()
+        database = 'connected'
+    except Exception:
+        database = 'disconnected'
+    return jsonify({
+        'status': 'healthy',
+        'message': 'TaxerPay Backend (async) is running',
+        'database': database
+    }), 200
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark for concurrent tax record reads
+Compares the threaded path (pymongo + thread pool, as used by the Flask server)
+with the async path (Motor on one event loop, as used by asgi.py).
+"""
+
+import os
+import sys
+import math
+import time
+import json
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the backend root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0
+    index = math.ceil(pct / 100 * len(sorted_values)) - 1
+    return sorted_values[min(max(index, 0), len(sorted_values) - 1)]
+
+def summarize(name, latencies, elapsed, concurrency):
+    """Build a result row from per-request latencies"""
+    latencies.sort()
+    return {
+        'path': name,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else 0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2)
+    }
+
+def run_threaded(user_id, total, concurrency):
+    """Issue reads from a thread pool sized like the WSGI server's threads"""
+    from models.tax_record import tax_record_model
+
+    def one_request():
+        start = time.perf_counter()
+        tax_record_model.get_tax_records_by_user(user_id)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(lambda _: one_request(), range(total)))
+    return summarize('threaded', latencies, time.perf_counter() - start, concurrency)
+
+async def run_async(user_id, total, concurrency):
+    """Issue reads as coroutines on a single event loop"""
+    from models.async_tax_record import async_tax_record_model
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_request():
+        async with semaphore:
+            start = time.perf_counter()
+            await async_tax_record_model.get_tax_records_by_user(user_id)
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one_request() for _ in range(total)))
+    return summarize('async', list(latencies), time.perf_counter() - start, concurrency)
+
+def main():
+    """Run both paths against the configured database"""
+    parser = argparse.ArgumentParser(description='Benchmark threaded vs async MongoDB request paths')
+    parser.add_argument('--user-id', required=True, help='user_id whose tax records are read')
+    parser.add_argument('--requests', type=int, default=2000, help='Total reads per path')
+    parser.add_argument('--threads', type=int, default=16, help='Thread pool size for the threaded path')
+    parser.add_argument('--concurrency', type=int, default=1000, help='In-flight reads for the async path')
+    parser.add_argument('--json', dest='json_output', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    print("⏱️  Benchmarking concurrent tax record reads...")
+    print("=" * 50)
+
+    results = [
+        run_threaded(args.user_id, args.requests, args.threads),
+        asyncio.run(run_async(args.user_id, args.requests, args.concurrency))
+    ]
+
+    for result in results:
+        print(f"  {result['path']:>8} (x{result['concurrency']}): {result['throughput_rps']} req/s, "
+              f"p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, p99 {result['p99_ms']} ms")
+
+    if args.json_output:
+        with open(args.json_output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.json_output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the admin farmer listing
+Compares the regular list(find()) + jsonify path in Farmer.get_all_farmers
+against the streamed, batch-by-batch path in Farmer.iter_farmer_batches.
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+import tracemalloc
+
+# Add the backend root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from models.farmer import farmer_model
+
+def run_dict_path(app):
+    """Current path: decode every document into a dict, fix it up, then jsonify the list"""
+    farmers = farmer_model.get_all_farmers()
+    with app.app_context():
+        body = app.json.dumps({'success': True, 'farmers': farmers, 'count': len(farmers)})
+    return len(body)
+
+def run_stream_path(app):
+    """Streamed path (stream=1): batches of documents, each serialized on its own"""
+    from api.admin_auth_routes import _stream_farmers_json
+    size = 0
+    with app.app_context():
+        for chunk in _stream_farmers_json(farmer_model.iter_farmer_batches()):
+            size += len(chunk)
+    return size
+
+def measure(name, func, app, rounds):
+    """Time a listing path and record its peak Python allocation"""
+    timings = []
+    peak = 0
+    size = 0
+    for _ in range(rounds):
+        tracemalloc.start()
+        start = time.perf_counter()
+        size = func(app)
+        timings.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'path': name,
+        'rounds': rounds,
+        'best_ms': round(timings[0] * 1000, 2),
+        'median_ms': round(timings[len(timings) // 2] * 1000, 2),
+        'peak_alloc_kb': round(peak / 1024, 1),
+        'body_bytes': size
+    }
+
+def main():
+    """Run both listing paths against the configured database"""
+    parser = argparse.ArgumentParser(description='Benchmark farmer listing serialization paths')
+    parser.add_argument('--rounds', type=int, default=5, help='Number of timed rounds per path')
+    parser.add_argument('--json', dest='json_output', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+
+    print("⏱️  Benchmarking farmer listing...")
+    print("=" * 50)
+
+    results = [
+        measure('dict', run_dict_path, app, args.rounds),
+        measure('stream', run_stream_path, app, args.rounds)
+    ]
+
+    for result in results:
+        print(f"  {result['path']:>8}: best {result['best_ms']} ms, median {result['median_ms']} ms, "
+              f"peak {result['peak_alloc_kb']} KiB, {result['body_bytes']} bytes")
+
+    if results[1]['median_ms']:
+        print(f"\n🎯 Speedup (median): {results[0]['median_ms'] / results[1]['median_ms']:.2f}x")
+
+    if args.json_output:
+        with open(args.json_output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.json_output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Load test for the TaxerPay API
+Drives concurrent virtual users through the test_backend.py scenarios
+(register, login, profile, tax calculation, tax record create/list) on one
+asyncio event loop, ramps them up gradually and reports throughput and
+p50/p95/p99 latency per endpoint to a JSON file that can be diffed between releases.
+
+All virtual users share one client IP, so run it against a server whose login
+throttling allows that, e.g. LOGIN_IP_BURST=100000 LOGIN_IP_PER_MINUTE=100000
+(or LOGIN_RATE_LIMIT=false). Throttled logins (429) are retried after their
+Retry-After and reported per endpoint as `throttled`.
+"""
+
+import os
+import sys
+import math
+import time
+import json
+import uuid
+import random
+import asyncio
+import argparse
+import platform
+from datetime import datetime, timezone
+
+# Add the backend root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from test_backend import BASE_URL, USER_DATA, TAX_CALCULATION_DATA, TAX_RECORD_DATA
+
+# Steps a virtual user repeats after registering, with their relative weights
+SCENARIO = {
+    'profile': 3,
+    'tax_calculate': 4,
+    'tax_records_list': 3,
+    'tax_records_create': 1,
+    'login': 1
+}
+
+# Times a virtual user waits out a 429 on login before giving up
+MAX_LOGIN_RETRIES = 3
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0
+    index = math.ceil(pct / 100 * len(sorted_values)) - 1
+    return sorted_values[min(max(index, 0), len(sorted_values) - 1)]
+
+class LoadStats:
+    """Latencies and status codes collected per endpoint"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.statuses = {}
+        self.errors = {}
+        self.throttled = {}
+
+    def record(self, endpoint, latency, status):
+        self.latencies.setdefault(endpoint, []).append(latency)
+        codes = self.statuses.setdefault(endpoint, {})
+        codes[str(status)] = codes.get(str(status), 0) + 1
+        if status == 429:
+            # The server shedding load as configured, not a failure of the endpoint
+            self.throttled[endpoint] = self.throttled.get(endpoint, 0) + 1
+        elif not isinstance(status, int) or status >= 400:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def summary(self, elapsed):
+        """Per-endpoint request counts, throughput and latency percentiles"""
+        endpoints = {}
+        for endpoint, latencies in sorted(self.latencies.items()):
+            latencies.sort()
+            endpoints[endpoint] = {
+                'requests': len(latencies),
+                'errors': self.errors.get(endpoint, 0),
+                'throttled': self.throttled.get(endpoint, 0),
+                'statuses': self.statuses[endpoint],
+                'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else 0,
+                'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2),
+                'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+                'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+                'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+                'max_ms': round(latencies[-1] * 1000, 2)
+            }
+        return endpoints
+
+class VirtualUser:
+    """One simulated client with its own account, token and keep-alive connection"""
+
+    def __init__(self, number, session, api_base, run_id, stats, think_time=0.0, seed=None):
+        self.number = number
+        self.session = session
+        self.api_base = api_base
+        self.stats = stats
+        self.think_time = think_time
+        self.random = random.Random(None if seed is None else seed + number)
+        self.token = None
+        self.stop_at = None
+        self.account = dict(USER_DATA, email=f'loadtest-{run_id}-{number}@example.com')
+
+    async def request(self, endpoint, method, path, payload=None):
+        """Send one request, record its latency under `endpoint` and return (status, body, headers)"""
+        headers = {'Authorization': f'Bearer {self.token}'} if self.token else {}
+        start = time.perf_counter()
+        try:
+            async with self.session.request(method, f'{self.api_base}{path}', json=payload, headers=headers) as response:
+                body = await response.read()
+                status = response.status
+        except Exception as e:
+            self.stats.record(endpoint, time.perf_counter() - start, type(e).__name__)
+            return None, None, {}
+        self.stats.record(endpoint, time.perf_counter() - start, status)
+        return status, body, response.headers
+
+    async def register(self):
+        """Create this user's account (or log in if it already exists)"""
+        status, body, _ = await self.request('register', 'POST', '/auth/register', self.account)
+        if status == 409:
+            return await self.login()
+        if status == 201:
+            self.token = json.loads(body).get('token')
+        return self.token is not None
+
+    async def login(self):
+        """Log in again; a 429 is waited out (Retry-After) and the current token is kept meanwhile"""
+        loop = asyncio.get_running_loop()
+        for _ in range(MAX_LOGIN_RETRIES + 1):
+            status, body, headers = await self.request('login', 'POST', '/auth/login', {
+                'email': self.account['email'],
+                'password': self.account['password']
+            })
+            if status == 200:
+                self.token = json.loads(body).get('token')
+                return self.token is not None
+            if status != 429:
+                break
+            try:
+                wait = float(headers.get('Retry-After', 1))
+            except ValueError:
+                wait = 1.0
+            if self.stop_at is not None and loop.time() + wait >= self.stop_at:
+                break
+            await asyncio.sleep(wait)
+        # Still throttled or failed: carry on with the previous token, if any
+        return self.token is not None
+
+    async def step(self, name):
+        if name == 'profile':
+            await self.request(name, 'GET', '/auth/profile')
+        elif name == 'tax_calculate':
+            await self.request(name, 'POST', '/tax/calculate', TAX_CALCULATION_DATA)
+        elif name == 'tax_records_list':
+            await self.request(name, 'GET', '/tax/records')
+        elif name == 'tax_records_create':
+            await self.request(name, 'POST', '/tax/records', TAX_RECORD_DATA)
+        elif name == 'login':
+            await self.login()
+
+    async def run(self, start_at, stop_at):
+        """Wait for this user's ramp-up slot, register, then repeat weighted steps until stop_at"""
+        loop = asyncio.get_running_loop()
+        self.stop_at = stop_at
+        await asyncio.sleep(max(start_at - loop.time(), 0))
+        if not await self.register():
+            return
+
+        steps = list(SCENARIO)
+        weights = list(SCENARIO.values())
+        while loop.time() < stop_at:
+            await self.step(self.random.choices(steps, weights)[0])
+            if not self.token:
+                break
+            if self.think_time:
+                await asyncio.sleep(self.random.uniform(0, 2 * self.think_time))
+
+async def run_load_test(api_base, users, duration, ramp_up, think_time=0.0, seed=None):
+    """Run `users` virtual users for `duration` seconds, starting them evenly over `ramp_up` seconds"""
+    import aiohttp
+
+    stats = LoadStats()
+    run_id = uuid.uuid4().hex[:8]
+    connector = aiohttp.TCPConnector(limit=users)
+    timeout = aiohttp.ClientTimeout(total=30)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    stop_at = started + ramp_up + duration
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        virtual_users = [
+            VirtualUser(n, session, api_base, run_id, stats, think_time, seed)
+            for n in range(users)
+        ]
+        await asyncio.gather(*(
+            vu.run(started + ramp_up * n / users, stop_at)
+            for n, vu in enumerate(virtual_users)
+        ))
+    return stats, loop.time() - started
+
+def build_report(args, stats, elapsed):
+    endpoints = stats.summary(elapsed)
+    total_requests = sum(row['requests'] for row in endpoints.values())
+    return {
+        'meta': {
+            'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'base_url': args.base_url,
+            'users': args.users,
+            'duration_s': args.duration,
+            'ramp_up_s': args.ramp_up,
+            'think_time_s': args.think_time,
+            'python': platform.python_version(),
+            'host': platform.node()
+        },
+        'totals': {
+            'requests': total_requests,
+            'errors': sum(row['errors'] for row in endpoints.values()),
+            'throttled': sum(row['throttled'] for row in endpoints.values()),
+            'elapsed_s': round(elapsed, 2),
+            'throughput_rps': round(total_requests / elapsed, 2) if elapsed else 0
+        },
+        'endpoints': endpoints
+    }
+
+def compare_reports(baseline, current, threshold):
+    """Print per-endpoint changes against a baseline report; return endpoints whose p95 regressed"""
+    regressions = []
+    print(f"\n📊 Compared with baseline from {baseline['meta'].get('started_at')}:")
+    for endpoint, row in current['endpoints'].items():
+        old = baseline['endpoints'].get(endpoint)
+        if not old:
+            print(f"  {endpoint:>20}: new endpoint")
+            continue
+        changes = []
+        for key in ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms'):
+            delta = (row[key] - old[key]) / old[key] * 100 if old[key] else 0
+            changes.append(f"{key} {old[key]} → {row[key]} ({delta:+.1f}%)")
+        print(f"  {endpoint:>20}: " + ', '.join(changes))
+        if old['p95_ms'] and (row['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100 > threshold:
+            regressions.append(endpoint)
+    return regressions
+
+def main():
+    """Run the load test and write the JSON report"""
+    parser = argparse.ArgumentParser(description='Load test the TaxerPay API with concurrent virtual users')
+    parser.add_argument('--base-url', default=os.getenv('LOAD_TEST_URL', BASE_URL), help='Server to test')
+    parser.add_argument('--users', type=int, default=50, help='Number of concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds of full load after ramp-up')
+    parser.add_argument('--ramp-up', type=float, default=10, help='Seconds over which users are started')
+    parser.add_argument('--think-time', type=float, default=0.0, help='Mean pause between steps per user')
+    parser.add_argument('--seed', type=int, help='Seed for reproducible step sequences')
+    parser.add_argument('--json', dest='json_output', default='load_test_report.json', help='Report file')
+    parser.add_argument('--compare', help='Baseline report to compare against')
+    parser.add_argument('--fail-threshold', type=float, default=10.0,
+                        help='With --compare, exit 1 if any endpoint p95 grows by more than this percent')
+    args = parser.parse_args()
+
+    try:
+        import aiohttp  # noqa: F401
+    except ImportError:
+        print("❌ aiohttp is required for load testing: pip install aiohttp")
+        sys.exit(1)
+
+    print("🚀 TaxerPay load test")
+    print("=" * 50)
+    print(f"  {args.users} users against {args.base_url}, "
+          f"{args.ramp_up:g}s ramp-up + {args.duration:g}s steady load")
+
+    stats, elapsed = asyncio.run(run_load_test(
+        args.base_url.rstrip('/') + '/api', args.users, args.duration, args.ramp_up, args.think_time, args.seed
+    ))
+    report = build_report(args, stats, elapsed)
+
+    if not report['endpoints']:
+        print("❌ No requests completed. Make sure the backend is running.")
+        sys.exit(1)
+
+    for endpoint, row in report['endpoints'].items():
+        print(f"  {endpoint:>20}: {row['requests']} req ({row['errors']} errors, {row['throttled']} throttled), "
+              f"{row['throughput_rps']} req/s, p50 {row['p50_ms']} ms, p95 {row['p95_ms']} ms, p99 {row['p99_ms']} ms")
+    totals = report['totals']
+    if totals['throttled']:
+        print(f"\n⚠️  {totals['throttled']} requests were throttled (429): the server's login limits are counting "
+              "every virtual user as one client. Raise LOGIN_IP_BURST / LOGIN_IP_PER_MINUTE on the test server.")
+    print(f"\n🎯 {totals['requests']} requests, {totals['errors']} errors, {totals['throughput_rps']} req/s overall")
+
+    with open(args.json_output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"📝 Report written to {args.json_output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(baseline, report, args.fail_threshold)
+        if regressions:
+            print(f"⚠️  p95 regressed by more than {args.fail_threshold:g}% on: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for request hot paths
+Times token generation/verification, the tax bracket computation, bcrypt at the
+configured cost, farmer document conversion and JSON serialization of large
+farmer lists. Runs offline (no MongoDB, no server) and can store a baseline and
+fail when a benchmark gets slower than it by more than a threshold.
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+import platform
+import statistics
+from datetime import datetime
+
+# Add the backend root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bson
+from bson import ObjectId
+from flask import Flask
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'micro_baselines.json')
+
+# Incomes hitting every federal bracket plus the flat-rate path
+TAX_CASES = [(5000, 'federal'), (30000, 'federal'), (60000, 'federal'), (120000, 'federal'),
+             (200000, 'federal'), (400000, 'federal'), (900000, 'federal'), (50000, 'state')]
+
+def make_farmer(i):
+    """A farmer document shaped like the ones populate_test_data.py stores"""
+    return {
+        '_id': ObjectId(),
+        'pan_card': f'ABCDE{i % 10000:04d}F',
+        'password': b'$2b$12$' + b'x' * 53,
+        'first_name': 'Rajesh',
+        'last_name': f'Patel {i}',
+        'phone': '+91-9876543210',
+        'email': f'farmer{i}@email.com',
+        'user_type': 'farmer',
+        'address': {'street': 'Farm House No. 45', 'village': 'Patel Nagar', 'district': 'Ahmedabad',
+                    'state': 'Gujarat', 'pincode': '380001'},
+        'land_details': {'total_acres': 25.5, 'irrigated_acres': 20.0, 'crop_type': 'Wheat, Cotton'},
+        'bank_details': {'account_number': '1234567890', 'bank_name': 'State Bank of India',
+                         'ifsc_code': 'SBIN0001234'},
+        'created_at': datetime(2024, 1, 1),
+        'updated_at': datetime(2024, 6, 1)
+    }
+
+def build_benchmarks(list_size):
+    """Return {name: zero-argument callable} for every hot path"""
+    from utils.auth import AuthUtils
+    from utils.tax import calculate_tax_amount
+    from utils.passwords import hash_password, check_password, set_rounds, resolve_rounds
+    from utils.compression import DYNAMIC_LEVELS, available_encodings, compress
+    from config.settings import load_config
+
+    # bcrypt at the cost the app would use with the current environment
+    config = load_config()
+    set_rounds(resolve_rounds(config['BCRYPT_ROUNDS'], config['BCRYPT_TARGET_MS'], config['BCRYPT_MIN_ROUNDS']))
+
+    auth = AuthUtils(secret_key='benchmark-secret', algorithm='HS256')
+    user = {'_id': str(ObjectId()), 'email': 'bench@example.com'}
+    token = auth.generate_token(user)
+
+    stored_hash = hash_password('benchmark-password')
+
+    farmers = [make_farmer(i) for i in range(list_size)]
+    encoded = b''.join(bson.encode(farmer) for farmer in farmers)
+
+    def convert_documents():
+        # Same per-document fix-ups as Farmer.get_all_farmers after the driver decodes a batch
+        documents = bson.decode_all(encoded)
+        for farmer in documents:
+            farmer['_id'] = str(farmer['_id'])
+            farmer.pop('password', None)
+        return documents
+
+    converted = convert_documents()
+    app = Flask(__name__)
+
+    def jsonify_list():
+        with app.app_context():
+            return app.json.dumps({'success': True, 'farmers': converted, 'count': len(converted)})
+
+    def dump_batches():
+        # The stream=1 listing: one dumps per batch of 1000, joined into the same envelope
+        with app.app_context():
+            return ','.join(app.json.dumps(converted[start:start + 1000])[1:-1]
+                            for start in range(0, len(converted), 1000))
+
+    # Per-request compression of the serialized list, for each installed coding
+    body = jsonify_list().encode('utf-8')
+    compressions = {
+        f'compress_{encoding}_farmers_{list_size}': (lambda encoding=encoding: compress(body, encoding, DYNAMIC_LEVELS[encoding]))
+        for encoding in available_encodings()
+    }
+
+    return {
+        'token_generate': lambda: auth.generate_token(user),
+        'token_verify': lambda: auth.verify_token(token),
+        'tax_calculate': lambda: [calculate_tax_amount(income, tax_type) for income, tax_type in TAX_CASES],
+        'bcrypt_hash': lambda: hash_password('benchmark-password'),
+        'bcrypt_check': lambda: check_password('benchmark-password', stored_hash),
+        f'convert_farmers_{list_size}': convert_documents,
+        f'jsonify_farmers_{list_size}': jsonify_list,
+        f'stream_json_farmers_{list_size}': dump_batches,
+        **compressions
+    }
+
+def time_benchmark(func, rounds, min_round_time):
+    """Per-call timings (seconds) over `rounds` rounds, each long enough to be measurable"""
+    # Calibrate the number of calls per round
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_round_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_round_time / elapsed) + 1))
+
+    timings = [elapsed / number]
+    for _ in range(rounds - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return timings, number
+
+def format_time(seconds):
+    if seconds >= 1e-3:
+        return f'{seconds * 1e3:.2f} ms'
+    return f'{seconds * 1e6:.2f} µs'
+
+def check_regressions(results, baseline, threshold):
+    """Benchmarks whose best round is more than `threshold` percent slower than the baseline"""
+    regressions = []
+    for name, row in results.items():
+        old = baseline.get('benchmarks', {}).get(name)
+        if not old:
+            print(f"  {name:>24}: no baseline")
+            continue
+        # Compare best rounds: the minimum is far less sensitive to scheduler noise than the median
+        change = (row['min_s'] - old['min_s']) / old['min_s'] * 100
+        marker = '❌' if change > threshold else '✅'
+        print(f"  {marker} {name:>22}: {format_time(old['min_s'])} → {format_time(row['min_s'])} ({change:+.1f}%)")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+def main():
+    """Run the micro-benchmarks and optionally save or check a baseline"""
+    parser = argparse.ArgumentParser(description='Micro-benchmarks for TaxerPay hot paths')
+    parser.add_argument('--rounds', type=int, default=7, help='Timed rounds per benchmark')
+    parser.add_argument('--min-round-time', type=float, default=0.1, help='Minimum seconds per round')
+    parser.add_argument('--list-size', type=int, default=5000, help='Farmers in the conversion/serialization lists')
+    parser.add_argument('--only', help='Comma-separated benchmark names (prefix match)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the baseline')
+    parser.add_argument('--check', action='store_true', help='Fail if a benchmark regressed against the baseline')
+    parser.add_argument('--threshold', type=float, default=25.0, help='Allowed slowdown in percent for --check')
+    parser.add_argument('--json', dest='json_output', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    print("⏱️  TaxerPay micro-benchmarks")
+    print("=" * 50)
+
+    benchmarks = build_benchmarks(args.list_size)
+    if args.only:
+        prefixes = tuple(args.only.split(','))
+        benchmarks = {name: func for name, func in benchmarks.items() if name.startswith(prefixes)}
+
+    results = {}
+    for name, func in benchmarks.items():
+        timings, number = time_benchmark(func, args.rounds, args.min_round_time)
+        results[name] = {
+            'calls_per_round': number,
+            'rounds': args.rounds,
+            'min_s': min(timings),
+            'median_s': statistics.median(timings),
+            'stdev_s': statistics.stdev(timings) if len(timings) > 1 else 0.0
+        }
+        print(f"  {name:>24}: median {format_time(results[name]['median_s'])}, "
+              f"min {format_time(results[name]['min_s'])} ({number} calls x {args.rounds})")
+
+    report = {
+        'meta': {
+            'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'host': platform.node()
+        },
+        'benchmarks': results
+    }
+
+    if args.json_output:
+        with open(args.json_output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Results written to {args.json_output}")
+
+    if args.save_baseline:
+        # Merge so a partial run (--only) does not drop other baselines
+        baseline = {'benchmarks': {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline['meta'] = report['meta']
+        baseline['benchmarks'].update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"💾 Baseline saved to {args.baseline}")
+
+    if args.check and not os.path.exists(args.baseline):
+        # Baselines are machine-specific and not committed, so a fresh checkout has none
+        print(f"\n⏭️  Regression check skipped: no baseline at {args.baseline}. "
+              f"Run with --save-baseline on this machine first.")
+    elif args.check:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\n📊 Against baseline from {baseline.get('meta', {}).get('created_at')} "
+              f"(threshold {args.threshold:g}%):")
+        regressions = check_regressions(results, baseline, args.threshold)
+        if regressions:
+            print(f"⚠️  Slower than baseline: {', '.join(regressions)}")
+            sys.exit(1)
+        print("🎉 No regressions")
+
+if __name__ == '__main__':
+    main()
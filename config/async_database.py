@@ -0,0 +1,64 @@
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+class AsyncDatabase:
+    """asyncio counterpart of config.database.Database backed by Motor"""
+
+    def __init__(self):
+        self.client = None
+        self.db = None
+        # pymongo command listeners (metrics), read when the client is created
+        self.event_listeners = []
+
+    def connect(self):
+        """Create the Motor client (no I/O happens until the first command)"""
+        if self.client:
+            return
+        try:
+            from motor.motor_asyncio import AsyncIOMotorClient
+
+            from config.database import resolve_mongodb_uri
+
+            # Get backend, MongoDB URI and database name from environment variables
+            backend = os.getenv('DB_BACKEND', 'atlas').lower()
+            database_name = os.getenv('DATABASE_NAME', 'taxerpay')
+
+            if backend == 'memory':
+                raise ValueError("The async server needs a real MongoDB; DB_BACKEND=memory is only supported by the WSGI app")
+            mongodb_uri = resolve_mongodb_uri(backend)
+
+            # A single process can keep many more requests in flight than the
+            # threaded server, so allow a larger pool by default
+            max_pool_size = int(os.getenv('ASYNC_MONGO_MAX_POOL_SIZE', 500))
+            self.client = AsyncIOMotorClient(mongodb_uri, maxPoolSize=max_pool_size,
+                                             event_listeners=list(self.event_listeners))
+            self.db = self.client[database_name]
+
+        except Exception as e:
+            print(f"❌ Error creating async MongoDB client: {e}")
+            raise
+
+    async def ping(self):
+        """Test the connection"""
+        self.connect()
+        await self.client.admin.command('ping')
+        return True
+
+    def get_collection(self, collection_name):
+        """Get a specific collection from the database"""
+        self.connect()
+        return self.db[collection_name]
+
+    def close(self):
+        """Close the database connection"""
+        if self.client:
+            self.client.close()
+            self.client = None
+            self.db = None
+            print("Async database connection closed")
+
+# Create a global async database instance (Motor binds to the running event loop lazily)
+async_db = AsyncDatabase()
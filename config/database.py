@@ -1,33 +1,108 @@
 import os
+import threading
 from pymongo import MongoClient
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Storage backends: hosted cluster, a local mongod, or an in-process mongomock stand-in
+BACKENDS = ('atlas', 'local', 'memory')
+# Default for DB_BACKEND=local; override with the LOCAL_MONGODB_URI environment variable
+LOCAL_MONGODB_URI = 'mongodb://localhost:27017'
+
+def resolve_mongodb_uri(backend, mongodb_uri=None, local_mongodb_uri=None):
+    """Connection string for a server backend
+
+    local never falls back to MONGODB_URI, which usually holds the Atlas cluster
+    from .env, so switching to DB_BACKEND=local cannot write to production.
+    """
+    if backend == 'local':
+        return local_mongodb_uri or os.getenv('LOCAL_MONGODB_URI') or LOCAL_MONGODB_URI
+    mongodb_uri = mongodb_uri or os.getenv('MONGODB_URI')
+    if not mongodb_uri:
+        raise ValueError("MONGODB_URI not found in environment variables")
+    return mongodb_uri
+
+# In-memory store shared by every Database in the process, like a single server
+_memory_client = None
+_memory_lock = threading.Lock()
+
+def _get_memory_client():
+    """Process-wide mongomock client (mongomock is an optional dependency)"""
+    global _memory_client
+    with _memory_lock:
+        if _memory_client is None:
+            try:
+                import mongomock
+            except ImportError:
+                raise ValueError("DB_BACKEND=memory requires mongomock: pip install mongomock")
+            _memory_client = mongomock.MongoClient()
+        return _memory_client
+
 class Database:
-    def __init__(self):
-        self.client = None
-        self.db = None
-        self.connect()
+    def __init__(self, mongodb_uri=None, database_name=None, backend=None, local_mongodb_uri=None):
+        # Defaults come from the environment; the app factory passes its own config
+        self.mongodb_uri = mongodb_uri
+        self.local_mongodb_uri = local_mongodb_uri
+        self.database_name = database_name
+        self.backend = backend
+        
+        # pymongo command listeners (metrics, query monitoring); read when the client is created
+        self.event_listeners = []
+        
+        # Connection is opened on first use so importing models never touches the network
+        self._client = None
+        self._db = None
+        self._lock = threading.Lock()
+    
+    @property
+    def client(self):
+        """MongoClient, connected on first access"""
+        if self._client is None:
+            self.connect()
+        return self._client
+    
+    @property
+    def db(self):
+        """Database handle, connected on first access"""
+        if self._db is None:
+            self.connect()
+        return self._db
     
     def connect(self):
-        """Connect to MongoDB Atlas"""
+        """Connect to the configured backend"""
+        with self._lock:
+            if self._client is None:
+                self._connect()
+    
+    def _connect(self):
         try:
-            # Get MongoDB URI from environment variables
-            mongodb_uri = os.getenv('MONGODB_URI')
-            database_name = os.getenv('DATABASE_NAME', 'taxerpay')
+            # Get backend, MongoDB URI and database name from environment variables
+            backend = (self.backend or os.getenv('DB_BACKEND', 'atlas')).lower()
+            database_name = self.database_name or os.getenv('DATABASE_NAME', 'taxerpay')
+            
+            if backend not in BACKENDS:
+                raise ValueError(f"Unknown DB_BACKEND '{backend}' (expected one of {', '.join(BACKENDS)})")
+            
+            if backend == 'memory':
+                # No network and no command monitoring; data lives until the process exits
+                self._client = _get_memory_client()
+                self._db = self._client[database_name]
+                print(f"✅ Using in-memory MongoDB stand-in (database '{database_name}')")
+                return
             
-            if not mongodb_uri:
-                raise ValueError("MONGODB_URI not found in environment variables")
+            mongodb_uri = resolve_mongodb_uri(backend, self.mongodb_uri, self.local_mongodb_uri)
             
-            # Connect to MongoDB Atlas
-            self.client = MongoClient(mongodb_uri)
-            self.db = self.client[database_name]
+            # Connect to MongoDB Atlas or the local server
+            client = MongoClient(mongodb_uri, event_listeners=list(self.event_listeners))
             
             # Test the connection
-            self.client.admin.command('ping')
-            print("✅ Successfully connected to MongoDB Atlas")
+            client.admin.command('ping')
+            self._client = client
+            self._db = client[database_name]
+            print("✅ Successfully connected to MongoDB Atlas" if backend == 'atlas'
+                  else f"✅ Successfully connected to local MongoDB at {mongodb_uri}")
             
         except Exception as e:
             print(f"❌ Error connecting to MongoDB: {e}")
@@ -36,11 +111,22 @@ class Database:
     def get_collection(self, collection_name):
         """Get a specific collection from the database"""
         return self.db[collection_name]
-    
+
+    def supports_transactions(self):
+        """True on replica sets and sharded clusters (Atlas), where multi-document transactions work"""
+        client = self.client
+        if client is _memory_client:
+            return False
+        return client.topology_description.topology_type_name in ('ReplicaSetWithPrimary', 'Sharded', 'LoadBalanced')
+
     def close(self):
         """Close the database connection"""
-        if self.client:
-            self.client.close()
+        if self._client:
+            # The shared in-memory client stays open so its data outlives one Database
+            if self._client is not _memory_client:
+                self._client.close()
+            self._client = None
+            self._db = None
             print("Database connection closed")
 
 # Create a global database instance
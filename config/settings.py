@@ -0,0 +1,93 @@
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+def load_config(overrides=None):
+    """Build the app configuration from environment variables, then apply overrides"""
+    config = {
+        # Storage backend: atlas (MONGODB_URI), local (LOCAL_MONGODB_URI, default localhost) or memory (mongomock)
+        'DB_BACKEND': os.getenv('DB_BACKEND', 'atlas'),
+        'MONGODB_URI': os.getenv('MONGODB_URI'),
+        # Used by DB_BACKEND=local instead of MONGODB_URI (default mongodb://localhost:27017)
+        'LOCAL_MONGODB_URI': os.getenv('LOCAL_MONGODB_URI'),
+        'DATABASE_NAME': os.getenv('DATABASE_NAME', 'taxerpay'),
+        'JWT_SECRET_KEY': os.getenv('JWT_SECRET_KEY', 'default-secret-key'),
+        'JWT_ALGORITHM': os.getenv('JWT_ALGORITHM', 'HS256'),
+        # Asymmetric signing (JWT_ALGORITHM=RS256/ES256/EdDSA): PEM keys named <kid>.pem, newest signs
+        'JWT_KEYS_DIR': os.getenv('JWT_KEYS_DIR'),
+        'JWT_ACTIVE_KID': os.getenv('JWT_ACTIVE_KID'),
+        # Verify-only nodes: public keys from the signing service's JWKS endpoint, cached per kid
+        'JWT_JWKS_URL': os.getenv('JWT_JWKS_URL'),
+        'JWKS_CACHE_TTL': float(os.getenv('JWKS_CACHE_TTL', 300)),
+        # After switching to asymmetric signing, accept HS256 tokens issued before the switch until this
+        # UTC time (ISO 8601, e.g. 2026-11-01T00:00Z); unset means never. Requires a real JWT_SECRET_KEY
+        'JWT_ACCEPT_HS256_UNTIL': os.getenv('JWT_ACCEPT_HS256_UNTIL'),
+        # Token lifetimes in seconds (access tokens carry role claims, refresh tokens renew them)
+        'ACCESS_TOKEN_TTL': int(os.getenv('ACCESS_TOKEN_TTL', 900)),
+        'REFRESH_TOKEN_TTL': int(os.getenv('REFRESH_TOKEN_TTL', 7 * 24 * 3600)),
+        # Connect to MongoDB while building the app instead of on the first request
+        'PREWARM': os.getenv('PREWARM', 'false').lower() in ('1', 'true', 'yes'),
+        # Prometheus metrics at GET /metrics (optionally protected by a bearer token)
+        'METRICS_ENABLED': os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+        'METRICS_TOKEN': os.getenv('METRICS_TOKEN'),
+        # Commands slower than this are logged with their filter shape and explain plan
+        'SLOW_QUERY_MS': float(os.getenv('SLOW_QUERY_MS', 100)),
+        'SLOW_QUERY_EXPLAIN': os.getenv('SLOW_QUERY_EXPLAIN', 'true').lower() in ('1', 'true', 'yes'),
+        'SERVER_TIMING': os.getenv('SERVER_TIMING', 'true').lower() in ('1', 'true', 'yes'),
+        # Sampling profiler: fraction of requests profiled, and secret for signed profile headers
+        'PROFILE_SAMPLE_RATE': float(os.getenv('PROFILE_SAMPLE_RATE', 0)),
+        'PROFILE_SECRET': os.getenv('PROFILE_SECRET'),
+        'PROFILE_INTERVAL_MS': float(os.getenv('PROFILE_INTERVAL_MS', 5)),
+        'PROFILE_DIR': os.getenv('PROFILE_DIR'),
+        # bcrypt cost for new hashes: a number, or 'auto' to fit BCRYPT_TARGET_MS on this machine
+        'BCRYPT_ROUNDS': os.getenv('BCRYPT_ROUNDS', '12'),
+        'BCRYPT_TARGET_MS': float(os.getenv('BCRYPT_TARGET_MS', 250)),
+        'BCRYPT_MIN_ROUNDS': int(os.getenv('BCRYPT_MIN_ROUNDS', 10)),
+        # Login throttling: token buckets per account and per client IP (burst, refill per minute)
+        'LOGIN_RATE_LIMIT': os.getenv('LOGIN_RATE_LIMIT', 'true').lower() in ('1', 'true', 'yes'),
+        'LOGIN_RATE_LIMIT_BACKEND': os.getenv('LOGIN_RATE_LIMIT_BACKEND', 'memory'),
+        'LOGIN_ACCOUNT_BURST': float(os.getenv('LOGIN_ACCOUNT_BURST', 5)),
+        'LOGIN_ACCOUNT_PER_MINUTE': float(os.getenv('LOGIN_ACCOUNT_PER_MINUTE', 1)),
+        'LOGIN_IP_BURST': float(os.getenv('LOGIN_IP_BURST', 30)),
+        'LOGIN_IP_PER_MINUTE': float(os.getenv('LOGIN_IP_PER_MINUTE', 30)),
+        # Response compression: codings in preference order (br/zstd need Brotli/zstandard) and minimum body size
+        'COMPRESSION_ENABLED': os.getenv('COMPRESSION_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+        'COMPRESSION_ENCODINGS': os.getenv('COMPRESSION_ENCODINGS', 'zstd,br,gzip'),
+        'COMPRESSION_MIN_SIZE': int(os.getenv('COMPRESSION_MIN_SIZE', 1024)),
+        # Idempotency-Key retention, and how long an unfinished request holds its key before a retry may take over
+        'IDEMPOTENCY_TTL': int(os.getenv('IDEMPOTENCY_TTL', 24 * 3600)),
+        'IDEMPOTENCY_LOCK_TIMEOUT': int(os.getenv('IDEMPOTENCY_LOCK_TIMEOUT', 30)),
+        # Bulk farmer uploads: rows per duplicate check / insert_many, rows per upload, bcrypt threads (0 = one per CPU)
+        'FARMER_IMPORT_CHUNK_SIZE': int(os.getenv('FARMER_IMPORT_CHUNK_SIZE', 500)),
+        'FARMER_IMPORT_MAX_ROWS': int(os.getenv('FARMER_IMPORT_MAX_ROWS', 5000)),
+        'FARMER_IMPORT_HASH_THREADS': int(os.getenv('FARMER_IMPORT_HASH_THREADS', 0)),
+        # Background jobs: worker threads per `python -m jobs.worker` process, or inside the web process
+        'JOB_WORKER_THREADS': int(os.getenv('JOB_WORKER_THREADS', 2)),
+        'JOB_INLINE_WORKERS': int(os.getenv('JOB_INLINE_WORKERS', 0)),
+        'JOB_LEASE_SECONDS': int(os.getenv('JOB_LEASE_SECONDS', 60)),
+        'JOB_RETRY_BASE_SECONDS': float(os.getenv('JOB_RETRY_BASE_SECONDS', 30)),
+        'JOB_RETRY_MAX_SECONDS': float(os.getenv('JOB_RETRY_MAX_SECONDS', 3600)),
+        'JOB_RETENTION_DAYS': int(os.getenv('JOB_RETENTION_DAYS', 7)),
+        'JOB_EXPORT_DIR': os.getenv('JOB_EXPORT_DIR', 'exports'),
+        'JOB_HASH_THREADS': int(os.getenv('JOB_HASH_THREADS', 0)),
+        # Fernet key encrypting jobs' secret parameters at rest; unset derives one from JWT_SECRET_KEY
+        'JOB_SECRET_KEY': os.getenv('JOB_SECRET_KEY'),
+        # Rendered receipts and statements, by content hash; shared by the web servers and the job workers
+        'DOCUMENT_CACHE_DIR': os.getenv('DOCUMENT_CACHE_DIR', 'document_cache'),
+        # Number of reverse proxies in front of the app that append to X-Forwarded-For
+        'TRUSTED_PROXIES': int(os.getenv('TRUSTED_PROXIES', 0)),
+        # Logging: json or text, per-request records, sampling of repetitive records
+        'LOG_LEVEL': os.getenv('LOG_LEVEL', 'INFO'),
+        'LOG_FORMAT': os.getenv('LOG_FORMAT', 'json'),
+        'LOG_REQUESTS': os.getenv('LOG_REQUESTS', 'true').lower() in ('1', 'true', 'yes'),
+        'LOG_SAMPLE_BURST': int(os.getenv('LOG_SAMPLE_BURST', 10)),
+        'LOG_SAMPLE_WINDOW': float(os.getenv('LOG_SAMPLE_WINDOW', 60)),
+        'LOG_SAMPLE_EVERY': int(os.getenv('LOG_SAMPLE_EVERY', 100))
+    }
+    config['SECRET_KEY'] = config['JWT_SECRET_KEY']
+
+    if overrides:
+        config.update(overrides)
+    return config
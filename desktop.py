@@ -0,0 +1,83 @@
+"""
+Eel desktop mode for TaxerPay
+Kept out of app.py so the API server path never imports eel (gevent, bottle).
+"""
+
+import os
+import eel
+from app import start_flask_only
+
+# Eel functions for frontend communication
+@eel.expose
+def python_function():
+    """Example Python function exposed to JavaScript"""
+    return "Hello from Python!"
+
+@eel.expose
+def get_user_data(user_id):
+    """Get user data from Python"""
+    from models.user import user_model
+    return user_model.get_user_by_id(user_id)
+
+@eel.expose
+def create_tax_record_python(tax_data):
+    """Create tax record from Python"""
+    from models.tax_record import tax_record_model
+    try:
+        result = tax_record_model.create_tax_record(tax_data)
+        return {'success': True, 'data': result}
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+@eel.expose
+def calculate_tax_python(income, tax_type='federal'):
+    """Calculate tax from Python"""
+    try:
+        from utils.tax import calculate_tax_amount
+        result = calculate_tax_amount(float(income), tax_type)
+        return {'success': True, **result}
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+def start_eel_app():
+    """Start the Eel application"""
+    try:
+        # Set the web files directory
+        web_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'frontend', 'build')
+        
+        # Check if build directory exists, otherwise use src
+        if not os.path.exists(web_dir):
+            web_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'frontend', 'src')
+        
+        # Check if index.html exists in the web directory
+        index_path = os.path.join(web_dir, 'index.html')
+        if not os.path.exists(index_path):
+            print(f"⚠️  index.html not found in {web_dir}")
+            print("🔄 Falling back to Flask-only mode...")
+            start_flask_only()
+            return
+        
+        # Initialize Eel
+        eel.init(web_dir)
+        
+        # Start the application
+        host = os.getenv('HOST', 'localhost')
+        port = int(os.getenv('PORT', 8000))
+        
+        print(f"🚀 Starting TaxerPay Backend with Eel...")
+        print(f"📁 Web directory: {web_dir}")
+        print(f"🌐 Server: http://{host}:{port}")
+        print(f"🔗 API: http://{host}:{port}/api")
+        
+        # Start Eel with Flask
+        eel.start('index.html', 
+                  host=host, 
+                  port=port, 
+                  mode='chrome',
+                  size=(1200, 800),
+                  position=(100, 100))
+        
+    except Exception as e:
+        print(f"❌ Error starting Eel app: {e}")
+        # Fallback to Flask only
+        start_flask_only()
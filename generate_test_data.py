@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Synthetic data generator for performance testing
+Produces production-scale farmers (valid PAN format, Gujarat districts,
+realistic land holdings), admins and multi-year tax records, and writes them
+with parallel insert_many batches. Passwords are hashed once per template,
+not once per row.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from bson import ObjectId
+from dotenv import load_dotenv
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import db
+from utils.passwords import hash_password
+from utils.search import search_fields
+from utils.tax import calculate_tax_amount
+
+# Load environment variables
+load_dotenv()
+
+LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# Gujarat districts with their head post office pincode
+GUJARAT_DISTRICTS = [
+    ('Ahmedabad', 380001), ('Amreli', 365601), ('Anand', 388001), ('Banaskantha', 385001),
+    ('Bharuch', 392001), ('Bhavnagar', 364001), ('Dahod', 389151), ('Gandhinagar', 382010),
+    ('Jamnagar', 361001), ('Junagadh', 362001), ('Kutch', 370001), ('Kheda', 387001),
+    ('Mehsana', 384001), ('Narmada', 393145), ('Navsari', 396445), ('Panchmahal', 389001),
+    ('Patan', 384265), ('Porbandar', 360575), ('Rajkot', 360001), ('Sabarkantha', 383001),
+    ('Surat', 395001), ('Surendranagar', 363001), ('Vadodara', 390001), ('Valsad', 396001)
+]
+
+CROPS = ['Cotton', 'Groundnut', 'Wheat', 'Bajra', 'Castor', 'Cumin', 'Rice', 'Maize',
+         'Sugarcane', 'Tobacco', 'Sesame', 'Pulses', 'Vegetables', 'Mango', 'Banana']
+
+FIRST_NAMES = ['Rajesh', 'Lakshmi', 'Suresh', 'Meera', 'Amit', 'Bhavesh', 'Kiran', 'Hetal', 'Jignesh',
+               'Nirmala', 'Dinesh', 'Geeta', 'Mahesh', 'Pooja', 'Ramesh', 'Sonal', 'Vijay', 'Kajal']
+LAST_NAMES = ['Patel', 'Shah', 'Desai', 'Chaudhary', 'Parmar', 'Solanki', 'Rathod', 'Makwana',
+              'Thakor', 'Joshi', 'Vaghela', 'Chauhan', 'Bhatt', 'Prajapati', 'Rabari', 'Ahir']
+
+BANKS = [('State Bank of India', 'SBIN'), ('Bank of Baroda', 'BARB'), ('Punjab National Bank', 'PUNB'),
+         ('HDFC Bank', 'HDFC'), ('ICICI Bank', 'ICIC'), ('Dena Gujarat Gramin Bank', 'DGGB')]
+
+DEPARTMENTS = [
+    ('Tax Collection', 'Tax Officer', ['view_farmers', 'view_taxes', 'collect_taxes']),
+    ('Farmer Relations', 'Farmer Support Officer', ['view_farmers', 'edit_farmers', 'support_farmers']),
+    ('Finance', 'Finance Officer', ['view_farmers', 'view_taxes', 'financial_reports']),
+    ('Field Operations', 'Field Officer', ['view_farmers', 'edit_farmers', 'field_operations'])
+]
+
+TAX_STATUSES = ['paid', 'paid', 'paid', 'filed', 'pending']
+
+def make_pan(index, last_name, rng):
+    """Unique, well-formed PAN for an index: AAAPL1234X (4th char P = individual, 5th = surname initial)"""
+    serial, digits = divmod(index, 10000)
+    prefix = ''
+    for _ in range(3):
+        serial, letter = divmod(serial, 26)
+        prefix = LETTERS[letter] + prefix
+    return f'{prefix}P{last_name[0]}{digits:04d}{rng.choice(LETTERS)}'
+
+def land_details(rng):
+    """Land holding skewed towards smallholders, with a long tail of large farms"""
+    total_acres = round(min(max(rng.lognormvariate(1.4, 0.8), 0.5), 250.0), 1)
+    irrigated_acres = round(total_acres * rng.betavariate(2, 2), 1)
+    return {
+        'total_acres': total_acres,
+        'irrigated_acres': irrigated_acres,
+        'crop_type': ', '.join(rng.sample(CROPS, rng.randint(1, 3)))
+    }
+
+def make_farmer(index, password_hashes, rng, now):
+    first_name = rng.choice(FIRST_NAMES)
+    last_name = rng.choice(LAST_NAMES)
+    district, pincode = rng.choice(GUJARAT_DISTRICTS)
+    bank_name, ifsc_prefix = rng.choice(BANKS)
+    phone = f'+91-{rng.randint(6000000000, 9999999999)}'
+    return {
+        '_id': ObjectId(),
+        'pan_card': make_pan(index, last_name, rng),
+        'password': password_hashes[index % len(password_hashes)],
+        'first_name': first_name,
+        'last_name': last_name,
+        'phone': phone,
+        'email': f'{first_name.lower()}.{last_name.lower()}{index}@example.com',
+        'address': {
+            'street': f'Farm House No. {rng.randint(1, 500)}',
+            'village': f'{last_name} Nagar',
+            'district': district,
+            'state': 'Gujarat',
+            'pincode': str(pincode + rng.randint(0, 20))
+        },
+        'land_details': land_details(rng),
+        'bank_details': {
+            'account_number': str(rng.randint(10 ** 9, 10 ** 11)),
+            'bank_name': bank_name,
+            'ifsc_code': f'{ifsc_prefix}0{rng.randint(0, 999999):06d}'
+        },
+        'user_type': 'farmer',
+        'search': search_fields(first_name, last_name, phone),
+        'created_at': now,
+        'updated_at': now
+    }
+
+def make_tax_records(farmer, years, rng, now):
+    """One record per year, with income driven by the farm's size and irrigation"""
+    land = farmer['land_details']
+    base_income = land['total_acres'] * rng.uniform(15000, 40000) + land['irrigated_acres'] * rng.uniform(5000, 20000)
+    records = []
+    for year in years:
+        income = round(base_income * rng.uniform(0.7, 1.3), 2)
+        deductions = round(income * rng.uniform(0, 0.15), 2)
+        records.append({
+            'user_id': str(farmer['_id']),
+            'tax_year': year,
+            'income': income,
+            'tax_type': 'federal',
+            'deductions': deductions,
+            'credits': round(rng.uniform(0, 2000), 2),
+            'calculated_tax': calculate_tax_amount(max(income - deductions, 0))['calculated_tax'],
+            'status': TAX_STATUSES[rng.randrange(len(TAX_STATUSES))] if year < now.year else 'pending',
+            'created_at': datetime(year + 1, rng.randint(1, 12), rng.randint(1, 28)),
+            'updated_at': now
+        })
+    return records
+
+def make_admin(index, password_hashes, rng, now):
+    department, designation, permissions = rng.choice(DEPARTMENTS)
+    first_name = rng.choice(FIRST_NAMES)
+    last_name = rng.choice(LAST_NAMES)
+    district, pincode = rng.choice(GUJARAT_DISTRICTS)
+    return {
+        'employee_id': f'GEN{index:06d}',
+        'password': password_hashes[index % len(password_hashes)],
+        'first_name': first_name,
+        'last_name': last_name,
+        'phone': f'+91-{rng.randint(6000000000, 9999999999)}',
+        'email': f'{first_name.lower()}.{last_name.lower()}{index}@taxerpay.gov.in',
+        'department': department,
+        'designation': designation,
+        'address': {'street': f'Government Quarters No. {rng.randint(1, 200)}', 'city': district,
+                    'state': 'Gujarat', 'pincode': str(pincode)},
+        'permissions': permissions,
+        'user_type': 'admin',
+        'created_at': now,
+        'updated_at': now
+    }
+
+class BatchWriter:
+    """insert_many batches on a thread pool, with a bounded number of batches in flight"""
+
+    def __init__(self, workers):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='generate-insert')
+        self.max_pending = workers * 2
+        self.pending = set()
+        self.inserted = {}
+
+    def _insert(self, collection_name, documents):
+        result = db.get_collection(collection_name).insert_many(documents, ordered=False)
+        return collection_name, len(result.inserted_ids)
+
+    def submit(self, collection_name, documents):
+        # Back-pressure: never hold more than a few batches in memory
+        while len(self.pending) >= self.max_pending:
+            done, self.pending = wait(self.pending, return_when=FIRST_COMPLETED)
+            self._collect(done)
+        self.pending.add(self.pool.submit(self._insert, collection_name, documents))
+
+    def _collect(self, futures):
+        for future in futures:
+            collection_name, count = future.result()
+            self.inserted[collection_name] = self.inserted.get(collection_name, 0) + count
+
+    def finish(self):
+        self._collect(wait(self.pending).done)
+        self.pending = set()
+        self.pool.shutdown()
+        return self.inserted
+
+def hash_templates(prefix, count):
+    """Hash each template password once; generated accounts reuse these hashes"""
+    passwords = [f'{prefix}{n:03d}' for n in range(count)]
+    return passwords, [hash_password(password) for password in passwords]
+
+def main():
+    """Generate and insert the requested volume of test data"""
+    parser = argparse.ArgumentParser(description='Generate large volumes of realistic TaxerPay test data')
+    parser.add_argument('--farmers', type=int, default=100000, help='Number of farmers')
+    parser.add_argument('--admins', type=int, default=100, help='Number of admins')
+    parser.add_argument('--years', default='2020-2024', help='Tax years per farmer, e.g. 2020-2024')
+    parser.add_argument('--start-index', type=int, default=0, help='First index (append to earlier runs)')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Documents per insert_many')
+    parser.add_argument('--workers', type=int, default=4, help='Parallel insert threads')
+    parser.add_argument('--templates', type=int, default=10, help='Distinct passwords per account type')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--drop', action='store_true', help='Drop farmers, admins and tax_records first')
+    args = parser.parse_args()
+
+    first_year, _, last_year = args.years.partition('-')
+    years = list(range(int(first_year), int(last_year or first_year) + 1))
+
+    print("🚀 Generating synthetic test data...")
+    print("=" * 50)
+
+    try:
+        # Check database connection
+        if not db.client:
+            print("❌ Database connection failed!")
+            return
+
+        if args.drop:
+            for name in ('farmers', 'admins', 'tax_records'):
+                db.get_collection(name).drop()
+            print("🗑️  Dropped farmers, admins and tax_records")
+
+        print(f"🔐 Hashing {args.templates} farmer and {args.templates} admin password templates...")
+        farmer_passwords, farmer_hashes = hash_templates('farmer', args.templates)
+        admin_passwords, admin_hashes = hash_templates('admin', args.templates)
+
+        rng = random.Random(args.seed)
+        now = datetime.utcnow()
+        writer = BatchWriter(args.workers)
+        start = time.perf_counter()
+
+        farmers, tax_records = [], []
+        end_index = args.start_index + args.farmers
+        for index in range(args.start_index, end_index):
+            farmer = make_farmer(index, farmer_hashes, rng, now)
+            farmers.append(farmer)
+            tax_records.extend(make_tax_records(farmer, years, rng, now))
+
+            if len(farmers) >= args.batch_size:
+                writer.submit('farmers', farmers)
+                farmers = []
+            while len(tax_records) >= args.batch_size:
+                writer.submit('tax_records', tax_records[:args.batch_size])
+                tax_records = tax_records[args.batch_size:]
+
+            done = index - args.start_index + 1
+            if done % 100000 == 0:
+                print(f"   🌾 {done:,}/{args.farmers:,} farmers generated "
+                      f"({done / (time.perf_counter() - start):,.0f}/s)")
+
+        if farmers:
+            writer.submit('farmers', farmers)
+        if tax_records:
+            writer.submit('tax_records', tax_records)
+
+        admins = [make_admin(index, admin_hashes, rng, now)
+                  for index in range(args.start_index, args.start_index + args.admins)]
+        for offset in range(0, len(admins), args.batch_size):
+            writer.submit('admins', admins[offset:offset + args.batch_size])
+
+        inserted = writer.finish()
+        elapsed = time.perf_counter() - start
+
+        print("\n" + "=" * 50)
+        print(f"🎉 Inserted in {elapsed:.1f}s:")
+        print(f"🌾 Farmers: {inserted.get('farmers', 0):,}")
+        print(f"👨‍💼 Admins: {inserted.get('admins', 0):,}")
+        print(f"🧾 Tax records: {inserted.get('tax_records', 0):,} ({years[0]}-{years[-1]})")
+        print()
+        print("🔑 Passwords: account number N uses template N % templates")
+        print(f"   Farmers: {farmer_passwords[0]} ... {farmer_passwords[-1]}")
+        print(f"   Admins (Employee ID GEN000000...): {admin_passwords[0]} ... {admin_passwords[-1]}")
+
+    except Exception as e:
+        print(f"❌ Error during data generation: {e}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Gunicorn configuration for the TaxerPay API server
+All settings can be tuned per deployment through environment variables.
+Send SIGHUP to the master process for a graceful reload of the workers.
+"""
+
+import os
+import glob
+import multiprocessing
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Binding
+bind = os.getenv('BIND', f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', 8000)}")
+
+# Pre-fork worker model: one process per core by default, each with a thread pool
+# since most request time is spent waiting on MongoDB Atlas
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.getenv('WEB_THREADS', 4))
+worker_class = os.getenv('WEB_WORKER_CLASS', 'gthread')
+
+# Keep-alive tuning (should be longer than the load balancer idle timeout)
+keepalive = int(os.getenv('WEB_KEEPALIVE', 75))
+timeout = int(os.getenv('WEB_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', 30))
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.getenv('WEB_MAX_REQUESTS_JITTER', 500))
+
+# Import the app in each worker after fork so every process gets its own MongoClient
+preload_app = os.getenv('WEB_PRELOAD', 'false').lower() == 'true'
+
+# Logging
+accesslog = os.getenv('WEB_ACCESS_LOG', '-')
+errorlog = os.getenv('WEB_ERROR_LOG', '-')
+loglevel = os.getenv('WEB_LOG_LEVEL', 'info')
+
+# Prometheus multi-process mode: workers write metrics to PROMETHEUS_MULTIPROC_DIR
+def on_starting(server):
+    """Clear metric files left over from a previous run and fix the bcrypt cost for all workers"""
+    metrics_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if metrics_dir:
+        os.makedirs(metrics_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(metrics_dir, '*.db')):
+            os.remove(path)
+
+    # Calibrate bcrypt once in the master so every worker hashes (and rehashes) at the same cost
+    if os.getenv('BCRYPT_ROUNDS', '').strip().lower() == 'auto':
+        from utils.passwords import calibrate_rounds
+        rounds = calibrate_rounds(float(os.getenv('BCRYPT_TARGET_MS', 250)), int(os.getenv('BCRYPT_MIN_ROUNDS', 10)))
+        os.environ['BCRYPT_ROUNDS'] = str(rounds)
+        server.log.info("Calibrated bcrypt cost: %d rounds", rounds)
+
+def child_exit(server, worker):
+    """Drop live gauges of a worker that has exited"""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,202 @@
+"""Built-in background job types"""
+
+import os
+import csv
+import logging
+from datetime import datetime
+from bson import ObjectId, json_util
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from jobs.registry import job_handler
+from models.farmer import PRIVATE_FIELDS
+from utils.passwords import hash_passwords
+from utils.farmer_import import FarmerImport
+from utils import documents
+from utils.tax import calculate_tax_amount
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+# Flat columns for CSV exports (nested documents are exported as JSON strings)
+EXPORT_CSV_FIELDS = ['_id', 'pan_card', 'first_name', 'last_name', 'phone', 'email', 'address', 'land_details',
+                     'created_at', 'updated_at']
+
+def export_path(services, job_id, extension):
+    export_dir = services.config.get('JOB_EXPORT_DIR') or 'exports'
+    os.makedirs(export_dir, exist_ok=True)
+    return os.path.join(export_dir, f'farmers-{job_id}.{extension}')
+
+@job_handler('export_farmers')
+def export_farmers(ctx):
+    """Write every farmer (without password hashes) to a JSON-lines or CSV file"""
+    file_format = ctx.params.get('format', 'jsonl')
+    if file_format not in ('jsonl', 'csv'):
+        raise ValueError(f"Unsupported export format {file_format}")
+
+    collection = ctx.services.farmer_model.collection
+    total = collection.estimated_document_count()
+    path = export_path(ctx.services, ctx.job_id, file_format)
+    partial = path + '.part'
+
+    count = 0
+    with open(partial, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, EXPORT_CSV_FIELDS, extrasaction='ignore') if file_format == 'csv' else None
+        if writer:
+            writer.writeheader()
+        for farmer in collection.find({}, PRIVATE_FIELDS).batch_size(BATCH_SIZE):
+            farmer['_id'] = str(farmer['_id'])
+            if writer:
+                writer.writerow({key: json_util.dumps(value) if isinstance(value, (dict, list)) else value
+                                 for key, value in farmer.items()})
+            else:
+                f.write(json_util.dumps(farmer))
+                f.write('\n')
+            count += 1
+            ctx.progress(count, total, 'Exporting farmers')
+
+    # Only a complete export appears under the final name, so a retried attempt simply overwrites it
+    os.replace(partial, path)
+    return {'file': path, 'format': file_format, 'count': count, 'bytes': os.path.getsize(path)}
+
+def hash_resets(secret_params, config):
+    """Swap each new password of a bulk reset for its bcrypt hash before the job is stored
+
+    Hashing runs in the request on a thread pool (bcrypt releases the GIL), so
+    plaintext passwords never reach the jobs collection.
+    """
+    resets = secret_params.get('resets') or []
+    if not isinstance(resets, list) or not all(isinstance(reset, dict) for reset in resets):
+        raise ValueError("resets must be a list of {farmer_id, password} objects")
+    threads = int(config.get('JOB_HASH_THREADS') or 0) or None
+
+    # Resets without a usable password keep no hash; the job reports them as invalid
+    passwords = [reset.get('password') if isinstance(reset.get('password'), str) else None for reset in resets]
+    hashes = iter(hash_passwords((password for password in passwords if password), threads))
+    return {'resets': [{'farmer_id': reset.get('farmer_id'), 'password_hash': next(hashes) if password else None}
+                       for reset, password in zip(resets, passwords)]}
+
+@job_handler('bulk_password_reset', secret_fields=('resets',), prepare=hash_resets)
+def bulk_password_reset(ctx):
+    """Set new passwords for many farmers from the hashes hash_resets() stored with the job"""
+    resets = ctx.secret_params.get('resets') or []
+    collection = ctx.services.farmer_model.collection
+
+    updated, missing, invalid = 0, [], []
+    for start in range(0, len(resets), BATCH_SIZE):
+        batch = []
+        for reset in resets[start:start + BATCH_SIZE]:
+            farmer_id, hashed = reset.get('farmer_id'), reset.get('password_hash')
+            if not hashed or not ObjectId.is_valid(farmer_id):
+                invalid.append(farmer_id)
+            else:
+                batch.append((farmer_id, hashed))
+
+        now = datetime.utcnow()
+        requests = [UpdateOne({'_id': ObjectId(farmer_id)},
+                              {'$set': {'password': hashed, 'updated_at': now}})
+                    for farmer_id, hashed in batch]
+        if requests:
+            result = collection.bulk_write(requests, ordered=False)
+            updated += result.matched_count
+            if result.matched_count < len(requests):
+                found = {str(doc['_id']) for doc in collection.find(
+                    {'_id': {'$in': [ObjectId(farmer_id) for farmer_id, _ in batch]}}, {'_id': 1})}
+                missing.extend(farmer_id for farmer_id, _ in batch if farmer_id not in found)
+
+        ctx.progress(min(start + BATCH_SIZE, len(resets)), len(resets), 'Resetting passwords', force=True)
+
+    return {'updated': updated, 'not_found': missing, 'invalid': invalid}
+
+@job_handler('import_farmers', secret_fields=('upload',))
+def import_farmers(ctx):
+    """Register the farmers of an uploaded CSV/Excel file; the per-row report is the job result"""
+    # What FarmerImport.stage() accepted in the upload request; the farmers hold passwords, hence secret
+    config = ctx.services.config
+    importer = FarmerImport(
+        ctx.services.farmer_model,
+        chunk_size=int(config.get('FARMER_IMPORT_CHUNK_SIZE', 500)),
+        max_rows=int(config.get('FARMER_IMPORT_MAX_ROWS', 5000)),
+        hash_threads=int(config.get('FARMER_IMPORT_HASH_THREADS') or 0) or None
+    )
+    # A retried attempt reports the rows the failed one stored as duplicates
+    total = ctx.params.get('rows')
+    return importer.run(ctx.secret_params.get('upload') or {},
+                        progress=lambda done: ctx.progress(done, total, 'Importing farmers', force=True))
+
+@job_handler('year_end_assessments')
+def year_end_assessments(ctx):
+    """Post each tax record of a year to the payments ledger as an assessment (once per record)"""
+    tax_year = int(ctx.params['tax_year'])
+    records = ctx.services.tax_record_model.collection
+    payments = ctx.services.payment_model
+
+    # Tax years arrive from JSON bodies as numbers or strings
+    query = {'tax_year': {'$in': [tax_year, str(tax_year)]}}
+    total = records.count_documents(query)
+    done, assessed, skipped = 0, 0, 0
+
+    cursor = records.find(query, {'user_id': 1, 'income': 1, 'deductions': 1, 'tax_type': 1, 'calculated_tax': 1})
+    batch = []
+    for record in cursor.batch_size(BATCH_SIZE):
+        batch.append(record)
+        if len(batch) < BATCH_SIZE:
+            continue
+        assessed, skipped = _assess_batch(payments, tax_year, batch, assessed, skipped)
+        done += len(batch)
+        batch = []
+        ctx.progress(done, total, f'Assessed {assessed} records')
+    if batch:
+        assessed, skipped = _assess_batch(payments, tax_year, batch, assessed, skipped)
+
+    return {'tax_year': tax_year, 'records': total, 'assessed': assessed, 'already_assessed': skipped}
+
+def _assess_batch(payments, tax_year, batch, assessed, skipped):
+    # Records assessed by an earlier (failed or retried) attempt are skipped
+    done = payments.assessed_record_ids(str(record['_id']) for record in batch)
+    for record in batch:
+        record_id = str(record['_id'])
+        if record_id in done:
+            skipped += 1
+            continue
+        amount = record.get('calculated_tax')
+        if amount is None:
+            taxable = max(float(record.get('income') or 0) - float(record.get('deductions') or 0), 0)
+            amount = calculate_tax_amount(taxable, record.get('tax_type', 'federal'))['calculated_tax']
+        try:
+            payments.record_assessment(record['user_id'], tax_year, amount, note='Year-end assessment',
+                                       created_by='system', tax_record_id=record_id)
+        except DuplicateKeyError:
+            # Another run assessed it since the check above; the unique index kept it to one
+            skipped += 1
+            continue
+        assessed += 1
+    return assessed, skipped
+
+@job_handler('index_farmer_search')
+def index_farmer_search(ctx):
+    """Build the farmer search indexes and add search keys to farmers created before search existed"""
+    farmers = ctx.services.farmer_model
+    total = farmers.collection.count_documents({'search': {'$exists': False}})
+    updated = 0
+    for updated in farmers.backfill_search_fields(BATCH_SIZE):
+        ctx.progress(updated, total, 'Adding search keys')
+    # Indexes last, so the backfill does not pay for index maintenance on every write
+    farmers.ensure_search_indexes()
+    return {'updated': updated}
+
+@job_handler('render_document')
+def render_document(ctx):
+    """Render a receipt or annual statement into the content-addressed document cache"""
+    kind, file_format = ctx.params['kind'], ctx.params.get('format', 'pdf')
+    source = documents.load_source(ctx.services, kind, ctx.params['farmer_id'], ctx.params)
+    if source is None:
+        raise ValueError(f"Nothing to render for {kind} {ctx.params}")
+
+    # The data may have changed since the request; the document is filed under what was rendered
+    digest = documents.content_hash(kind, file_format, source)
+    cache_dir = ctx.services.config.get('DOCUMENT_CACHE_DIR') or 'document_cache'
+    path = documents.cache_path(cache_dir, digest, file_format)
+    if not os.path.exists(path):
+        path = documents.store(cache_dir, digest, file_format, documents.render(kind, file_format, source))
+    return {'file': path, 'hash': digest, 'bytes': os.path.getsize(path)}
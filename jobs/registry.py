@@ -0,0 +1,76 @@
+import time
+
+# Job type name -> JobType, filled by the @job_handler decorators in jobs.handlers
+HANDLERS = {}
+
+class JobCancelled(Exception):
+    """Raised inside a handler when an admin cancelled the job"""
+
+class JobLeaseLost(Exception):
+    """Raised inside a handler when another worker took the job over (our lease expired)"""
+
+class JobType:
+    def __init__(self, name, func, max_attempts=3, secret_fields=(), prepare=None):
+        self.name = name
+        self.func = func
+        self.max_attempts = max_attempts
+        self.secret_fields = tuple(secret_fields)
+        self.prepare = prepare
+
+def job_handler(name, max_attempts=3, secret_fields=(), prepare=None):
+    """Register a function as the handler of a job type
+
+    The handler is called with a JobContext and returns a JSON-serializable
+    result. Parameters listed in secret_fields are stored apart from the public
+    job document and deleted when the job finishes. prepare(secret_params, config),
+    if given, runs in the API before the job is stored and returns the secret
+    parameters to store instead (e.g. password hashes rather than passwords); it
+    raises ValueError for parameters it cannot accept.
+    """
+    def decorator(func):
+        HANDLERS[name] = JobType(name, func, max_attempts, secret_fields, prepare)
+        return func
+    return decorator
+
+def get_job_type(name):
+    """Registered job type, or None"""
+    # Importing the handlers module registers the built-in job types
+    import jobs.handlers  # noqa: F401
+    return HANDLERS.get(name)
+
+class JobContext:
+    """What a running handler sees: its parameters, the app services and progress reporting"""
+
+    def __init__(self, job, services, heartbeat, heartbeat_interval=10):
+        self.job = job
+        self.job_id = str(job['_id'])
+        self.params = job.get('params') or {}
+        self.services = services
+        self._secret_params = None
+        self.attempt = job.get('attempts', 1)
+        self._heartbeat = heartbeat
+        self._heartbeat_interval = heartbeat_interval
+        self._last_beat = time.monotonic()
+
+    @property
+    def secret_params(self):
+        """Secret parameters, decrypted when the handler first reads them"""
+        if self._secret_params is None:
+            self._secret_params = self.services.job_model.open_secrets(self.job)
+        return self._secret_params
+
+    def progress(self, done, total=None, message=None, force=False):
+        """Report progress; also extends the lease, throttled to one write per heartbeat interval
+
+        Raises JobCancelled if the job was cancelled and JobLeaseLost if another
+        worker now owns it, so handlers stop at their next progress report.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_beat < self._heartbeat_interval:
+            return
+        self._last_beat = now
+        job = self._heartbeat({'done': done, 'total': total, 'message': message})
+        if job is None:
+            raise JobLeaseLost(self.job_id)
+        if job.get('cancel_requested'):
+            raise JobCancelled(self.job_id)
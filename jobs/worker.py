@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Background job worker
+Leases jobs from the MongoDB `jobs` collection and runs their handlers, with
+background lease renewal, cancellation and retry with exponential backoff.
+Usage: python -m jobs.worker [--threads 4] [--types export_farmers,...]
+"""
+
+import os
+import sys
+import random
+import signal
+import socket
+import logging
+import argparse
+import threading
+import traceback
+
+# Add the backend root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jobs.registry import JobCancelled, JobContext, JobLeaseLost, get_job_type
+
+logger = logging.getLogger(__name__)
+
+def retry_delay(attempt, base=30, maximum=3600):
+    """Exponential backoff with full jitter: up to base * 2^(attempt-1) seconds, capped"""
+    return random.uniform(0, min(maximum, base * 2 ** (attempt - 1)))
+
+class LeaseKeeper:
+    """Extends a running job's lease from a background thread
+
+    Handlers also heartbeat from ctx.progress(), but one slow step (a large
+    bcrypt batch, a big query) can outlast the lease between two reports. The
+    keeper renews it regardless; losing the lease stops the keeper, and the
+    handler notices at its next progress report.
+    """
+
+    def __init__(self, renew, interval, name='job-lease'):
+        self.renew = renew
+        self.interval = interval
+        self.name = name
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if self.renew(None) is None:
+                    return
+            except Exception as e:
+                # Retried next interval; a lease outlasts three missed renewals
+                logger.warning("Could not renew job lease: %s", e)
+
+class Worker:
+    """Polls for jobs on one or more threads until stopped"""
+
+    def __init__(self, services, app=None, threads=1, job_types=None, lease_seconds=60, poll_interval=1.0,
+                 max_poll_interval=5.0, retry_base=30, retry_max=3600):
+        self.services = services
+        self.app = app
+        self.threads = threads
+        self.job_types = job_types
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """Run the polling loops on background threads"""
+        for index in range(self.threads):
+            thread = threading.Thread(target=self._loop, args=(f'{self.name}:{index}',),
+                                      name=f'job-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        """Stop leasing new jobs and wait for running ones"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _loop(self, worker_id):
+        idle = self.poll_interval
+        while not self._stop.is_set():
+            try:
+                ran = self.run_once(worker_id)
+            except Exception as e:
+                logger.error("Job worker %s could not poll: %s", worker_id, e)
+                ran = False
+            # Poll quickly while there is work, back off while the queue is empty
+            idle = self.poll_interval if ran else min(idle * 2, self.max_poll_interval)
+            if not ran:
+                self._stop.wait(idle)
+
+    def run_once(self, worker_id):
+        """Lease and run one job; returns False if none was runnable"""
+        jobs = self.services.job_model
+        job = jobs.lease(worker_id, self.job_types, self.lease_seconds)
+        if job is None:
+            return False
+
+        job_id, job_type = str(job['_id']), get_job_type(job['type'])
+        if job_type is None:
+            jobs.fail(job_id, worker_id, f"Unknown job type {job['type']}")
+            return True
+        if job['attempts'] > job['max_attempts']:
+            # A worker died mid-run on every attempt (the lease expired each time)
+            jobs.fail(job_id, worker_id, job.get('error') or 'Worker lost the job too many times')
+            return True
+
+        def heartbeat(progress):
+            return jobs.heartbeat(job_id, worker_id, self.lease_seconds, progress)
+
+        ctx = JobContext(job, self.services, heartbeat, heartbeat_interval=self.lease_seconds / 4)
+        logger.info("Running job %s (%s), attempt %d", job_id, job['type'], job['attempts'])
+        try:
+            with LeaseKeeper(heartbeat, self.lease_seconds / 4, name=f'job-lease-{job_id}'):
+                if self.app is not None:
+                    with self.app.app_context():
+                        result = job_type.func(ctx)
+                else:
+                    result = job_type.func(ctx)
+            jobs.complete(job_id, worker_id, result)
+            logger.info("Job %s (%s) succeeded", job_id, job['type'])
+        except JobCancelled:
+            jobs.cancelled(job_id, worker_id)
+            logger.info("Job %s (%s) cancelled", job_id, job['type'])
+        except JobLeaseLost:
+            logger.warning("Job %s (%s) was taken over by another worker", job_id, job['type'])
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+            if job['attempts'] < job['max_attempts']:
+                delay = retry_delay(job['attempts'], self.retry_base, self.retry_max)
+                jobs.fail(job_id, worker_id, error, retry_delay=delay)
+                logger.warning("Job %s (%s) failed, retrying in %.0fs: %s", job_id, job['type'], delay, error)
+            else:
+                jobs.fail(job_id, worker_id, error)
+                logger.error("Job %s (%s) failed for good: %s\n%s", job_id, job['type'], error,
+                             traceback.format_exc())
+        return True
+
+def create_worker(app, threads=None, job_types=None):
+    """Worker for an app's services, configured from its JOB_* settings"""
+    from utils.services import get_services
+    config = app.config
+    return Worker(
+        get_services(app), app=app,
+        threads=int(threads or config.get('JOB_WORKER_THREADS') or 1),
+        job_types=job_types,
+        lease_seconds=int(config.get('JOB_LEASE_SECONDS', 60)),
+        retry_base=float(config.get('JOB_RETRY_BASE_SECONDS', 30)),
+        retry_max=float(config.get('JOB_RETRY_MAX_SECONDS', 3600))
+    )
+
+def init_inline_worker(app):
+    """Run job workers inside the web process (JOB_INLINE_WORKERS > 0), e.g. for the memory backend"""
+    threads = int(app.config.get('JOB_INLINE_WORKERS', 0))
+    if threads <= 0:
+        return None
+    return create_worker(app, threads=threads).start()
+
+def main():
+    """Run a standalone worker process"""
+    parser = argparse.ArgumentParser(description='TaxerPay background job worker')
+    parser.add_argument('--threads', type=int, help='Concurrent jobs in this process (default JOB_WORKER_THREADS or 1)')
+    parser.add_argument('--types', help='Comma-separated job types to run (default: all)')
+    args = parser.parse_args()
+
+    from app import create_app
+    # This process is the worker; its app must not start inline workers of its own
+    app = create_app({'JOB_INLINE_WORKERS': 0})
+    job_types = [t.strip() for t in args.types.split(',')] if args.types else None
+    worker = create_worker(app, args.threads, job_types)
+
+    print(f"👷 TaxerPay job worker {worker.name} ({worker.threads} threads)")
+    print(f"📋 Job types: {', '.join(job_types) if job_types else 'all'}")
+
+    stopped = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stopped.set())
+
+    worker.start()
+    stopped.wait()
+    print("\n👋 Stopping: waiting for running jobs to finish...")
+    worker.stop()
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,19 @@
+import logging
 from datetime import datetime
 from bson import ObjectId
-import bcrypt
+from utils.passwords import hash_password, check_password, rehash_on_login
 from config.database import db
 
+logger = logging.getLogger(__name__)
+
 class Admin:
-    def __init__(self):
-        self.collection = db.get_collection('admins')
+    def __init__(self, database=None):
+        # Defaults to the global database; app instances pass their own
+        self.database = database or db
+    
+    @property
+    def collection(self):
+        return self.database.get_collection('admins')
     
     def create_admin(self, admin_data):
         """Create a new admin account"""
@@ -13,9 +21,7 @@ class Admin:
             # Hash the password
             password = admin_data.get('password')
             if password:
-                salt = bcrypt.gensalt()
-                hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
-                admin_data['password'] = hashed_password
+                admin_data['password'] = hash_password(password)
             
             # Add timestamps and user type
             admin_data['user_type'] = 'admin'
@@ -32,7 +38,7 @@ class Admin:
             return admin_data
             
         except Exception as e:
-            print(f"Error creating admin: {e}")
+            logger.error("Error creating admin: %s", e)
             raise
     
     def get_admin_by_employee_id(self, employee_id):
@@ -43,7 +49,7 @@ class Admin:
                 admin['_id'] = str(admin['_id'])
             return admin
         except Exception as e:
-            print(f"Error getting admin by employee ID: {e}")
+            logger.error("Error getting admin by employee ID: %s", e)
             return None
     
     def get_admin_by_id(self, admin_id):
@@ -54,7 +60,7 @@ class Admin:
                 admin['_id'] = str(admin['_id'])
             return admin
         except Exception as e:
-            print(f"Error getting admin by ID: {e}")
+            logger.error("Error getting admin by ID: %s", e)
             return None
     
     def update_admin(self, admin_id, update_data):
@@ -67,7 +73,7 @@ class Admin:
             )
             return result.modified_count > 0
         except Exception as e:
-            print(f"Error updating admin: {e}")
+            logger.error("Error updating admin: %s", e)
             return False
     
     def verify_password(self, employee_id, password):
@@ -75,13 +81,14 @@ class Admin:
         try:
             admin = self.get_admin_by_employee_id(employee_id)
             if admin and admin.get('password'):
-                stored_password = admin['password']
-                if isinstance(stored_password, str):
-                    stored_password = stored_password.encode('utf-8')
-                return bcrypt.checkpw(password.encode('utf-8'), stored_password)
+                if not check_password(password, admin['password']):
+                    return False
+                # Move the stored hash to the configured bcrypt cost while we have the password
+                rehash_on_login(self.collection, admin, password)
+                return True
             return False
         except Exception as e:
-            print(f"Error verifying admin password: {e}")
+            logger.error("Error verifying admin password: %s", e)
             return False
     
     def get_all_admins(self):
@@ -93,7 +100,7 @@ class Admin:
                 admin.pop('password', None)  # Remove password from response
             return admins
         except Exception as e:
-            print(f"Error getting all admins: {e}")
+            logger.error("Error getting all admins: %s", e)
             return []
 
 # Create a global admin model instance
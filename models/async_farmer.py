@@ -0,0 +1,122 @@
+import logging
+import asyncio
+from datetime import datetime
+from bson import ObjectId
+from utils.passwords import hash_password, check_password, async_rehash_on_login
+from config.async_database import async_db
+from models.farmer import PRIVATE_FIELDS
+from utils.search import search_fields
+
+logger = logging.getLogger(__name__)
+
+class AsyncFarmer:
+    """Async variant of models.farmer.Farmer for the ASGI server"""
+
+    @property
+    def collection(self):
+        return async_db.get_collection('farmers')
+
+    async def create_farmer(self, farmer_data):
+        """Create a new farmer account"""
+        try:
+            # Hash the password off the event loop (bcrypt is CPU bound)
+            password = farmer_data.get('password')
+            if password:
+                loop = asyncio.get_running_loop()
+                farmer_data['password'] = await loop.run_in_executor(None, hash_password, password)
+
+            # Add timestamps, user type and search keys
+            farmer_data['user_type'] = 'farmer'
+            farmer_data['created_at'] = datetime.utcnow()
+            farmer_data['updated_at'] = datetime.utcnow()
+            farmer_data['search'] = search_fields(farmer_data.get('first_name'), farmer_data.get('last_name'),
+                                                  farmer_data.get('phone'))
+
+            # Insert farmer into database
+            result = await self.collection.insert_one(farmer_data)
+            farmer_data['_id'] = str(result.inserted_id)
+
+            # Remove password and search keys from response
+            farmer_data.pop('password', None)
+            farmer_data.pop('search', None)
+
+            return farmer_data
+
+        except Exception as e:
+            logger.error("Error creating farmer: %s", e)
+            raise
+
+    async def get_farmer_by_pan(self, pan_card, include_password=False):
+        """Get farmer by PAN card ID"""
+        try:
+            # Leave out the password unless specifically requested
+            projection = {'search': 0} if include_password else PRIVATE_FIELDS
+            farmer = await self.collection.find_one({'pan_card': pan_card.upper()}, projection)
+            if farmer:
+                farmer['_id'] = str(farmer['_id'])
+            return farmer
+        except Exception as e:
+            logger.error("Error getting farmer by PAN: %s", e)
+            return None
+
+    async def get_farmer_by_id(self, farmer_id):
+        """Get farmer by ID"""
+        try:
+            farmer = await self.collection.find_one({'_id': ObjectId(farmer_id)}, PRIVATE_FIELDS)
+            if farmer:
+                farmer['_id'] = str(farmer['_id'])
+            return farmer
+        except Exception as e:
+            logger.error("Error getting farmer by ID: %s", e)
+            return None
+
+    async def get_farmer_version(self, farmer_id):
+        """Only _id and updated_at of a farmer, for conditional GETs"""
+        try:
+            farmer = await self.collection.find_one({'_id': ObjectId(farmer_id)}, {'updated_at': 1})
+            if farmer:
+                farmer['_id'] = str(farmer['_id'])
+            return farmer
+        except Exception as e:
+            logger.error("Error getting farmer version: %s", e)
+            return None
+
+    async def update_farmer(self, farmer_id, update_data):
+        """Update farmer information"""
+        try:
+            update_data.pop('search', None)
+            if any(field in update_data for field in ('first_name', 'last_name', 'phone')):
+                # Search keys combine fields, so fill in the ones this update leaves unchanged
+                current = await self.collection.find_one({'_id': ObjectId(farmer_id)},
+                                                         {'first_name': 1, 'last_name': 1, 'phone': 1}) or {}
+                current.update(update_data)
+                update_data['search'] = search_fields(current.get('first_name'), current.get('last_name'),
+                                                      current.get('phone'))
+            update_data['updated_at'] = datetime.utcnow()
+            result = await self.collection.update_one(
+                {'_id': ObjectId(farmer_id)},
+                {'$set': update_data}
+            )
+            return result.modified_count > 0
+        except Exception as e:
+            logger.error("Error updating farmer: %s", e)
+            return False
+
+    async def verify_password(self, pan_card, password):
+        """Verify farmer password"""
+        try:
+            farmer = await self.get_farmer_by_pan(pan_card, include_password=True)
+            if farmer and farmer.get('password'):
+                loop = asyncio.get_running_loop()
+                if not await loop.run_in_executor(None, check_password, password, farmer['password']):
+                    return False
+                # Move the stored hash to the configured bcrypt cost while we have the password
+                await async_rehash_on_login(self.collection, farmer, password)
+                return True
+            return False
+        except Exception as e:
+            logger.error("Error verifying farmer password: %s", e)
+            return False
+
+# Create a global async farmer model instance
+async_farmer_model = AsyncFarmer()
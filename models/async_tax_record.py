@@ -0,0 +1,92 @@
+import logging
+from datetime import datetime
+from bson import ObjectId
+from config.async_database import async_db
+
+logger = logging.getLogger(__name__)
+
+class AsyncTaxRecord:
+    """Async variant of models.tax_record.TaxRecord for the ASGI server"""
+
+    @property
+    def collection(self):
+        return async_db.get_collection('tax_records')
+
+    async def create_tax_record(self, tax_data):
+        """Create a new tax record"""
+        try:
+            # Add timestamps
+            tax_data['created_at'] = datetime.utcnow()
+            tax_data['updated_at'] = datetime.utcnow()
+
+            # Insert tax record into database
+            result = await self.collection.insert_one(tax_data)
+            tax_data['_id'] = str(result.inserted_id)
+
+            return tax_data
+
+        except Exception as e:
+            logger.error("Error creating tax record: %s", e)
+            raise
+
+    async def get_tax_records_by_user(self, user_id):
+        """Get all tax records for a specific user"""
+        try:
+            records = await self.collection.find({'user_id': user_id}).to_list(length=None)
+            for record in records:
+                record['_id'] = str(record['_id'])
+            return records
+        except Exception as e:
+            logger.error("Error getting tax records: %s", e)
+            return []
+
+    async def get_records_version(self, user_id):
+        """Count and newest updated_at of a user's tax records, without loading them"""
+        try:
+            pipeline = [
+                {'$match': {'user_id': user_id}},
+                {'$group': {'_id': None, 'count': {'$sum': 1}, 'updated_at': {'$max': '$updated_at'}}}
+            ]
+            summaries = await self.collection.aggregate(pipeline).to_list(length=1)
+            if not summaries:
+                return {'count': 0, 'updated_at': None}
+            return {'count': summaries[0]['count'], 'updated_at': summaries[0]['updated_at']}
+        except Exception as e:
+            logger.error("Error getting tax records version: %s", e)
+            return None
+
+    async def get_tax_record_by_id(self, record_id):
+        """Get a specific tax record by ID"""
+        try:
+            record = await self.collection.find_one({'_id': ObjectId(record_id)})
+            if record:
+                record['_id'] = str(record['_id'])
+            return record
+        except Exception as e:
+            logger.error("Error getting tax record: %s", e)
+            return None
+
+    async def update_tax_record(self, record_id, update_data):
+        """Update a tax record"""
+        try:
+            update_data['updated_at'] = datetime.utcnow()
+            result = await self.collection.update_one(
+                {'_id': ObjectId(record_id)},
+                {'$set': update_data}
+            )
+            return result.modified_count > 0
+        except Exception as e:
+            logger.error("Error updating tax record: %s", e)
+            return False
+
+    async def delete_tax_record(self, record_id):
+        """Delete a tax record"""
+        try:
+            result = await self.collection.delete_one({'_id': ObjectId(record_id)})
+            return result.deleted_count > 0
+        except Exception as e:
+            logger.error("Error deleting tax record: %s", e)
+            return False
+
+# Create a global async tax record model instance
+async_tax_record_model = AsyncTaxRecord()
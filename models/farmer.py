@@ -1,11 +1,36 @@
+import re
+import logging
 from datetime import datetime
 from bson import ObjectId
-import bcrypt
+from pymongo import ASCENDING, TEXT, UpdateOne
+from utils.passwords import hash_password, check_password, rehash_on_login
+from utils.search import SEARCH_PROJECTION, TEXT_WEIGHTS, classify, could_be_pan, rank_name_matches, search_fields
 from config.database import db
 
+logger = logging.getLogger(__name__)
+
+# Never sent to clients: the password hash and the normalized copies kept for search
+PRIVATE_FIELDS = {'password': 0, 'search': 0}
+
+def public_projection(fields=None):
+    """Projection for a client-chosen list of fields, never reaching into PRIVATE_FIELDS
+
+    No fields means every public field; 'search.names' or 'password' are dropped,
+    and a list of nothing but private fields leaves only _id.
+    """
+    if not fields:
+        return PRIVATE_FIELDS
+    projection = {field: 1 for field in fields if field.split('.', 1)[0] not in PRIVATE_FIELDS}
+    return projection or {'_id': 1}
+
 class Farmer:
-    def __init__(self):
-        self.collection = db.get_collection('farmers')
+    def __init__(self, database=None):
+        # Defaults to the global database; app instances pass their own
+        self.database = database or db
+    
+    @property
+    def collection(self):
+        return self.database.get_collection('farmers')
     
     def create_farmer(self, farmer_data):
         """Create a new farmer account"""
@@ -13,56 +38,91 @@ class Farmer:
             # Hash the password
             password = farmer_data.get('password')
             if password:
-                salt = bcrypt.gensalt()
-                hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
-                farmer_data['password'] = hashed_password
+                farmer_data['password'] = hash_password(password)
             
-            # Add timestamps and user type
+            # Add timestamps, user type and search keys
             farmer_data['user_type'] = 'farmer'
             farmer_data['created_at'] = datetime.utcnow()
             farmer_data['updated_at'] = datetime.utcnow()
+            farmer_data['search'] = self._search_fields(farmer_data)
             
             # Insert farmer into database
             result = self.collection.insert_one(farmer_data)
             farmer_data['_id'] = str(result.inserted_id)
             
-            # Remove password from response
+            # Remove password and search keys from response
             farmer_data.pop('password', None)
+            farmer_data.pop('search', None)
             
             return farmer_data
             
         except Exception as e:
-            print(f"Error creating farmer: {e}")
+            logger.error("Error creating farmer: %s", e)
             raise
     
     def get_farmer_by_pan(self, pan_card, include_password=False):
         """Get farmer by PAN card ID"""
         try:
-            farmer = self.collection.find_one({'pan_card': pan_card.upper()})
+            # Leave out the password unless specifically requested
+            projection = {'search': 0} if include_password else PRIVATE_FIELDS
+            farmer = self.collection.find_one({'pan_card': pan_card.upper()}, projection)
             if farmer:
                 farmer['_id'] = str(farmer['_id'])
-                # Remove password unless specifically requested
-                if not include_password and 'password' in farmer:
-                    del farmer['password']
             return farmer
         except Exception as e:
-            print(f"Error getting farmer by PAN: {e}")
+            logger.error("Error getting farmer by PAN: %s", e)
             return None
     
+    def existing_pans(self, pan_cards):
+        """Which of these PAN cards are already registered (one $in query)"""
+        pan_cards = [pan.upper() for pan in pan_cards]
+        if not pan_cards:
+            return set()
+        return {farmer['pan_card'] for farmer in self.collection.find(
+            {'pan_card': {'$in': pan_cards}}, {'_id': 0, 'pan_card': 1})}
+    
+    def create_farmers(self, farmers):
+        """Insert farmers whose passwords are already hashed; returns their ids in order"""
+        now = datetime.utcnow()
+        for farmer_data in farmers:
+            farmer_data['user_type'] = 'farmer'
+            farmer_data['created_at'] = now
+            farmer_data['updated_at'] = now
+            farmer_data['search'] = self._search_fields(farmer_data)
+        result = self.collection.insert_many(farmers, ordered=False)
+        return [str(farmer_id) for farmer_id in result.inserted_ids]
+    
     def get_farmer_by_id(self, farmer_id):
         """Get farmer by ID"""
         try:
-            farmer = self.collection.find_one({'_id': ObjectId(farmer_id)})
+            farmer = self.collection.find_one({'_id': ObjectId(farmer_id)}, PRIVATE_FIELDS)
             if farmer:
                 farmer['_id'] = str(farmer['_id'])
             return farmer
         except Exception as e:
-            print(f"Error getting farmer by ID: {e}")
+            logger.error("Error getting farmer by ID: %s", e)
+            return None
+    
+    def get_farmer_version(self, farmer_id):
+        """Only _id and updated_at of a farmer, for conditional GETs"""
+        try:
+            farmer = self.collection.find_one({'_id': ObjectId(farmer_id)}, {'updated_at': 1})
+            if farmer:
+                farmer['_id'] = str(farmer['_id'])
+            return farmer
+        except Exception as e:
+            logger.error("Error getting farmer version: %s", e)
             return None
     
     def update_farmer(self, farmer_id, update_data):
         """Update farmer information"""
         try:
+            update_data.pop('search', None)
+            if any(field in update_data for field in ('first_name', 'last_name', 'phone')):
+                # Search keys combine fields, so fill in the ones this update leaves unchanged
+                current = self.collection.find_one({'_id': ObjectId(farmer_id)},
+                                                   {'first_name': 1, 'last_name': 1, 'phone': 1}) or {}
+                update_data['search'] = self._search_fields({**current, **update_data})
             update_data['updated_at'] = datetime.utcnow()
             result = self.collection.update_one(
                 {'_id': ObjectId(farmer_id)},
@@ -70,7 +130,7 @@ class Farmer:
             )
             return result.modified_count > 0
         except Exception as e:
-            print(f"Error updating farmer: {e}")
+            logger.error("Error updating farmer: %s", e)
             return False
     
     def verify_password(self, pan_card, password):
@@ -78,44 +138,152 @@ class Farmer:
         try:
             farmer = self.get_farmer_by_pan(pan_card, include_password=True)
             if farmer and farmer.get('password'):
-                stored_password = farmer['password']
-                # Convert stored password to bytes if it's a string
-                if isinstance(stored_password, str):
-                    stored_password = stored_password.encode('utf-8')
-                return bcrypt.checkpw(password.encode('utf-8'), stored_password)
+                if not check_password(password, farmer['password']):
+                    return False
+                # Move the stored hash to the configured bcrypt cost while we have the password
+                rehash_on_login(self.collection, farmer, password)
+                return True
             return False
         except Exception as e:
-            print(f"Error verifying farmer password: {e}")
+            logger.error("Error verifying farmer password: %s", e)
             return False
     
     def get_all_farmers(self):
         """Get all farmers (for admin use)"""
         try:
-            farmers = list(self.collection.find({}))
+            farmers = list(self.collection.find({}, PRIVATE_FIELDS))
             for farmer in farmers:
                 farmer['_id'] = str(farmer['_id'])
-                farmer.pop('password', None)  # Remove password from response
             return farmers
         except Exception as e:
-            print(f"Error getting all farmers: {e}")
+            logger.error("Error getting all farmers: %s", e)
             return []
 
+    def iter_farmer_batches(self, fields=None, batch_size=1000):
+        """All farmers as lists of up to batch_size documents (for streamed admin listings and exports)
+
+        Only one batch is in memory at a time; documents get the same fix-ups as
+        get_all_farmers, and fields (a list of names) never includes private ones.
+        """
+        cursor = self.collection.find({}, public_projection(fields), batch_size=batch_size)
+        try:
+            batch = []
+            for farmer in cursor:
+                farmer['_id'] = str(farmer['_id'])
+                batch.append(farmer)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _search_fields(farmer):
+        return search_fields(farmer.get('first_name'), farmer.get('last_name'), farmer.get('phone'))
+    
+    def ensure_search_indexes(self):
+        """Prefix indexes on PAN card and the normalized name/phone keys, and the text index
+        
+        Built by the index_farmer_search job, not on the request path.
+        """
+        self.collection.create_index('pan_card')
+        self.collection.create_index('search.names')
+        self.collection.create_index('search.phone')
+        try:
+            # 'none': names and villages are not English words, so no stemming or stop words
+            self.collection.create_index([(field, TEXT) for field in TEXT_WEIGHTS], weights=TEXT_WEIGHTS,
+                                         default_language='none', name='farmer_text')
+        except Exception as e:
+            logger.error("Could not create the farmer text index: %s", e)
+    
+    def backfill_search_fields(self, batch_size=1000):
+        """Add search keys to farmers created before search existed; yields the running count"""
+        updated, last_id = 0, None
+        while True:
+            # Walk the _id index once instead of rescanning from the start for every batch
+            query = {'search': {'$exists': False}}
+            if last_id is not None:
+                query['_id'] = {'$gt': last_id}
+            farmers = list(self.collection.find(query, {'first_name': 1, 'last_name': 1, 'phone': 1})
+                           .sort('_id', ASCENDING).limit(batch_size))
+            if not farmers:
+                return
+            last_id = farmers[-1]['_id']
+            self.collection.bulk_write([UpdateOne({'_id': farmer['_id']}, {'$set': {'search': self._search_fields(farmer)}})
+                                        for farmer in farmers], ordered=False)
+            updated += len(farmers)
+            yield updated
+    
+    def search_farmers(self, query, limit=20):
+        """Farmers matching a PAN card prefix, phone prefix or name, best matches first
+
+        PAN cards and phone numbers use anchored prefix regexes on their indexes.
+        Names look up exact normalized names first, then prefixes in index order, and
+        are topped up with text index matches (first/last name, village, district)
+        ordered by text score.
+        """
+        kind, term = classify(query)
+        projection = {**SEARCH_PROJECTION, 'search.names': 1}
+        
+        if kind == 'pan':
+            matches = self._pan_matches(term, projection, limit)
+        elif kind == 'phone':
+            matches = [dict(farmer, match='phone') for farmer in self.collection.find(
+                {'search.phone': {'$regex': f'^{re.escape(term)}'}}, projection).sort('search.phone', ASCENDING).limit(limit)]
+        else:
+            # Exact names first, so they are never crowded out of the limit by longer names
+            exact = list(self.collection.find({'search.names': term}, projection).limit(limit))
+            prefix = list(self.collection.find(
+                {'search.names': {'$regex': f'^{re.escape(term)}'}, '_id': {'$nin': [farmer['_id'] for farmer in exact]}},
+                projection
+            ).sort('search.names', ASCENDING).limit(limit - len(exact))) if len(exact) < limit else []
+            matches = [dict(farmer, match='name') for farmer in rank_name_matches(term, exact + prefix)]
+            if len(matches) < limit:
+                matches.extend(self._text_matches(query, projection, limit, {farmer['_id'] for farmer in matches}))
+            # A few letters may also be the start of a PAN card
+            if len(matches) < limit and could_be_pan(query):
+                found = {farmer['_id'] for farmer in matches}
+                matches.extend(farmer for farmer in self._pan_matches(query.strip().upper(), projection, limit)
+                               if farmer['_id'] not in found)
+        
+        for farmer in matches[:limit]:
+            farmer['_id'] = str(farmer['_id'])
+            farmer.pop('search', None)
+        return matches[:limit]
+    
+    def _pan_matches(self, prefix, projection, limit):
+        cursor = self.collection.find({'pan_card': {'$regex': f'^{re.escape(prefix)}'}}, projection)
+        return [dict(farmer, match='pan') for farmer in cursor.sort('pan_card', ASCENDING).limit(limit)]
+    
+    def _text_matches(self, query, projection, limit, exclude):
+        try:
+            cursor = self.collection.find(
+                {'$text': {'$search': query}, '_id': {'$nin': list(exclude)}},
+                {**projection, 'score': {'$meta': 'textScore'}}
+            ).sort([('score', {'$meta': 'textScore'})]).limit(limit - len(exclude))
+            return [dict(farmer, match='text') for farmer in cursor]
+        except Exception as e:
+            # No text index yet (or a backend without text search): prefix matches only
+            logger.warning("Farmer text search unavailable: %s", e)
+            return []
+    
     def update_farmer_password(self, farmer_id, new_password):
         """Update farmer password"""
         try:
             # Hash the new password
-            salt = bcrypt.gensalt()
-            hashed_password = bcrypt.hashpw(new_password.encode('utf-8'), salt)
+            hashed_password = hash_password(new_password)
             
             # Update the farmer's password
             result = self.collection.update_one(
                 {'_id': ObjectId(farmer_id)},
-                {'$set': {'password': hashed_password.decode('utf-8'), 'updated_at': datetime.utcnow()}}
+                {'$set': {'password': hashed_password, 'updated_at': datetime.utcnow()}}
             )
             
             return result.modified_count > 0
         except Exception as e:
-            print(f"Error updating farmer password: {e}")
+            logger.error("Error updating farmer password: %s", e)
             return False
 
 # Create a global farmer model instance
@@ -0,0 +1,210 @@
+import logging
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from config.database import db
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = 'queued', 'running', 'succeeded', 'failed', 'cancelled'
+FINAL_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+# Never returned by the API: secrets a handler needs (e.g. new passwords), dropped once the job is final
+PUBLIC_PROJECTION = {'secret_params': 0}
+
+class Job:
+    """Background jobs in a MongoDB collection, leased by workers
+
+    A worker leases the oldest runnable job with one find_one_and_update and must
+    heartbeat before lease_until passes; a job whose worker died is leased again
+    once its lease expires. Failed attempts are re-queued with exponential backoff
+    until max_attempts is reached.
+    """
+
+    def __init__(self, database=None, retention_days=7, secret_box=None):
+        # Defaults to the global database; app instances pass their own
+        self.database = database or db
+        self.retention_days = retention_days
+        # Encrypts secret_params at rest (utils.secret_box.SecretBox); without one they are stored as is
+        self.secret_box = secret_box
+        self._indexed = False
+
+    @property
+    def collection(self):
+        collection = self.database.get_collection('jobs')
+        if not self._indexed:
+            collection.create_index([('status', ASCENDING), ('run_after', ASCENDING)])
+            collection.create_index([('status', ASCENDING), ('lease_until', ASCENDING)])
+            collection.create_index([('created_at', DESCENDING)])
+            try:
+                # At most one queued or running job per dedupe key; $in in a partial filter needs MongoDB 6.0
+                collection.create_index('dedupe_key', unique=True, name='one_active_job_per_dedupe_key',
+                                        partialFilterExpression={'dedupe_key': {'$exists': True},
+                                                                 'status': {'$in': [QUEUED, RUNNING]}})
+            except Exception as e:
+                logger.error("Could not create the job dedupe index: %s", e)
+            # Finished jobs are removed after the retention period
+            collection.create_index('expires_at', expireAfterSeconds=0)
+            self._indexed = True
+        return collection
+
+    def enqueue(self, job_type, params=None, secret_params=None, created_by=None, max_attempts=3, delay=0,
+                dedupe_key=None):
+        """Queue a job; returns its public document
+
+        With a dedupe_key, a queued or running job with the same key is returned
+        instead of queuing another one. The unique partial index on dedupe_key
+        decides between concurrent callers: exactly one insert wins.
+        """
+        now = datetime.utcnow()
+        job = {
+            'type': job_type,
+            'params': params or {},
+            'status': QUEUED,
+            'progress': {'done': 0, 'total': None, 'message': None},
+            'attempts': 0,
+            'max_attempts': max_attempts,
+            'run_after': now + timedelta(seconds=delay),
+            'created_by': created_by,
+            'created_at': now,
+            'updated_at': now
+        }
+        if secret_params:
+            job['secret_params'] = self.secret_box.seal(secret_params) if self.secret_box else secret_params
+        if dedupe_key:
+            job['dedupe_key'] = dedupe_key
+        try:
+            result = self.collection.insert_one(job)
+        except DuplicateKeyError:
+            if not dedupe_key:
+                raise
+            existing = self.collection.find_one({'dedupe_key': dedupe_key, 'status': {'$in': [QUEUED, RUNNING]}},
+                                                PUBLIC_PROJECTION)
+            if existing is None:
+                # The active job finished between our insert and the lookup; queue a fresh one
+                return self.enqueue(job_type, params, secret_params, created_by, max_attempts, delay, dedupe_key)
+            return existing
+        job['_id'] = result.inserted_id
+        job.pop('secret_params', None)
+        return job
+
+    def open_secrets(self, job):
+        """A leased job's secret parameters, decrypted"""
+        secret_params = job.get('secret_params')
+        if secret_params is None:
+            return {}
+        if isinstance(secret_params, dict):
+            # Queued before secret parameters were encrypted
+            return secret_params
+        return self.secret_box.open(secret_params)
+
+    def lease(self, worker_id, job_types=None, lease_seconds=60):
+        """Take the next runnable job (queued and due, or running with an expired lease), or None"""
+        now = datetime.utcnow()
+        query = {'$or': [
+            {'status': QUEUED, 'run_after': {'$lte': now}},
+            {'status': RUNNING, 'lease_until': {'$lt': now}}
+        ]}
+        if job_types:
+            query['type'] = {'$in': list(job_types)}
+        return self.collection.find_one_and_update(
+            query,
+            {
+                '$set': {'status': RUNNING, 'worker': worker_id, 'lease_until': now + timedelta(seconds=lease_seconds),
+                         'started_at': now, 'updated_at': now},
+                '$inc': {'attempts': 1}
+            },
+            sort=[('run_after', ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def heartbeat(self, job_id, worker_id, lease_seconds=60, progress=None):
+        """Extend a lease (and record progress); returns the job, or None if this worker lost it"""
+        now = datetime.utcnow()
+        update = {'lease_until': now + timedelta(seconds=lease_seconds), 'updated_at': now}
+        if progress is not None:
+            update['progress'] = progress
+        return self.collection.find_one_and_update(
+            {'_id': ObjectId(job_id), 'status': RUNNING, 'worker': worker_id},
+            {'$set': update},
+            projection={'cancel_requested': 1},
+            return_document=ReturnDocument.AFTER
+        )
+
+    def _finish(self, job_id, worker_id, status, fields):
+        now = datetime.utcnow()
+        fields.update({'status': status, 'finished_at': now, 'updated_at': now,
+                       'expires_at': now + timedelta(days=self.retention_days)})
+        result = self.collection.update_one(
+            {'_id': ObjectId(job_id), 'status': RUNNING, 'worker': worker_id},
+            {'$set': fields, '$unset': {'lease_until': '', 'secret_params': ''}}
+        )
+        return result.modified_count > 0
+
+    def complete(self, job_id, worker_id, result=None):
+        """Mark a leased job as succeeded"""
+        return self._finish(job_id, worker_id, SUCCEEDED, {'result': result})
+
+    def cancelled(self, job_id, worker_id):
+        """Mark a leased job as cancelled after its handler stopped on request"""
+        return self._finish(job_id, worker_id, CANCELLED, {})
+
+    def fail(self, job_id, worker_id, error, retry_delay=None):
+        """Record a failed attempt: re-queue after retry_delay seconds, or fail for good when None"""
+        if retry_delay is None:
+            return self._finish(job_id, worker_id, FAILED, {'error': error})
+        now = datetime.utcnow()
+        result = self.collection.update_one(
+            {'_id': ObjectId(job_id), 'status': RUNNING, 'worker': worker_id},
+            {'$set': {'status': QUEUED, 'error': error, 'run_after': now + timedelta(seconds=retry_delay),
+                      'updated_at': now},
+             '$unset': {'lease_until': '', 'worker': ''}}
+        )
+        return result.modified_count > 0
+
+    def cancel(self, job_id):
+        """Cancel a queued job now, or ask the worker running it to stop; returns the job"""
+        if not ObjectId.is_valid(job_id):
+            return None
+        now = datetime.utcnow()
+        job = self.collection.find_one_and_update(
+            {'_id': ObjectId(job_id), 'status': QUEUED},
+            {'$set': {'status': CANCELLED, 'finished_at': now, 'updated_at': now,
+                      'expires_at': now + timedelta(days=self.retention_days)},
+             '$unset': {'secret_params': ''}},
+            projection=PUBLIC_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+        if job:
+            return job
+        return self.collection.find_one_and_update(
+            {'_id': ObjectId(job_id), 'status': RUNNING},
+            {'$set': {'cancel_requested': True, 'updated_at': now}},
+            projection=PUBLIC_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        ) or self.get_job(job_id)
+
+    def get_job(self, job_id):
+        """Public document of a job, or None"""
+        try:
+            return self.collection.find_one({'_id': ObjectId(job_id)}, PUBLIC_PROJECTION)
+        except Exception as e:
+            logger.error("Error getting job: %s", e)
+            return None
+
+    def list_jobs(self, status=None, job_type=None, limit=50):
+        """Newest jobs first, optionally filtered by status and type"""
+        try:
+            query = {}
+            if status:
+                query['status'] = status
+            if job_type:
+                query['type'] = job_type
+            return list(self.collection.find(query, PUBLIC_PROJECTION).sort('created_at', DESCENDING).limit(limit))
+        except Exception as e:
+            logger.error("Error listing jobs: %s", e)
+            return []
+
+# Create a global job model instance
+job_model = Job()
@@ -0,0 +1,301 @@
+import logging
+from datetime import datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from config.database import db
+
+logger = logging.getLogger(__name__)
+
+# Ledger entry types and which running total each one moves
+ENTRY_TYPES = {'assessment': 'assessed_paise', 'payment': 'paid_paise'}
+
+def to_paise(amount):
+    """Rupee amount (number or string) as integer paise; money is never stored as a float"""
+    try:
+        value = Decimal(str(amount))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Invalid amount {amount!r}")
+    if not value.is_finite():
+        raise ValueError(f"Invalid amount {amount!r}")
+    return int((value * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+def to_rupees(paise):
+    return float(Decimal(paise) / 100)
+
+def balance_id(farmer_id, tax_year):
+    return f'{farmer_id}:{tax_year}'
+
+def empty_balance(farmer_id, tax_year):
+    """Snapshot of a farmer/year with no ledger entries yet"""
+    return {'_id': balance_id(farmer_id, tax_year), 'farmer_id': farmer_id, 'tax_year': tax_year,
+            'assessed_paise': 0, 'paid_paise': 0, 'balance_paise': 0, 'entries': 0, 'updated_at': None}
+
+def present(document):
+    """Response form of a ledger entry or balance: ids as strings, *_paise fields as rupees"""
+    result = {}
+    for key, value in document.items():
+        if key.endswith('_paise'):
+            result[key[:-len('_paise')]] = to_rupees(value)
+        elif isinstance(value, ObjectId):
+            result[key] = str(value)
+        else:
+            result[key] = value
+    return result
+
+class Payment:
+    """Append-only tax ledger (tax_ledger) with a running-balance snapshot per farmer and tax year (tax_balances)
+
+    Ledger entries are only ever inserted. Each insert also $inc's the matching
+    snapshot, so the outstanding balance is one document read instead of a sum
+    over the history. balance = assessed - paid; negative means credit.
+
+    Payments reported by farmers wait in payment_submissions as 'pending' and only
+    reach the ledger when an admin confirms them.
+    """
+
+    def __init__(self, database=None):
+        # Defaults to the global database; app instances pass their own
+        self.database = database or db
+        self._indexed = False
+
+    def _ensure_indexes(self):
+        if not self._indexed:
+            ledger = self.database.get_collection('tax_ledger')
+            ledger.create_index([('farmer_id', ASCENDING), ('tax_year', ASCENDING), ('_id', DESCENDING)])
+            ledger.create_index([('farmer_id', ASCENDING), ('_id', DESCENDING)])
+            try:
+                # One assessment per tax record, so retried or concurrent year-end runs cannot charge twice
+                ledger.create_index([('tax_record_id', ASCENDING), ('type', ASCENDING)], unique=True,
+                                    name='one_assessment_per_record',
+                                    partialFilterExpression={'tax_record_id': {'$exists': True}, 'type': 'assessment'})
+            except Exception as e:
+                logger.error("Could not create the unique assessment index (duplicate assessments?): %s", e)
+            # One ledger payment per confirmed submission, so a retried confirm cannot pay twice
+            ledger.create_index([('submission_id', ASCENDING)], unique=True, name='one_payment_per_submission',
+                                partialFilterExpression={'submission_id': {'$exists': True}})
+            submissions = self.database.get_collection('payment_submissions')
+            submissions.create_index([('farmer_id', ASCENDING), ('_id', DESCENDING)])
+            submissions.create_index([('status', ASCENDING), ('_id', ASCENDING)])
+            self.database.get_collection('tax_balances').create_index([('farmer_id', ASCENDING), ('tax_year', ASCENDING)])
+            self._indexed = True
+
+    @property
+    def ledger(self):
+        self._ensure_indexes()
+        return self.database.get_collection('tax_ledger')
+
+    @property
+    def balances(self):
+        self._ensure_indexes()
+        return self.database.get_collection('tax_balances')
+
+    @property
+    def submissions(self):
+        self._ensure_indexes()
+        return self.database.get_collection('payment_submissions')
+
+    def _move_balance(self, entry, sign=1, session=None):
+        """$inc the entry's farmer/year snapshot (sign=-1 undoes it); returns the snapshot after"""
+        amount = sign * entry['amount_paise']
+        field = ENTRY_TYPES[entry['type']]
+        delta = amount if entry['type'] == 'assessment' else -amount
+        update = {'$inc': {field: amount, 'balance_paise': delta, 'entries': sign}}
+        if sign > 0:
+            update['$set'] = {'updated_at': entry['created_at'], 'last_entry_id': entry['_id']}
+            update['$setOnInsert'] = {'farmer_id': entry['farmer_id'], 'tax_year': entry['tax_year']}
+        balance = self.balances.find_one_and_update(
+            {'_id': balance_id(entry['farmer_id'], entry['tax_year'])},
+            update,
+            upsert=sign > 0,
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+        # Totals no entry has touched yet are missing from the document
+        return {**empty_balance(entry['farmer_id'], entry['tax_year']), **(balance or {})}
+
+    def add_entry(self, farmer_id, tax_year, entry_type, amount, **details):
+        """Append a ledger entry and update the running balance; returns (entry, balance)"""
+        if entry_type not in ENTRY_TYPES:
+            raise ValueError(f"Unknown ledger entry type {entry_type}")
+        entry = {
+            '_id': ObjectId(),
+            'farmer_id': farmer_id,
+            'tax_year': int(tax_year),
+            'type': entry_type,
+            'amount_paise': to_paise(amount),
+            'created_at': datetime.utcnow(),
+            **{key: value for key, value in details.items() if value is not None}
+        }
+
+        if self.database.supports_transactions():
+            def apply(session):
+                balance = self._move_balance(entry, session=session)
+                entry['balance_after_paise'] = balance['balance_paise']
+                self.ledger.insert_one(entry, session=session)
+                return balance
+
+            with self.database.client.start_session() as session:
+                balance = session.with_transaction(apply)
+            return entry, balance
+
+        # Standalone servers have no transactions: undo the snapshot move if the append fails
+        balance = self._move_balance(entry)
+        entry['balance_after_paise'] = balance['balance_paise']
+        try:
+            self.ledger.insert_one(entry)
+        except Exception:
+            self._revert(entry)
+            raise
+        return entry, balance
+
+    def _revert(self, entry):
+        try:
+            self._move_balance(entry, sign=-1)
+        except Exception as e:
+            logger.error("Balance %s may be out of step with the ledger (run rebuild_balance): %s",
+                         balance_id(entry['farmer_id'], entry['tax_year']), e)
+
+    def record_payment(self, farmer_id, tax_year, amount, method=None, reference=None, submission_id=None):
+        """Record a payment by a farmer; returns (entry, balance)
+
+        Raises DuplicateKeyError if submission_id is already in the ledger.
+        """
+        if to_paise(amount) <= 0:
+            raise ValueError("Payment amount must be positive")
+        return self.add_entry(farmer_id, tax_year, 'payment', amount, method=method, reference=reference,
+                              submission_id=submission_id)
+
+    def submit_payment(self, farmer_id, tax_year, amount, method=None, reference=None):
+        """Payment reported by a farmer, pending until an admin confirms it; the balance does not change"""
+        if to_paise(amount) <= 0:
+            raise ValueError("Payment amount must be positive")
+        submission = {
+            '_id': ObjectId(),
+            'farmer_id': farmer_id,
+            'tax_year': int(tax_year),
+            'amount_paise': to_paise(amount),
+            'status': 'pending',
+            'created_at': datetime.utcnow(),
+            **{key: value for key, value in (('method', method), ('reference', reference)) if value is not None}
+        }
+        self.submissions.insert_one(submission)
+        return submission
+
+    def get_submissions(self, farmer_id=None, status=None, limit=50, before=None):
+        """Payment submissions, newest first (all farmers' when farmer_id is None)"""
+        try:
+            query = {}
+            if farmer_id is not None:
+                query['farmer_id'] = farmer_id
+            if status:
+                query['status'] = status
+            if before:
+                query['_id'] = {'$lt': ObjectId(before)}
+            return list(self.submissions.find(query).sort('_id', DESCENDING).limit(limit))
+        except Exception as e:
+            logger.error("Error getting payment submissions: %s", e)
+            return []
+
+    def confirm_submission(self, submission_id, confirmed_by=None):
+        """Post a pending submission to the ledger; returns (submission, balance after)
+
+        balance is None when the submission was already confirmed or rejected, and
+        submission is None when it does not exist. The submission is marked 'confirming' before the ledger write and 'confirmed'
+        after it, so a confirm that died half way can simply be repeated; the unique
+        submission_id index keeps the ledger from being paid twice.
+        """
+        submission = self.submissions.find_one_and_update(
+            {'_id': ObjectId(submission_id), 'status': {'$in': ['pending', 'confirming']}},
+            {'$set': {'status': 'confirming', 'confirmed_by': confirmed_by}},
+            return_document=ReturnDocument.AFTER
+        )
+        if submission is None:
+            return self.submissions.find_one({'_id': ObjectId(submission_id)}), None
+
+        try:
+            _, balance = self.record_payment(
+                submission['farmer_id'], submission['tax_year'], to_rupees(submission['amount_paise']),
+                method=submission.get('method'), reference=submission.get('reference'),
+                submission_id=submission['_id']
+            )
+        except DuplicateKeyError:
+            # An earlier attempt already posted it
+            balance = self.get_balance(submission['farmer_id'], submission['tax_year'])
+
+        submission = self.submissions.find_one_and_update(
+            {'_id': submission['_id']},
+            {'$set': {'status': 'confirmed', 'decided_at': datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+        return submission, balance
+
+    def reject_submission(self, submission_id, rejected_by=None, reason=None):
+        """Reject a pending submission; returns it, or None unless it was pending"""
+        return self.submissions.find_one_and_update(
+            {'_id': ObjectId(submission_id), 'status': 'pending'},
+            {'$set': {'status': 'rejected', 'rejected_by': rejected_by, 'reason': reason,
+                      'decided_at': datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    def record_assessment(self, farmer_id, tax_year, amount, note=None, created_by=None, tax_record_id=None):
+        """Record tax due (or a negative adjustment) for a farmer; returns (entry, balance)
+        
+        Raises DuplicateKeyError if tax_record_id already has an assessment.
+        """
+        return self.add_entry(farmer_id, tax_year, 'assessment', amount, note=note, created_by=created_by,
+                              tax_record_id=tax_record_id)
+
+    def assessed_record_ids(self, tax_record_ids):
+        """Which of these tax records already have an assessment in the ledger"""
+        return set(self.ledger.distinct('tax_record_id', {'tax_record_id': {'$exists': True, '$in': list(tax_record_ids)},
+                                                          'type': 'assessment'}))
+
+    def get_balance(self, farmer_id, tax_year):
+        """Running balance of one farmer and tax year (a single document read)"""
+        try:
+            balance = self.balances.find_one({'_id': balance_id(farmer_id, int(tax_year))})
+            return {**empty_balance(farmer_id, int(tax_year)), **(balance or {})}
+        except Exception as e:
+            logger.error("Error getting tax balance: %s", e)
+            return None
+
+    def get_balances(self, farmer_id):
+        """Running balances of a farmer for every tax year with ledger entries"""
+        try:
+            balances = self.balances.find({'farmer_id': farmer_id}).sort('tax_year', DESCENDING)
+            return [{**empty_balance(farmer_id, balance['tax_year']), **balance} for balance in balances]
+        except Exception as e:
+            logger.error("Error getting tax balances: %s", e)
+            return []
+
+    def get_history(self, farmer_id, tax_year=None, limit=50, before=None):
+        """Ledger entries, newest first; pass the last entry's _id as `before` for the next page"""
+        try:
+            query = {'farmer_id': farmer_id}
+            if tax_year is not None:
+                query['tax_year'] = int(tax_year)
+            if before:
+                query['_id'] = {'$lt': ObjectId(before)}
+            return list(self.ledger.find(query).sort('_id', DESCENDING).limit(limit))
+        except Exception as e:
+            logger.error("Error getting payment history: %s", e)
+            return []
+
+    def rebuild_balance(self, farmer_id, tax_year):
+        """Recompute a snapshot from the ledger (repair after a failed non-transactional write)"""
+        balance = empty_balance(farmer_id, int(tax_year))
+        for entry in self.ledger.find({'farmer_id': farmer_id, 'tax_year': int(tax_year)}).sort('_id', ASCENDING):
+            field = ENTRY_TYPES[entry['type']]
+            balance[field] += entry['amount_paise']
+            balance['entries'] += 1
+            balance['updated_at'] = entry['created_at']
+            balance['last_entry_id'] = entry['_id']
+        balance['balance_paise'] = balance['assessed_paise'] - balance['paid_paise']
+        self.balances.replace_one({'_id': balance['_id']}, balance, upsert=True)
+        return balance
+
+# Create a global payment model instance
+payment_model = Payment()
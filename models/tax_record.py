@@ -1,10 +1,18 @@
+import logging
 from datetime import datetime
 from bson import ObjectId
 from config.database import db
 
+logger = logging.getLogger(__name__)
+
 class TaxRecord:
-    def __init__(self):
-        self.collection = db.get_collection('tax_records')
+    def __init__(self, database=None):
+        # Defaults to the global database; app instances pass their own
+        self.database = database or db
+    
+    @property
+    def collection(self):
+        return self.database.get_collection('tax_records')
     
     def create_tax_record(self, tax_data):
         """Create a new tax record"""
@@ -20,7 +28,7 @@ class TaxRecord:
             return tax_data
             
         except Exception as e:
-            print(f"Error creating tax record: {e}")
+            logger.error("Error creating tax record: %s", e)
             raise
     
     def get_tax_records_by_user(self, user_id):
@@ -31,9 +39,24 @@ class TaxRecord:
                 record['_id'] = str(record['_id'])
             return records
         except Exception as e:
-            print(f"Error getting tax records: {e}")
+            logger.error("Error getting tax records: %s", e)
             return []
     
+    def get_records_version(self, user_id):
+        """Count and newest updated_at of a user's tax records, without loading them"""
+        try:
+            pipeline = [
+                {'$match': {'user_id': user_id}},
+                {'$group': {'_id': None, 'count': {'$sum': 1}, 'updated_at': {'$max': '$updated_at'}}}
+            ]
+            summary = next(self.collection.aggregate(pipeline), None)
+            if not summary:
+                return {'count': 0, 'updated_at': None}
+            return {'count': summary['count'], 'updated_at': summary['updated_at']}
+        except Exception as e:
+            logger.error("Error getting tax records version: %s", e)
+            return None
+    
     def get_tax_record_by_id(self, record_id):
         """Get a specific tax record by ID"""
         try:
@@ -42,7 +65,7 @@ class TaxRecord:
                 record['_id'] = str(record['_id'])
             return record
         except Exception as e:
-            print(f"Error getting tax record: {e}")
+            logger.error("Error getting tax record: %s", e)
             return None
     
     def update_tax_record(self, record_id, update_data):
@@ -55,7 +78,7 @@ class TaxRecord:
             )
             return result.modified_count > 0
         except Exception as e:
-            print(f"Error updating tax record: {e}")
+            logger.error("Error updating tax record: %s", e)
             return False
     
     def delete_tax_record(self, record_id):
@@ -64,7 +87,7 @@ class TaxRecord:
             result = self.collection.delete_one({'_id': ObjectId(record_id)})
             return result.deleted_count > 0
         except Exception as e:
-            print(f"Error deleting tax record: {e}")
+            logger.error("Error deleting tax record: %s", e)
             return False
 
 # Create a global tax record model instance
@@ -1,11 +1,19 @@
+import logging
 from datetime import datetime
 from bson import ObjectId
-import bcrypt
+from utils.passwords import hash_password, check_password, rehash_on_login
 from config.database import db
 
+logger = logging.getLogger(__name__)
+
 class User:
-    def __init__(self):
-        self.collection = db.get_collection('users')
+    def __init__(self, database=None):
+        # Defaults to the global database; app instances pass their own
+        self.database = database or db
+    
+    @property
+    def collection(self):
+        return self.database.get_collection('users')
     
     def create_user(self, user_data):
         """Create a new user"""
@@ -13,9 +21,7 @@ class User:
             # Hash the password
             password = user_data.get('password')
             if password:
-                salt = bcrypt.gensalt()
-                hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
-                user_data['password'] = hashed_password
+                user_data['password'] = hash_password(password)
             
             # Add timestamps
             user_data['created_at'] = datetime.utcnow()
@@ -31,7 +37,7 @@ class User:
             return user_data
             
         except Exception as e:
-            print(f"Error creating user: {e}")
+            logger.error("Error creating user: %s", e)
             raise
     
     def get_user_by_email(self, email):
@@ -42,7 +48,7 @@ class User:
                 user['_id'] = str(user['_id'])
             return user
         except Exception as e:
-            print(f"Error getting user by email: {e}")
+            logger.error("Error getting user by email: %s", e)
             return None
     
     def get_user_by_id(self, user_id):
@@ -53,7 +59,7 @@ class User:
                 user['_id'] = str(user['_id'])
             return user
         except Exception as e:
-            print(f"Error getting user by ID: {e}")
+            logger.error("Error getting user by ID: %s", e)
             return None
     
     def update_user(self, user_id, update_data):
@@ -66,7 +72,7 @@ class User:
             )
             return result.modified_count > 0
         except Exception as e:
-            print(f"Error updating user: {e}")
+            logger.error("Error updating user: %s", e)
             return False
     
     def verify_password(self, email, password):
@@ -74,13 +80,14 @@ class User:
         try:
             user = self.get_user_by_email(email)
             if user and user.get('password'):
-                stored_password = user['password']
-                if isinstance(stored_password, str):
-                    stored_password = stored_password.encode('utf-8')
-                return bcrypt.checkpw(password.encode('utf-8'), stored_password)
+                if not check_password(password, user['password']):
+                    return False
+                # Move the stored hash to the configured bcrypt cost while we have the password
+                rehash_on_login(self.collection, user, password)
+                return True
             return False
         except Exception as e:
-            print(f"Error verifying password: {e}")
+            logger.error("Error verifying password: %s", e)
             return False
 
 # Create a global user model instance
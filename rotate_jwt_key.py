@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Create a new JWT signing key for key rotation
+Writes <kid>.pem into JWT_KEYS_DIR. Key ids are UTC timestamps, so after a
+restart the new key signs while older keys stay in the JWKS for verification.
+Delete an old key file once every token it signed has expired (REFRESH_TOKEN_TTL).
+"""
+
+import os
+import sys
+import argparse
+from datetime import datetime
+from dotenv import load_dotenv
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.jwks import ASYMMETRIC_ALGORITHMS, generate_private_key
+
+# Load environment variables
+load_dotenv()
+
+def main():
+    """Generate a signing key and print the next steps"""
+    parser = argparse.ArgumentParser(description='Generate a new JWT signing key')
+    parser.add_argument('--dir', default=os.getenv('JWT_KEYS_DIR', 'jwt_keys'), help='Key directory')
+    parser.add_argument('--algorithm', default=os.getenv('JWT_ALGORITHM', 'RS256'), choices=ASYMMETRIC_ALGORITHMS)
+    parser.add_argument('--kid', help='Key id (default: current UTC timestamp)')
+    args = parser.parse_args()
+
+    kid = args.kid or datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+    os.makedirs(args.dir, exist_ok=True)
+    path = os.path.join(args.dir, f'{kid}.pem')
+    if os.path.exists(path):
+        print(f"❌ {path} already exists")
+        sys.exit(1)
+
+    # Private key files are readable by the owner only
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(generate_private_key(args.algorithm))
+
+    existing = sorted(name[:-4] for name in os.listdir(args.dir) if name.endswith('.pem'))
+    print(f"🔑 Created {args.algorithm} signing key {kid} at {path}")
+    print(f"📋 Keys in {args.dir}: {', '.join(existing)}")
+    print("➡️  Restart the signing servers (or set JWT_ACTIVE_KID) to start signing with it;")
+    print("   verifiers pick it up from /.well-known/jwks.json on the first token that uses it.")
+
+if __name__ == '__main__':
+    main()
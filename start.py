@@ -6,9 +6,13 @@ This script handles environment setup and starts the backend server.
 
 import os
 import sys
+import argparse
 import subprocess
 from pathlib import Path
 
+# Serve modes: auto keeps the old behaviour (Eel when possible, else Flask dev server)
+SERVE_MODES = ('auto', 'production', 'async', 'development', 'desktop')
+
 def check_python_version():
     """Check if Python version is compatible"""
     if sys.version_info < (3, 8):
@@ -18,10 +22,11 @@ def check_python_version():
     print(f"✅ Python version: {sys.version.split()[0]}")
     return True
 
-def check_dependencies():
+def check_dependencies(needs_eel=True):
     """Check if required dependencies are installed"""
     try:
-        import eel
+        if needs_eel:
+            import eel
         import pymongo
         import flask
         import dotenv
@@ -108,8 +113,60 @@ def build_frontend():
         os.chdir('../TaxerPay-Backend')  # Change back to backend directory
         return False
 
+def start_production_server():
+    """Replace this process with a Gunicorn master (multi-worker, no Eel)"""
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    config_path = os.path.join(backend_dir, 'gunicorn.conf.py')
+    
+    try:
+        import gunicorn
+    except ImportError:
+        print("❌ Gunicorn is not installed (it is not available on Windows)")
+        print("Please run: pip install -r requirements.txt")
+        sys.exit(1)
+    
+    print("🚀 Starting TaxerPay Backend (production, Gunicorn)...")
+    print(f"⚙️  Config: {config_path}")
+    print("🔁 Send SIGHUP to the master process for a graceful reload")
+    
+    os.chdir(backend_dir)
+    os.execvp(sys.executable, [sys.executable, '-m', 'gunicorn', '-c', config_path, 'wsgi:app'])
+
+def start_async_server():
+    """Replace this process with Uvicorn serving the async (Motor) endpoints"""
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    host = os.getenv('HOST', '0.0.0.0')
+    port = os.getenv('PORT', '8000')
+    workers = os.getenv('WEB_CONCURRENCY', '1')
+    
+    print("🚀 Starting TaxerPay Backend (async, Uvicorn)...")
+    print(f"🌐 Server: http://{host}:{port}")
+    
+    os.chdir(backend_dir)
+    os.execvp(sys.executable, [sys.executable, '-m', 'uvicorn', 'asgi:app',
+                               '--host', host, '--port', port, '--workers', workers,
+                               '--timeout-keep-alive', os.getenv('WEB_KEEPALIVE', '75')])
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description='TaxerPay Backend startup script')
+    parser.add_argument('--mode', choices=SERVE_MODES, default=os.getenv('SERVE_MODE', 'auto'),
+                        help='How to serve the app (default: SERVE_MODE env or auto)')
+    parser.add_argument('--startup-report', action='store_true',
+                        help='Print an import-time breakdown of the API server cold start and exit')
+    parser.add_argument('--startup-budget-ms', type=float, default=os.getenv('STARTUP_BUDGET_MS'),
+                        help='Fail the startup report if cold start exceeds this many milliseconds')
+    return parser.parse_args()
+
 def main():
     """Main startup function"""
+    args = parse_args()
+    
+    if args.startup_report:
+        from utils.startup import run_startup_report
+        budget = float(args.startup_budget_ms) if args.startup_budget_ms else None
+        sys.exit(0 if run_startup_report(budget_ms=budget) else 1)
+    
     print("🚀 TaxerPay Backend Startup")
     print("=" * 40)
     
@@ -118,7 +175,7 @@ def main():
         sys.exit(1)
     
     # Check dependencies
-    if not check_dependencies():
+    if not check_dependencies(needs_eel=args.mode in ('auto', 'desktop')):
         print("\n📦 Installing dependencies...")
         try:
             subprocess.run([sys.executable, '-m', 'pip', 'install', '-r', 'requirements.txt'], check=True)
@@ -130,8 +187,19 @@ def main():
     # Check environment file
     env_ok = check_env_file()
     
+    # Server deployments skip the frontend build and never touch Eel
+    if args.mode in ('production', 'async'):
+        if not env_ok:
+            print("⚠️  Please configure your .env file with MongoDB Atlas credentials")
+            sys.exit(1)
+        
+        if args.mode == 'production':
+            start_production_server()
+        else:
+            start_async_server()
+    
     # Try to build frontend
-    frontend_ok = build_frontend()
+    frontend_ok = build_frontend() if args.mode in ('auto', 'desktop') else False
     
     # Check MongoDB connection (only if env file exists)
     if env_ok:
@@ -151,16 +219,17 @@ def main():
         print("Please check your MongoDB Atlas credentials in .env file")
         print("Starting in Flask-only mode...")
     
-    if not frontend_ok:
+    if not frontend_ok and args.mode != 'development':
         print("⚠️  Frontend build failed")
         print("Starting in Flask-only mode...")
     
     # Start the application
     print("\n🎯 Starting TaxerPay Backend...")
     try:
-        from app import start_eel_app, start_flask_only
+        from app import start_flask_only
         
         if mongodb_ok and frontend_ok:
+            from desktop import start_eel_app
             start_eel_app()
         else:
             start_flask_only()
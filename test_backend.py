@@ -14,6 +14,34 @@ from pathlib import Path
 BASE_URL = "http://localhost:8000"
 API_BASE = f"{BASE_URL}/api"
 
+# Request payloads (shared with benchmarks/load_test.py)
+USER_DATA = {
+    "email": "test@example.com",
+    "password": "testpassword123",
+    "first_name": "Test",
+    "last_name": "User",
+    "phone": "123-456-7890",
+    "user_type": "individual"
+}
+
+LOGIN_DATA = {
+    "email": USER_DATA["email"],
+    "password": USER_DATA["password"]
+}
+
+TAX_CALCULATION_DATA = {
+    "income": 50000,
+    "tax_type": "federal"
+}
+
+TAX_RECORD_DATA = {
+    "tax_year": 2024,
+    "income": 50000,
+    "tax_type": "federal",
+    "deductions": 5000,
+    "credits": 1000
+}
+
 def test_health_check():
     """Test health check endpoint"""
     print("🔍 Testing health check...")
@@ -52,20 +80,12 @@ def test_api_info():
 def test_user_registration():
     """Test user registration"""
     print("🔍 Testing user registration...")
-    user_data = {
-        "email": "test@example.com",
-        "password": "testpassword123",
-        "first_name": "Test",
-        "last_name": "User",
-        "phone": "123-456-7890",
-        "user_type": "individual"
-    }
     
     try:
         response = requests.post(
             f"{API_BASE}/auth/register",
             headers={"Content-Type": "application/json"},
-            data=json.dumps(user_data)
+            data=json.dumps(USER_DATA)
         )
         
         if response.status_code == 201:
@@ -85,16 +105,12 @@ def test_user_registration():
 def test_user_login():
     """Test user login"""
     print("🔍 Testing user login...")
-    login_data = {
-        "email": "test@example.com",
-        "password": "testpassword123"
-    }
     
     try:
         response = requests.post(
             f"{API_BASE}/auth/login",
             headers={"Content-Type": "application/json"},
-            data=json.dumps(login_data)
+            data=json.dumps(LOGIN_DATA)
         )
         
         if response.status_code == 200:
@@ -111,10 +127,6 @@ def test_user_login():
 def test_tax_calculation(token):
     """Test tax calculation"""
     print("🔍 Testing tax calculation...")
-    calculation_data = {
-        "income": 50000,
-        "tax_type": "federal"
-    }
     
     try:
         response = requests.post(
@@ -123,7 +135,7 @@ def test_tax_calculation(token):
                 "Content-Type": "application/json",
                 "Authorization": f"Bearer {token}"
             },
-            data=json.dumps(calculation_data)
+            data=json.dumps(TAX_CALCULATION_DATA)
         )
         
         if response.status_code == 200:
@@ -140,13 +152,6 @@ def test_tax_calculation(token):
 def test_tax_record_creation(token):
     """Test tax record creation"""
     print("🔍 Testing tax record creation...")
-    tax_data = {
-        "tax_year": 2024,
-        "income": 50000,
-        "tax_type": "federal",
-        "deductions": 5000,
-        "credits": 1000
-    }
     
     try:
         response = requests.post(
@@ -155,7 +160,7 @@ def test_tax_record_creation(token):
                 "Content-Type": "application/json",
                 "Authorization": f"Bearer {token}"
             },
-            data=json.dumps(tax_data)
+            data=json.dumps(TAX_RECORD_DATA)
         )
         
         if response.status_code == 201:
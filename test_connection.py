@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
 """
 Simple script to test MongoDB Atlas connection
+Honours DB_BACKEND, so it also checks a local mongod or runs offline with DB_BACKEND=memory.
 """
 
 import os
+import sys
 from dotenv import load_dotenv
-from pymongo import MongoClient
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import Database
 
 # Load environment variables
 load_dotenv()
@@ -15,30 +21,26 @@ def test_connection():
     print("🔍 Testing MongoDB Atlas connection...")
     print("=" * 50)
     
-    # Get MongoDB URI from environment variables
+    # Get backend, MongoDB URI and database name from environment variables
+    backend = os.getenv('DB_BACKEND', 'atlas').lower()
     mongodb_uri = os.getenv('MONGODB_URI')
     database_name = os.getenv('DATABASE_NAME', 'taxerpay')
     
     print(f"📋 Environment check:")
+    print(f"   DB_BACKEND: {backend}")
     print(f"   MONGODB_URI: {'✅ Found' if mongodb_uri else '❌ Not found'}")
     print(f"   DATABASE_NAME: {database_name}")
     
-    if not mongodb_uri:
+    if backend == 'atlas' and not mongodb_uri:
         print("\n❌ MONGODB_URI not found in .env file!")
         print("   Please create a .env file with your MongoDB Atlas connection string.")
         return False
     
     try:
-        # Connect to MongoDB Atlas
-        print(f"\n🔌 Connecting to MongoDB Atlas...")
-        client = MongoClient(mongodb_uri)
-        
-        # Test the connection
-        client.admin.command('ping')
-        print("✅ Successfully connected to MongoDB Atlas!")
-        
-        # Get database
-        db = client[database_name]
+        # Connect to the configured backend (pings the server unless it is in-memory)
+        print(f"\n🔌 Connecting to {backend} backend...")
+        database = Database(backend=backend)
+        db = database.db
         print(f"📊 Database: {database_name}")
         
         # List existing collections
@@ -56,7 +58,7 @@ def test_connection():
         print(f"👨‍💼 Admins in database: {admins_count}")
         
         # Close connection
-        client.close()
+        database.close()
         print("\n✅ Connection test completed successfully!")
         return True
         
@@ -0,0 +1,72 @@
+"""Shared fixtures: an app per test on the in-memory (mongomock) backend
+
+Run from the repository root with `python -m pytest` (needs pytest and mongomock).
+"""
+
+import os
+import sys
+import uuid
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from utils.passwords import get_rounds, set_rounds
+from utils.services import get_services
+
+TEST_CONFIG = {
+    'DB_BACKEND': 'memory',
+    'JWT_SECRET_KEY': 'test-secret-key',
+    'JWT_ALGORITHM': 'HS256',
+    # The cheapest bcrypt cost keeps registrations and logins fast
+    'BCRYPT_ROUNDS': 4,
+    'LOG_LEVEL': 'CRITICAL',
+    'LOG_REQUESTS': False,
+    'JOB_INLINE_WORKERS': 0,
+    'PREWARM': False,
+}
+
+@pytest.fixture
+def make_app():
+    """Factory for apps with their own database (the mongomock client is shared by the process)"""
+    rounds = get_rounds()
+
+    def factory(**overrides):
+        return create_app({**TEST_CONFIG, 'DATABASE_NAME': f'test_{uuid.uuid4().hex}', **overrides})
+
+    yield factory
+    set_rounds(rounds)
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def services(app):
+    return get_services(app)
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+@pytest.fixture
+def farmer(client):
+    """A registered farmer: its id, PAN card, password and login response"""
+    data = {'pan_card': 'ABCDE1234F', 'password': 'farmer-pass', 'first_name': 'Ravi', 'last_name': 'Kumar'}
+    response = client.post('/api/farmer/register', json=data)
+    assert response.status_code == 201, response.get_json()
+    body = response.get_json()
+    return {'id': body['user']['_id'], 'pan_card': data['pan_card'], 'password': data['password'],
+            'headers': bearer(body['token']), 'refresh_token': body['refresh_token']}
+
+@pytest.fixture
+def admin(client):
+    """A registered admin: its id and auth headers"""
+    data = {'employee_id': 'EMP001', 'password': 'admin-pass', 'first_name': 'Asha', 'last_name': 'Rao'}
+    response = client.post('/api/admin/register', json=data)
+    assert response.status_code == 201, response.get_json()
+    body = response.get_json()
+    return {'id': body['user']['_id'], 'headers': bearer(body['token']), 'refresh_token': body['refresh_token']}
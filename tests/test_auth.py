@@ -0,0 +1,61 @@
+import jwt
+from datetime import datetime, timedelta
+from conftest import TEST_CONFIG, bearer
+
+def _refresh(client, refresh_token):
+    return client.post('/api/auth/refresh', json={'refresh_token': refresh_token})
+
+def _token(**claims):
+    now = datetime.utcnow()
+    payload = {'type': 'access', 'user_id': '0' * 24, 'exp': now + timedelta(minutes=5), 'iat': now, **claims}
+    return jwt.encode(payload, TEST_CONFIG['JWT_SECRET_KEY'], algorithm='HS256')
+
+def test_refresh_returns_a_new_pair(client, farmer):
+    response = _refresh(client, farmer['refresh_token'])
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['refresh_token'] != farmer['refresh_token']
+    assert client.get('/api/farmer/profile', headers=bearer(body['token'])).status_code == 200
+
+def test_refresh_tokens_are_single_use_and_reuse_revokes_the_family(client, services, farmer):
+    rotated = _refresh(client, farmer['refresh_token']).get_json()['refresh_token']
+
+    # Replaying the spent token fails and revokes every refresh token issued so far
+    assert _refresh(client, farmer['refresh_token']).status_code == 401
+    assert _refresh(client, rotated).status_code == 401
+
+    # Tokens from the revocation's second count as revoked; pretend it happened earlier
+    services.refresh_tokens.revocations.update_many(
+        {}, {'$set': {'revoked_before': datetime.utcnow() - timedelta(seconds=5)}})
+
+    # Logging in again issues tokens that work
+    login = client.post('/api/farmer/login', json={'pan_card': farmer['pan_card'], 'password': farmer['password']})
+    assert _refresh(client, login.get_json()['refresh_token']).status_code == 200
+
+def test_refresh_and_access_tokens_are_not_interchangeable(client, farmer):
+    access_token = farmer['headers']['Authorization'].split(' ')[1]
+    assert _refresh(client, access_token).status_code == 401
+    assert client.get('/api/farmer/profile', headers=bearer(farmer['refresh_token'])).status_code == 401
+
+def test_logout_revokes_the_refresh_token(client, farmer):
+    assert client.post('/api/auth/logout', json={'refresh_token': farmer['refresh_token']}).status_code == 200
+    assert _refresh(client, farmer['refresh_token']).status_code == 401
+
+def test_deleted_accounts_cannot_refresh(client, services, admin):
+    services.admin_model.collection.delete_many({})
+    assert _refresh(client, admin['refresh_token']).status_code == 401
+
+def test_admin_routes_authorize_from_the_role_claim(client, admin, farmer):
+    url = '/api/admin/farmers/search?q=ravi'
+    assert client.get(url, headers=admin['headers']).status_code == 200
+    assert client.get(url, headers=farmer['headers']).status_code == 403
+    assert client.get(url, headers=bearer(_token())).status_code == 403
+    assert client.get(url, headers=bearer(_token(user_type='user'))).status_code == 403
+    assert client.get(url).status_code == 401
+
+def test_tokens_do_not_carry_permissions(client):
+    response = client.post('/api/admin/register', json={'employee_id': 'E2', 'password': 'pw', 'first_name': 'A',
+                                                        'last_name': 'B', 'permissions': ['system_admin']})
+    claims = jwt.decode(response.get_json()['token'], TEST_CONFIG['JWT_SECRET_KEY'], algorithms=['HS256'])
+    assert claims['user_type'] == 'admin'
+    assert 'permissions' not in claims
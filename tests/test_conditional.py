@@ -0,0 +1,49 @@
+def _get(client, url, headers, etag=None):
+    return client.get(url, headers={**headers, **({'If-None-Match': etag} if etag else {})})
+
+def test_profile_answers_304_while_unchanged(client, farmer):
+    first = _get(client, '/api/farmer/profile', farmer['headers'])
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert etag.startswith('W/')
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+
+    again = _get(client, '/api/farmer/profile', farmer['headers'], etag)
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'] == etag
+
+    # If-Modified-Since with the Last-Modified date works as well
+    since = client.get('/api/farmer/profile',
+                       headers={**farmer['headers'], 'If-Modified-Since': first.headers['Last-Modified']})
+    assert since.status_code == 304
+
+def test_profile_changes_its_etag_when_updated(client, farmer):
+    etag = _get(client, '/api/farmer/profile', farmer['headers']).headers['ETag']
+    assert client.put('/api/farmer/profile', headers=farmer['headers'], json={'phone': '9876543210'}).status_code == 200
+
+    response = _get(client, '/api/farmer/profile', farmer['headers'], etag)
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['farmer']['phone'] == '9876543210'
+
+def test_tax_records_answer_304_until_the_list_changes(client, farmer):
+    url = '/api/tax/records'
+    etag = _get(client, url, farmer['headers']).headers['ETag']
+    assert _get(client, url, farmer['headers'], etag).status_code == 304
+
+    created = client.post(url, headers=farmer['headers'], json={'tax_year': 2024, 'income': 100000, 'tax_type': 'income'})
+    assert created.status_code == 201
+    response = _get(client, url, farmer['headers'], etag)
+    assert response.status_code == 200
+    assert response.get_json()['count'] == 1
+    etag = response.headers['ETag']
+    assert _get(client, url, farmer['headers'], etag).status_code == 304
+
+    record_id = response.get_json()['records'][0]['_id']
+    assert client.delete(f'{url}/{record_id}', headers=farmer['headers']).status_code == 200
+    assert _get(client, url, farmer['headers'], etag).status_code == 200
+
+def test_conditional_requests_still_need_a_token(client, farmer):
+    etag = _get(client, '/api/farmer/profile', farmer['headers']).headers['ETag']
+    assert client.get('/api/farmer/profile', headers={'If-None-Match': etag}).status_code == 401
@@ -0,0 +1,94 @@
+import io
+import bson
+import pytest
+from jobs.worker import Worker
+from utils.farmer_import import XLSX_TYPE
+
+HEADER = 'pan_card,password,first_name,last_name,phone\n'
+
+def _import(client, admin, body, content_type='text/csv'):
+    return client.post('/api/admin/farmers/import', headers=admin['headers'], data=body, content_type=content_type)
+
+def _report(app, services, response):
+    assert response.status_code == 202, response.get_json()
+    assert Worker(services, app=app).run_once('w1')
+    job = services.job_model.get_job(response.get_json()['job']['_id'])
+    assert job['status'] == 'succeeded', job.get('error')
+    return job['result']
+
+def test_every_row_is_reported(app, client, services, admin, farmer):
+    body = (HEADER +
+            'PQRST6789K,pw-one,Meena,Devi,9876543210\n'
+            ',pw-two,No,Pan,\n'
+            'pqrst6789k,pw-three,Same,Pan,\n'
+            '\n'
+            f"{farmer['pan_card']},pw-four,Already,Registered,\n"
+            'BADPAN,pw-five,Bad,Pan,\n')
+    report = _report(app, services, _import(client, admin, body.encode('utf-8')))
+
+    rows = [(result['row'], result['status']) for result in report['results']]
+    # Row numbers count the header as row 1; blank lines are skipped but keep their number
+    assert rows == [(2, 'created'), (3, 'invalid'), (4, 'duplicate'), (6, 'duplicate'), (7, 'invalid')]
+    assert report['summary'] == {'rows': 5, 'truncated': False, 'created': 1, 'duplicate': 2, 'invalid': 2,
+                                 'failed': 0}
+    assert report['results'][1]['errors'] == ['pan_card is required']
+    assert report['results'][4]['errors'] == ['pan_card must look like ABCDE1234F']
+
+    login = client.post('/api/farmer/login', json={'pan_card': 'PQRST6789K', 'password': 'pw-one'})
+    assert login.status_code == 200
+    created = services.farmer_model.collection.find_one({'pan_card': 'PQRST6789K'})
+    assert created['phone'] == '9876543210' and created['password'] != 'pw-one'
+
+def test_rows_past_the_limit_are_not_imported(app, client, services, admin):
+    app.config['FARMER_IMPORT_MAX_ROWS'] = 2
+    body = HEADER + ''.join(f'PQRST678{digit}K,pw,F,L,\n' for digit in range(4))
+    report = _report(app, services, _import(client, admin, body.encode('utf-8')))
+    assert report['summary']['truncated'] is True
+    assert [result['row'] for result in report['results']] == [2, 3]
+
+@pytest.mark.parametrize('body, error', [
+    (b'pan_card,first_name\nABCDE1234F,Ravi\n', 'Missing columns: password, last_name'),
+    (b'', 'Missing columns: pan_card, password, first_name, last_name'),
+    ('pan_card,password,first_name,last_name\nABCDE1234F,\xe9,A,B\n'.encode('latin-1'),
+     'CSV files must be UTF-8 encoded'),
+])
+def test_unreadable_uploads_are_rejected_before_queuing(client, services, admin, body, error):
+    response = _import(client, admin, body)
+    assert (response.status_code, response.get_json()['error']) == (400, error)
+    assert services.job_model.collection.count_documents({}) == 0
+
+def test_other_content_types_are_rejected(client, admin):
+    assert _import(client, admin, b'{}', content_type='application/json').status_code == 400
+
+def test_passwords_never_reach_the_jobs_collection_in_plaintext(client, services, admin):
+    _import(client, admin, (HEADER + 'PQRST6789K,secret-pw,Meena,Devi,\n').encode('utf-8'))
+    stored = services.job_model.collection.find_one({})
+    assert b'secret-pw' not in bson.encode(stored)
+    upload = services.job_model.open_secrets(stored)['upload']
+    assert upload['farmers'][0][1]['password'] == 'secret-pw'
+
+def test_an_excel_request_body_is_imported(app, client, services, admin):
+    openpyxl = pytest.importorskip('openpyxl')
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['PAN Card', 'Password', 'First Name', 'Last Name', 'Phone'])
+    sheet.append(['PQRST6789K', 'pw-one', 'Meena', 'Devi', 9876543210])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+
+    report = _report(app, services, _import(client, admin, buffer.getvalue(), content_type=XLSX_TYPE))
+    assert report['summary']['created'] == 1
+    assert services.farmer_model.collection.find_one({'pan_card': 'PQRST6789K'})['phone'] == '9876543210'
+
+def test_an_excel_file_field_is_imported(app, client, services, admin):
+    openpyxl = pytest.importorskip('openpyxl')
+    workbook = openpyxl.Workbook()
+    workbook.active.append(['pan_card', 'password', 'first_name', 'last_name'])
+    workbook.active.append(['PQRST6789K', 'pw-one', 'Meena', 'Devi'])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+
+    response = client.post('/api/admin/farmers/import', headers=admin['headers'],
+                           data={'file': (buffer, 'farmers.xlsx')}, content_type='multipart/form-data')
+    assert _report(app, services, response)['summary']['created'] == 1
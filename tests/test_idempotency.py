@@ -0,0 +1,116 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+from utils.idempotency import AsyncIdempotencyStore, fingerprint
+
+URL = '/api/tax/records'
+RECORD = {'tax_year': 2024, 'income': 100000, 'tax_type': 'income'}
+
+def _post(client, farmer, key, body=RECORD):
+    # The same bytes every time, as a client retrying a request would send
+    return client.post(URL, headers={**farmer['headers'], 'Idempotency-Key': key, 'Content-Type': 'application/json'},
+                       data=json.dumps(body))
+
+def _record_count(services):
+    return services.tax_record_model.collection.count_documents({})
+
+def test_retries_replay_the_stored_response(client, services, farmer):
+    first = _post(client, farmer, 'key-1')
+    retry = _post(client, farmer, 'key-1')
+    assert first.status_code == retry.status_code == 201
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.data == first.data
+    assert _record_count(services) == 1
+
+def test_reusing_a_key_for_another_body_is_422(client, services, farmer):
+    _post(client, farmer, 'key-1')
+    response = _post(client, farmer, 'key-1', {**RECORD, 'income': 5})
+    assert response.status_code == 422
+    assert _record_count(services) == 1
+
+def test_a_key_still_in_progress_is_409(client, services, farmer):
+    body = json.dumps(RECORD).encode('utf-8')
+    key_id = f"tax_records:{farmer['id']}:key-1"
+    assert services.idempotency.claim(key_id, fingerprint('POST', URL, body)) is None
+
+    response = _post(client, farmer, 'key-1')
+    assert response.status_code == 409
+    assert response.headers['Retry-After'] == '1'
+    assert _record_count(services) == 0
+
+def test_stale_claims_are_taken_over(client, services, farmer):
+    key_id = f"tax_records:{farmer['id']}:key-1"
+    services.idempotency.claim(key_id, fingerprint('POST', URL, json.dumps(RECORD).encode('utf-8')))
+    # The request holding the claim died without completing or releasing it
+    services.idempotency.collection.update_one(
+        {'_id': key_id}, {'$set': {'locked_until': datetime.utcnow() - timedelta(seconds=60)}})
+
+    assert _post(client, farmer, 'key-1').status_code == 201
+    assert _record_count(services) == 1
+
+def test_failed_requests_release_the_key(client, services, farmer):
+    assert _post(client, farmer, 'key-1', {'tax_year': 2024}).status_code == 400
+    # The client fixes the body and retries with the same key
+    assert _post(client, farmer, 'key-1').status_code == 201
+    assert _record_count(services) == 1
+
+def test_keys_are_scoped_to_the_caller_and_optional(client, services, farmer):
+    other = client.post('/api/farmer/register', json={'pan_card': 'FGHIJ5678K', 'password': 'pw', 'first_name': 'A',
+                                                      'last_name': 'B'}).get_json()
+    _post(client, farmer, 'key-1')
+    response = _post(client, {'headers': {'Authorization': f"Bearer {other['token']}"}}, 'key-1')
+    assert response.status_code == 201
+    assert 'Idempotent-Replayed' not in response.headers
+
+    client.post(URL, headers=farmer['headers'], json=RECORD)
+    client.post(URL, headers=farmer['headers'], json=RECORD)
+    assert _record_count(services) == 4
+
+def test_overlong_keys_are_rejected(client, farmer):
+    assert _post(client, farmer, 'k' * 256).status_code == 400
+
+def test_the_token_is_verified_once_per_request(client, farmer, monkeypatch):
+    from utils.auth import AuthUtils
+    decode, calls = AuthUtils._decode, []
+    monkeypatch.setattr(AuthUtils, '_decode', lambda self, token: calls.append(token) or decode(self, token))
+    assert _post(client, farmer, 'key-1').status_code == 201
+    assert len(calls) == 1
+
+class _AsyncCollection:
+    """Motor-like awaitable methods over a mongomock collection"""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+        return call
+
+class _AsyncDatabase:
+    def __init__(self, database):
+        self._database = database
+
+    def get_collection(self, name):
+        return _AsyncCollection(self._database.get_collection(name))
+
+def test_async_store_claims_completes_and_releases(services):
+    store = AsyncIdempotencyStore(_AsyncDatabase(services.db), ttl=60, lock_timeout=30)
+
+    async def scenario():
+        assert await store.claim('k1', 'hash') is None
+        assert (await store.claim('k1', 'hash'))['status'] == 'in_progress'
+        await store.complete('k1', 201, b'{}', 'application/json')
+        stored = await store.claim('k1', 'hash')
+        assert stored['status'] == 'completed'
+        assert stored['response']['status'] == 201
+
+        assert await store.claim('k2', 'hash') is None
+        await store.release('k2')
+        assert await store.claim('k2', 'other') is None
+
+    asyncio.run(scenario())
+    # Same documents as the WSGI app's store, so either server can replay the other's responses
+    assert services.idempotency.claim('k1', 'hash')['status'] == 'completed'
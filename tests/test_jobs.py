@@ -0,0 +1,122 @@
+import bson
+import pytest
+from datetime import datetime, timedelta
+from pymongo.errors import DuplicateKeyError
+from jobs.registry import job_handler
+from jobs.worker import Worker
+from utils.passwords import check_password
+
+calls = []
+
+@job_handler('test_flaky', max_attempts=2)
+def flaky(ctx):
+    calls.append(ctx.job['attempts'])
+    raise RuntimeError('handler broke')
+
+def _expire_lease(jobs, job_id):
+    jobs.collection.update_one({'_id': job_id}, {'$set': {'lease_until': datetime.utcnow() - timedelta(seconds=1)}})
+
+def test_a_job_is_leased_by_one_worker_until_its_lease_expires(services):
+    jobs = services.job_model
+    job = jobs.enqueue('export_farmers')
+
+    leased = jobs.lease('w1')
+    assert (leased['_id'], leased['status'], leased['worker'], leased['attempts']) == (job['_id'], 'running', 'w1', 1)
+    assert jobs.lease('w2') is None
+
+    # A worker that stopped heartbeating loses the job to the next one
+    _expire_lease(jobs, job['_id'])
+    taken = jobs.lease('w2')
+    assert (taken['worker'], taken['attempts']) == ('w2', 2)
+    assert jobs.heartbeat(str(job['_id']), 'w1') is None
+    assert not jobs.complete(str(job['_id']), 'w1')
+    assert jobs.complete(str(job['_id']), 'w2', {'ok': True})
+    assert jobs.get_job(str(job['_id']))['status'] == 'succeeded'
+
+def test_lease_only_takes_the_requested_types(services):
+    jobs = services.job_model
+    jobs.enqueue('export_farmers')
+    assert jobs.lease('w1', job_types=['render_document']) is None
+    assert jobs.lease('w1', job_types=['export_farmers'])['type'] == 'export_farmers'
+
+def test_failed_attempts_are_retried_until_max_attempts(app, services):
+    del calls[:]
+    jobs = services.job_model
+    job = jobs.enqueue('test_flaky', max_attempts=2)
+    worker = Worker(services, app=app, retry_base=30)
+
+    assert worker.run_once('w1')
+    retried = jobs.collection.find_one({'_id': job['_id']})
+    assert (retried['status'], retried['error']) == ('queued', 'RuntimeError: handler broke')
+    assert retried['run_after'] > datetime.utcnow() + timedelta(seconds=10)
+    # Backing off: not runnable yet
+    assert not worker.run_once('w1')
+
+    jobs.collection.update_one({'_id': job['_id']}, {'$set': {'run_after': datetime.utcnow()}})
+    assert worker.run_once('w1')
+    assert calls == [1, 2]
+    assert jobs.get_job(str(job['_id']))['status'] == 'failed'
+
+def test_a_dedupe_key_returns_the_active_job(services):
+    jobs = services.job_model
+    first = jobs.enqueue('year_end_assessments', {'tax_year': 2024}, dedupe_key='assess:2024')
+    again = jobs.enqueue('year_end_assessments', {'tax_year': 2024}, dedupe_key='assess:2024')
+    assert again['_id'] == first['_id']
+    assert jobs.collection.count_documents({}) == 1
+
+    # Once the job is final, the key is free again
+    jobs.lease('w1')
+    jobs.complete(str(first['_id']), 'w1')
+    assert jobs.enqueue('year_end_assessments', {'tax_year': 2024}, dedupe_key='assess:2024')['_id'] != first['_id']
+
+def test_a_tax_record_is_assessed_once(services):
+    payments = services.payment_model
+    payments.record_assessment('f1', 2024, '500', tax_record_id='r1')
+    with pytest.raises(DuplicateKeyError):
+        payments.record_assessment('f1', 2024, '500', tax_record_id='r1')
+    balance = payments.get_balance('f1', 2024)
+    assert (balance['assessed_paise'], balance['entries']) == (50000, 1)
+
+def test_year_end_assessments_post_each_record_once(app, services, farmer):
+    for income in (300000, 900000):
+        services.tax_record_model.collection.insert_one(
+            {'user_id': farmer['id'], 'tax_year': 2024, 'income': income, 'deductions': 0, 'tax_type': 'federal'})
+    worker = Worker(services, app=app)
+    jobs = services.job_model
+
+    results = []
+    for _ in range(2):
+        job = jobs.enqueue('year_end_assessments', {'tax_year': 2024})
+        assert worker.run_once('w1')
+        results.append(jobs.get_job(str(job['_id']))['result'])
+    assert (results[0]['assessed'], results[0]['already_assessed']) == (2, 0)
+    assert (results[1]['assessed'], results[1]['already_assessed']) == (0, 2)
+    assert services.payment_model.get_balance(farmer['id'], 2024)['entries'] == 2
+
+def test_bulk_password_reset_stores_only_encrypted_hashes(app, client, services, admin, farmer):
+    response = client.post('/api/admin/jobs', headers=admin['headers'], json={
+        'type': 'bulk_password_reset',
+        'params': {'resets': [{'farmer_id': farmer['id'], 'password': 'fresh-pass'},
+                              {'farmer_id': 'not-an-id', 'password': 'other-pass'}]}})
+    assert response.status_code == 202
+    job_id = response.get_json()['job']['_id']
+    assert 'resets' not in response.get_json()['job']['params']
+
+    jobs = services.job_model
+    stored = jobs.collection.find_one({})
+    assert isinstance(stored['secret_params'], bytes)
+    assert b'fresh-pass' not in bson.encode(stored)
+    reset = jobs.open_secrets(stored)['resets'][0]
+    assert 'password' not in reset and check_password('fresh-pass', reset['password_hash'])
+
+    assert Worker(services, app=app).run_once('w1')
+    job = jobs.get_job(job_id)
+    assert (job['status'], job['result']['updated'], job['result']['invalid']) == ('succeeded', 1, ['not-an-id'])
+    assert 'secret_params' not in jobs.collection.find_one({})
+    login = client.post('/api/farmer/login', json={'pan_card': farmer['pan_card'], 'password': 'fresh-pass'})
+    assert login.status_code == 200
+
+def test_bulk_password_reset_rejects_malformed_resets(client, admin):
+    response = client.post('/api/admin/jobs', headers=admin['headers'],
+                           json={'type': 'bulk_password_reset', 'params': {'resets': 'everyone'}})
+    assert response.status_code == 400
@@ -0,0 +1,48 @@
+import bcrypt
+import pytest
+from utils.passwords import hash_password, hash_rounds, needs_rehash, rehash_on_login, set_rounds
+
+def test_hash_rounds_reads_the_cost_of_bytes_and_str_hashes():
+    hashed = bcrypt.hashpw(b'pw', bcrypt.gensalt(rounds=5))
+    assert hash_rounds(hashed) == 5
+    assert hash_rounds(hashed.decode('utf-8')) == 5
+    assert hash_rounds('not a hash') is None
+    assert hash_rounds(None) is None
+
+def test_needs_rehash_only_upwards(make_app):
+    make_app()
+    set_rounds(6)
+    assert needs_rehash(bcrypt.hashpw(b'pw', bcrypt.gensalt(rounds=5)))
+    assert not needs_rehash(bcrypt.hashpw(b'pw', bcrypt.gensalt(rounds=6)))
+    # Hosts that calibrated a higher cost must not have their hashes downgraded
+    assert not needs_rehash(bcrypt.hashpw(b'pw', bcrypt.gensalt(rounds=7)))
+    assert not needs_rehash('garbage')
+
+def test_set_rounds_rejects_out_of_range_costs():
+    with pytest.raises(ValueError):
+        set_rounds(3)
+    with pytest.raises(ValueError):
+        set_rounds(32)
+
+def test_rehash_on_login_upgrades_the_stored_hash(services):
+    collection = services.farmer_model.collection
+    set_rounds(4)
+    farmer_id = collection.insert_one({'pan_card': 'ABCDE1234F', 'password': hash_password('pw')}).inserted_id
+
+    set_rounds(5)
+    document = collection.find_one({'_id': farmer_id})
+    assert rehash_on_login(collection, document, 'pw')
+
+    stored = collection.find_one({'_id': farmer_id})['password']
+    assert isinstance(stored, bytes)
+    assert hash_rounds(stored) == 5
+    assert bcrypt.checkpw(b'pw', stored)
+    # Already at the configured cost: nothing to do
+    assert not rehash_on_login(collection, {**document, 'password': stored}, 'pw')
+
+def test_login_rehashes_a_weaker_hash(client, services, farmer):
+    set_rounds(5)
+    response = client.post('/api/farmer/login', json={'pan_card': farmer['pan_card'], 'password': farmer['password']})
+    assert response.status_code == 200
+    stored = services.farmer_model.collection.find_one({'pan_card': farmer['pan_card']})['password']
+    assert hash_rounds(stored) == 5
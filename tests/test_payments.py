@@ -0,0 +1,98 @@
+import pytest
+from bson import ObjectId
+from models.payment import to_paise
+
+def _submit(client, farmer, amount='100.50', **extra):
+    return client.post('/api/payments', headers=farmer['headers'], json={'tax_year': 2024, 'amount': amount, **extra})
+
+def _paid(client, farmer):
+    return client.get('/api/payments/balance?tax_year=2024', headers=farmer['headers']).get_json()['balance']['paid']
+
+def test_to_paise_never_goes_through_floats():
+    assert to_paise('0.1') + to_paise('0.2') == to_paise('0.3') == 30
+    assert to_paise(100.505) == 10051
+    with pytest.raises(ValueError):
+        to_paise('NaN')
+    with pytest.raises(ValueError):
+        to_paise('ten')
+
+def test_ledger_entries_move_the_running_balance(services):
+    payments = services.payment_model
+    payments.record_assessment('f1', 2024, '1000')
+    _, balance = payments.record_payment('f1', 2024, '250.25')
+    assert (balance['assessed_paise'], balance['paid_paise'], balance['balance_paise'], balance['entries']) == \
+        (100000, 25025, 74975, 2)
+    # The snapshot agrees with a recomputation from the ledger
+    rebuilt = payments.rebuild_balance('f1', 2024)
+    assert rebuilt['balance_paise'] == payments.get_balance('f1', 2024)['balance_paise'] == 74975
+
+def test_a_failed_append_undoes_the_balance_change(services, monkeypatch):
+    payments = services.payment_model
+    payments.record_assessment('f1', 2024, '1000')
+
+    def broken_insert(*args, **kwargs):
+        raise RuntimeError('insert failed')
+    monkeypatch.setattr(type(payments.ledger), 'insert_one', broken_insert)
+    with pytest.raises(RuntimeError):
+        payments.record_payment('f1', 2024, '400')
+    monkeypatch.undo()
+
+    balance = payments.get_balance('f1', 2024)
+    assert (balance['paid_paise'], balance['balance_paise'], balance['entries']) == (0, 100000, 1)
+
+def test_farmer_payments_stay_pending_until_confirmed(client, farmer, admin):
+    response = _submit(client, farmer, reference='UTR123')
+    assert response.status_code == 201
+    payment = response.get_json()['payment']
+    assert (payment['status'], payment['amount']) == ('pending', 100.5)
+    assert _paid(client, farmer) == 0
+
+    queue = client.get('/api/admin/payments?status=pending', headers=admin['headers']).get_json()
+    assert [p['_id'] for p in queue['payments']] == [payment['_id']]
+
+    confirmed = client.post(f"/api/admin/payments/{payment['_id']}/confirm", headers=admin['headers'])
+    assert confirmed.status_code == 200
+    assert confirmed.get_json()['payment']['status'] == 'confirmed'
+    assert _paid(client, farmer) == 100.5
+
+    # Confirming again never pays twice
+    assert client.post(f"/api/admin/payments/{payment['_id']}/confirm", headers=admin['headers']).status_code == 409
+    assert _paid(client, farmer) == 100.5
+
+def test_an_interrupted_confirm_can_be_repeated(client, services, farmer, admin):
+    payment_id = _submit(client, farmer, amount=10).get_json()['payment']['_id']
+    payments = services.payment_model
+    # A confirm that posted to the ledger but died before marking the submission confirmed
+    submission = payments.submissions.find_one_and_update({'_id': ObjectId(payment_id)},
+                                                          {'$set': {'status': 'confirming'}})
+    payments.record_payment(farmer['id'], 2024, 10, submission_id=submission['_id'])
+
+    response = client.post(f'/api/admin/payments/{payment_id}/confirm', headers=admin['headers'])
+    assert response.status_code == 200
+    assert _paid(client, farmer) == 10
+    assert payments.ledger.count_documents({'submission_id': submission['_id']}) == 1
+
+def test_rejected_payments_never_reach_the_ledger(client, farmer, admin):
+    payment_id = _submit(client, farmer).get_json()['payment']['_id']
+    response = client.post(f'/api/admin/payments/{payment_id}/reject', headers=admin['headers'],
+                           json={'reason': 'No such transfer'})
+    assert response.status_code == 200
+    assert response.get_json()['payment']['status'] == 'rejected'
+    assert client.post(f'/api/admin/payments/{payment_id}/confirm', headers=admin['headers']).status_code == 409
+    assert _paid(client, farmer) == 0
+
+    statuses = client.get('/api/payments/submissions', headers=farmer['headers']).get_json()['payments']
+    assert [p['status'] for p in statuses] == ['rejected']
+
+def test_payment_endpoints_are_for_farmers_only(client, farmer, admin):
+    assert _submit(client, admin).status_code == 403
+    assert client.get('/api/payments/balance', headers=admin['headers']).status_code == 403
+    assert client.get('/api/payments').status_code == 401
+
+    payment_id = _submit(client, farmer).get_json()['payment']['_id']
+    assert client.post(f'/api/admin/payments/{payment_id}/confirm', headers=farmer['headers']).status_code == 403
+    assert client.post('/api/admin/payments/not-an-id/confirm', headers=admin['headers']).status_code == 404
+
+@pytest.mark.parametrize('amount', [0, -5, 'abc'])
+def test_invalid_amounts_are_rejected(client, farmer, amount):
+    assert _submit(client, farmer, amount=amount).status_code == 400
@@ -0,0 +1,86 @@
+import pytest
+from utils.rate_limit import LoginRateLimiter, MemoryBucketStore, create_login_limiter
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr('utils.rate_limit.time.monotonic', clock)
+    return clock
+
+def test_bucket_allows_a_burst_then_refills_at_the_rate(clock):
+    store = MemoryBucketStore()
+    assert [store.take('k', 3, 1.0) for _ in range(3)] == [0, 0, 0]
+    assert store.take('k', 3, 1.0) == pytest.approx(1.0)
+
+    clock.now += 0.5
+    assert store.take('k', 3, 1.0) == pytest.approx(0.5)
+    clock.now += 0.5
+    assert store.take('k', 3, 1.0) == 0
+
+    # Refills never exceed the capacity
+    clock.now += 100
+    assert [store.take('k', 3, 1.0) for _ in range(3)] == [0, 0, 0]
+    assert store.take('k', 3, 1.0) > 0
+
+def test_cost_zero_only_looks(clock):
+    store = MemoryBucketStore()
+    assert store.take('k', 1, 1.0, cost=0) == 0
+    assert store.take('k', 1, 1.0, cost=0) == 0
+    assert store.take('k', 1, 1.0) == 0
+    assert store.take('k', 1, 1.0, cost=0) > 0
+
+def test_least_recently_used_buckets_are_evicted(clock):
+    store = MemoryBucketStore(max_keys=2)
+    store.take('a', 1, 1.0)
+    store.take('b', 1, 1.0)
+    store.take('c', 1, 1.0)
+    assert len(store._buckets) == 2
+    # 'a' was evicted, so it starts full again
+    assert store.take('a', 1, 1.0) == 0
+
+def test_only_failed_attempts_charge_the_account(clock):
+    limiter = LoginRateLimiter(MemoryBucketStore(), account_burst=2, account_per_minute=1,
+                               ip_burst=100, ip_per_minute=100)
+    for _ in range(5):
+        assert limiter.check('farmer', 'abcde1234f', ip='1.2.3.4') == 0
+
+    limiter.failed('farmer', 'ABCDE1234F')
+    limiter.failed('farmer', 'abcde1234f ')
+    # Account keys are normalised, and other IPs are throttled for this account too
+    assert limiter.check('farmer', 'ABCDE1234F', ip='5.6.7.8') == pytest.approx(60)
+
+def test_ip_bucket_is_charged_for_every_attempt(clock):
+    limiter = LoginRateLimiter(MemoryBucketStore(), ip_burst=2, ip_per_minute=60)
+    assert limiter.check('farmer', 'A', ip='1.2.3.4') == 0
+    assert limiter.check('farmer', 'B', ip='1.2.3.4') == 0
+    assert limiter.check('farmer', 'C', ip='1.2.3.4') == pytest.approx(1)
+    assert limiter.check('farmer', 'C', ip='9.9.9.9') == 0
+
+@pytest.mark.parametrize('setting, value', [
+    ('LOGIN_ACCOUNT_PER_MINUTE', 0), ('LOGIN_IP_PER_MINUTE', -1), ('LOGIN_ACCOUNT_BURST', 0), ('LOGIN_IP_BURST', 0.5)
+])
+def test_limits_that_would_fail_open_are_rejected(setting, value):
+    with pytest.raises(ValueError, match=setting):
+        create_login_limiter({setting: value}, None)
+
+def test_disabled_limiter_never_throttles():
+    limiter = create_login_limiter({'LOGIN_RATE_LIMIT': False, 'LOGIN_IP_PER_MINUTE': 0}, None)
+    assert limiter.check('farmer', 'A', ip='1.2.3.4') == 0
+
+def test_login_is_throttled_after_failed_passwords(make_app):
+    client = make_app(LOGIN_ACCOUNT_BURST=2, LOGIN_ACCOUNT_PER_MINUTE=1).test_client()
+    client.post('/api/farmer/register', json={'pan_card': 'ABCDE1234F', 'password': 'right',
+                                              'first_name': 'Ravi', 'last_name': 'Kumar'})
+    login = {'pan_card': 'ABCDE1234F', 'password': 'wrong'}
+    assert [client.post('/api/farmer/login', json=login).status_code for _ in range(2)] == [401, 401]
+
+    response = client.post('/api/farmer/login', json={**login, 'password': 'right'})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
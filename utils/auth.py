@@ -1,45 +1,180 @@
 import os
+import uuid
+import logging
 import jwt
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
+from utils.jwks import ASYMMETRIC_ALGORITHMS, KeySet
+from utils.log import active_request
 
 load_dotenv()
 
+# Token failures can be very frequent (expired sessions, scanners); this logger is sampled
+logger = logging.getLogger(__name__)
+
+# Placeholder secret used when JWT_SECRET_KEY is unset; anyone can sign with it
+DEFAULT_SECRET = 'default-secret-key'
+
+def parse_utc(value):
+    """ISO 8601 date/time (or datetime) as a naive UTC datetime; None stays None"""
+    if value in (None, ''):
+        return None
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _remember_caller(verified, payload):
+    """Expose the verified caller to request logging, and keep the payload for the rest of the request"""
+    context = active_request()
+    if context:
+        g = context[0]
+        g.user_id = payload.get('user_id')
+        g.user_type = payload.get('user_type')
+        g.verified_token = (verified, payload)
+
+def _already_verified(verified):
+    """Payload of a token this request has verified before (Idempotency-Key checks run before the view)"""
+    context = active_request()
+    if context:
+        cached = context[0].get('verified_token')
+        if cached and cached[0] == verified:
+            return cached[1]
+    return None
+
 class AuthUtils:
-    def __init__(self):
-        self.secret_key = os.getenv('JWT_SECRET_KEY', 'default-secret-key')
-        self.algorithm = os.getenv('JWT_ALGORITHM', 'HS256')
+    def __init__(self, secret_key=None, algorithm=None, access_ttl=None, refresh_ttl=None, keyset=None,
+                 accept_hmac_until=None):
+        self.secret_key = secret_key or os.getenv('JWT_SECRET_KEY', DEFAULT_SECRET)
+        self.algorithm = algorithm or os.getenv('JWT_ALGORITHM', 'HS256')
+        # Lifetimes in seconds: access tokens are short-lived, refresh tokens get new ones
+        self.access_ttl = int(access_ttl or os.getenv('ACCESS_TOKEN_TTL', 900))
+        self.refresh_ttl = int(refresh_ttl or os.getenv('REFRESH_TOKEN_TTL', 7 * 24 * 3600))
+        # With RS256/ES256/EdDSA, HS256 tokens issued before the switch are accepted only until this time (UTC)
+        self.accept_hmac_until = parse_utc(accept_hmac_until if accept_hmac_until is not None
+                                           else os.getenv('JWT_ACCEPT_HS256_UNTIL'))
+        self._keyset = keyset
+        if self.secret_key == DEFAULT_SECRET and not self.asymmetric:
+            logger.warning("JWT_SECRET_KEY is not set: tokens are signed with a public placeholder secret")
+    
+    @property
+    def asymmetric(self):
+        return self.algorithm in ASYMMETRIC_ALGORITHMS
+    
+    @property
+    def has_secret(self):
+        """Whether a real JWT_SECRET_KEY is configured (not the public placeholder)"""
+        return bool(self.secret_key) and self.secret_key != DEFAULT_SECRET
+    
+    def accepts_hmac(self):
+        """Whether HS256 tokens verify: always in HS256 mode; with asymmetric signing only inside the
+        JWT_ACCEPT_HS256_UNTIL window, and never with the placeholder secret"""
+        if not self.asymmetric:
+            return True
+        return (self.has_secret and self.accept_hmac_until is not None
+                and datetime.utcnow() < self.accept_hmac_until)
+    
+    @property
+    def keyset(self):
+        """Signing and verification keys (built from the environment on first use if not given)"""
+        if self._keyset is None:
+            self._keyset = KeySet.from_config(os.environ)
+        return self._keyset
+    
+    def _encode(self, payload):
+        if self.asymmetric:
+            kid, algorithm, key = self.keyset.signing_key()
+            return jwt.encode(payload, key, algorithm=algorithm, headers={'kid': kid})
+        return jwt.encode(payload, self.secret_key, algorithm=self.algorithm)
     
-    def generate_token(self, user_data):
-        """Generate JWT token for user"""
+    def _decode(self, token):
+        """Verify a token with the key its header names, never with an algorithm the key was not made for"""
+        header = jwt.get_unverified_header(token)
+        if header.get('alg') in ASYMMETRIC_ALGORITHMS:
+            key = self.keyset.verification_key(header.get('kid'))
+            if key is None:
+                raise jwt.InvalidTokenError(f"Unknown signing key {header.get('kid')!r}")
+            algorithm, public_key = key
+            return jwt.decode(token, public_key, algorithms=[algorithm])
+        
+        if not self.accepts_hmac():
+            raise jwt.InvalidTokenError("HMAC-signed tokens are not accepted")
+        return jwt.decode(token, self.secret_key, algorithms=['HS256' if self.asymmetric else self.algorithm])
+    
+    def generate_token(self, user_data, user_type=None):
+        """Generate a short-lived access token with the caller's role as a claim
+        
+        user_type must come from the collection the account was loaded from
+        (farmer, admin or user), never from the document itself, which users can edit.
+        """
         try:
+            now = datetime.utcnow()
             payload = {
+                'type': 'access',
                 'user_id': user_data.get('_id'),
                 'email': user_data.get('email'),
-                'exp': datetime.utcnow() + timedelta(days=7),  # Token expires in 7 days
-                'iat': datetime.utcnow()
+                'exp': now + timedelta(seconds=self.access_ttl),
+                'iat': now
             }
+            if user_type:
+                payload['user_type'] = user_type
             
-            token = jwt.encode(payload, self.secret_key, algorithm=self.algorithm)
+            token = self._encode(payload)
             return token
             
         except Exception as e:
-            print(f"Error generating token: {e}")
+            logger.exception("Error generating token")
+            return None
+    
+    def generate_refresh_token(self, user_data, user_type=None):
+        """Generate a long-lived token that can only be exchanged for new access tokens"""
+        try:
+            now = datetime.utcnow()
+            payload = {
+                'type': 'refresh',
+                'user_id': user_data.get('_id'),
+                'user_type': user_type,
+                'jti': uuid.uuid4().hex,
+                'exp': now + timedelta(seconds=self.refresh_ttl),
+                'iat': now
+            }
+            return self._encode(payload)
+        except Exception as e:
+            logger.exception("Error generating refresh token")
             return None
     
-    def verify_token(self, token):
-        """Verify JWT token"""
+    def generate_token_pair(self, user_data, user_type=None):
+        """Access and refresh token for a login response"""
+        return {
+            'token': self.generate_token(user_data, user_type),
+            'refresh_token': self.generate_refresh_token(user_data, user_type),
+            'token_type': 'Bearer',
+            'expires_in': self.access_ttl
+        }
+    
+    def verify_token(self, token, token_type='access'):
+        """Verify JWT token (once per request: later calls with the same token reuse the payload)"""
+        verified = (id(self), token, token_type)
+        payload = _already_verified(verified)
+        if payload is not None:
+            return payload
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+            payload = self._decode(token)
+            # Tokens issued before refresh tokens existed have no type and act as access tokens
+            if payload.get('type', 'access') != token_type:
+                logger.warning("Invalid token: expected token type %s", token_type)
+                return None
+            _remember_caller(verified, payload)
             return payload
         except jwt.ExpiredSignatureError:
-            print("Token has expired")
+            logger.info("Token has expired")
             return None
         except jwt.InvalidTokenError as e:
-            print(f"Invalid token: {e}")
+            logger.warning("Invalid token: %s", e)
             return None
         except Exception as e:
-            print(f"Error verifying token: {e}")
+            logger.error("Error verifying token: %s", e)
             return None
     
     def decode_token(self, token):
@@ -47,7 +182,7 @@ class AuthUtils:
         try:
             return jwt.decode(token, options={"verify_signature": False})
         except Exception as e:
-            print(f"Error decoding token: {e}")
+            logger.warning("Error decoding token: %s", e)
             return None
 
 # Create a global auth utils instance
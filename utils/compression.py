@@ -0,0 +1,182 @@
+import zlib
+import logging
+import threading
+from functools import wraps
+from weakref import WeakKeyDictionary
+from flask import current_app, request
+from utils.metrics import RESPONSE_BYTES
+
+logger = logging.getLogger(__name__)
+
+# Brotli and Zstandard are optional; without them only gzip is offered
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Only text-like bodies shrink meaningfully; images and archives are already compressed
+COMPRESSIBLE_TYPES = ('application/json', 'application/javascript', 'application/xml', 'image/svg+xml')
+
+# Per-request levels favour speed; bodies compressed once (see precompressed) use the maximum
+DYNAMIC_LEVELS = {'zstd': 3, 'br': 4, 'gzip': 6}
+STATIC_LEVELS = {'zstd': 19, 'br': 11, 'gzip': 9}
+
+class _BrotliCompressor:
+    """brotli.Compressor with the compress/flush interface of zlib compress objects"""
+
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.finish()
+
+def compressor(encoding, level):
+    """New streaming compressor (compress(data) / flush()) for a content coding"""
+    if encoding == 'gzip':
+        return zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    if encoding == 'br' and brotli is not None:
+        return _BrotliCompressor(level)
+    if encoding == 'zstd' and zstandard is not None:
+        return zstandard.ZstdCompressor(level=level).compressobj()
+    raise ValueError(f"Unsupported content coding {encoding}")
+
+def compress(data, encoding, level):
+    """Compress a whole body in one go"""
+    codec = compressor(encoding, level)
+    return codec.compress(data) + codec.flush()
+
+def available_encodings(preference=('zstd', 'br', 'gzip')):
+    """Content codings from a preference list whose libraries are installed"""
+    installed = {'gzip': True, 'br': brotli is not None, 'zstd': zstandard is not None}
+    return tuple(encoding for encoding in preference if installed.get(encoding))
+
+def is_compressible(response):
+    mimetype = response.mimetype or ''
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES
+
+def negotiate(encodings):
+    """Best coding the client accepts (by its q-values, ties broken by our preference), or None"""
+    return request.accept_encodings.best_match(encodings)
+
+def _compress_stream(chunks, encoding, level):
+    """Compress a streamed body chunk by chunk, never holding more than the compressor's window"""
+    codec = compressor(encoding, level)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = codec.compress(chunk)
+            if data:
+                yield data
+        yield codec.flush()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+def _mark_encoded(response, encoding):
+    response.headers['Content-Encoding'] = encoding
+    # A strong ETag names exact bytes, so each coding needs its own
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f'{etag}-{encoding}')
+
+def precompressed(view):
+    """Serve a constant response from a per-app cache, compressed once per coding at the highest level"""
+    caches = WeakKeyDictionary()
+    lock = threading.Lock()
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        app = current_app._get_current_object()
+        cache = caches.get(app)
+        if cache is None:
+            response = current_app.make_response(view(*args, **kwargs))
+            cache = {'status': response.status_code, 'mimetype': response.mimetype,
+                     'identity': response.get_data(), 'encoded': {}}
+            with lock:
+                cache = caches.setdefault(app, cache)
+
+        settings = current_app.extensions.get('taxerpay_compression')
+        body, encoding = cache['identity'], None
+        best = negotiate(settings['encodings']) if settings else None
+        if best:
+            # Every coding the client rates as highly as its best is fine; send whichever came out smallest
+            quality = request.accept_encodings[best]
+            for candidate in settings['encodings']:
+                if request.accept_encodings[candidate] != quality:
+                    continue
+                encoded = cache['encoded'].get(candidate)
+                if encoded is None:
+                    encoded = compress(cache['identity'], candidate, STATIC_LEVELS[candidate])
+                    cache['encoded'][candidate] = encoded
+                # No size threshold here: the work is done once, so any saving is worth sending
+                if len(encoded) < len(body):
+                    body, encoding = encoded, candidate
+
+        response = current_app.response_class(body, status=cache['status'], mimetype=cache['mimetype'])
+        response.vary.add('Accept-Encoding')
+        if encoding:
+            _mark_encoded(response, encoding)
+        return response
+
+    return wrapper
+
+def init_compression(app):
+    """Compress JSON/text responses with the best coding the client accepts (gzip, brotli, zstd)"""
+    if not app.config.get('COMPRESSION_ENABLED', True):
+        return None
+
+    preference = [e.strip() for e in str(app.config.get('COMPRESSION_ENCODINGS', 'zstd,br,gzip')).split(',')]
+    settings = {
+        'encodings': available_encodings([e for e in preference if e]),
+        'min_size': int(app.config.get('COMPRESSION_MIN_SIZE', 1024))
+    }
+    app.extensions['taxerpay_compression'] = settings
+    if not settings['encodings']:
+        return settings
+
+    @app.after_request
+    def compress_response(response):
+        if (request.method == 'HEAD' or response.status_code < 200 or response.status_code in (204, 304)
+                or response.direct_passthrough or 'Content-Encoding' in response.headers
+                or not is_compressible(response)):
+            return response
+
+        # Caches must key on Accept-Encoding even when this client gets the identity body
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate(settings['encodings'])
+        if not encoding:
+            return response
+
+        try:
+            if response.is_streamed:
+                # Length is unknown up front, so stream compressed chunks without Content-Length
+                response.response = _compress_stream(response.response, encoding, DYNAMIC_LEVELS[encoding])
+                response.headers.pop('Content-Length', None)
+                _mark_encoded(response, encoding)
+                return response
+
+            body = response.get_data()
+            if len(body) < settings['min_size']:
+                return response
+            encoded = compress(body, encoding, DYNAMIC_LEVELS[encoding])
+            if len(encoded) >= len(body):
+                return response
+            response.set_data(encoded)
+            _mark_encoded(response, encoding)
+            RESPONSE_BYTES.labels(encoding, 'identity').inc(len(body))
+            RESPONSE_BYTES.labels(encoding, 'encoded').inc(len(encoded))
+        except Exception as e:
+            # Fall back to the uncompressed body rather than failing the request
+            logger.warning("Response compression with %s failed: %s", encoding, e)
+        return response
+
+    return settings
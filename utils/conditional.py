@@ -0,0 +1,39 @@
+import hashlib
+from datetime import datetime, timezone
+
+# Clients must revalidate every time, but may keep the body and send its validators back
+CACHE_CONTROL = 'private, no-cache'
+
+def document_etag(*parts):
+    """Weak ETag value for a representation identified by parts such as (id, updated_at, count)"""
+    # Weak because the same version may go out with different bytes (compression, key order)
+    key = '|'.join('' if part is None else str(part) for part in parts)
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+
+def http_datetime(value):
+    """Aware UTC datetime at the one-second precision of Last-Modified, or None"""
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        # Timestamps are stored with datetime.utcnow()
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+def is_not_modified(req, etag, last_modified=None):
+    """True if the request's If-None-Match / If-Modified-Since show the client already has this version"""
+    # If-None-Match wins when both are sent (RFC 9110 13.2.2)
+    if req.if_none_match:
+        return req.if_none_match.contains_weak(etag)
+    last_modified = http_datetime(last_modified)
+    if last_modified is not None and req.if_modified_since is not None:
+        return last_modified <= req.if_modified_since
+    return False
+
+def set_validators(response, etag, last_modified=None):
+    """Attach ETag, Last-Modified and Cache-Control to a 200 or 304 response"""
+    response.set_etag(etag, weak=True)
+    last_modified = http_datetime(last_modified)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
@@ -0,0 +1,210 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from bson import ObjectId
+from pymongo import ASCENDING
+from jinja2 import Environment
+from models.payment import present, to_rupees
+from utils.pdf import can_encode, text_pdf
+from utils.tax import calculate_tax_amount
+
+logger = logging.getLogger(__name__)
+
+# Bump when a template or the PDF layout changes, so cached documents are rendered again
+RENDER_VERSION = 1
+
+KINDS = ('receipt', 'statement')
+FORMATS = {'pdf': 'application/pdf', 'html': 'text/html'}
+
+# Ledger entries shown on one annual statement
+STATEMENT_MAX_ENTRIES = 1000
+
+def _money(amount):
+    return f'Rs. {float(amount or 0):,.2f}'
+
+def _date(value):
+    return value.strftime('%d %b %Y') if hasattr(value, 'strftime') else str(value or '')
+
+def _farmer(farmer):
+    return {
+        'farmer_id': str(farmer['_id']),
+        'name': f"{farmer.get('first_name', '')} {farmer.get('last_name', '')}".strip(),
+        'pan_card': farmer.get('pan_card', ''),
+        'phone': farmer.get('phone', '')
+    }
+
+def _record(record):
+    income, deductions = float(record.get('income') or 0), float(record.get('deductions') or 0)
+    taxable = max(income - deductions, 0)
+    calculated_tax = record.get('calculated_tax')
+    if calculated_tax is None:
+        calculated_tax = calculate_tax_amount(taxable, record.get('tax_type', 'federal'))['calculated_tax']
+    return {
+        'record_id': str(record['_id']),
+        'tax_year': record.get('tax_year'),
+        'tax_type': record.get('tax_type', ''),
+        'income': income,
+        'deductions': deductions,
+        'taxable_income': taxable,
+        'calculated_tax': float(calculated_tax),
+        'filed_on': _date(record.get('created_at'))
+    }
+
+def receipt_source(services, farmer_id, record_id):
+    """Everything a tax record receipt shows, or None if the farmer has no such record"""
+    if not ObjectId.is_valid(record_id):
+        return None
+    record = services.tax_record_model.collection.find_one({'_id': ObjectId(record_id), 'user_id': farmer_id})
+    farmer = record and services.farmer_model.collection.find_one({'_id': ObjectId(farmer_id)}, {'password': 0})
+    if not farmer:
+        return None
+    return {'farmer': _farmer(farmer), 'record': _record(record)}
+
+def statement_source(services, farmer_id, tax_year):
+    """Everything a farmer's annual statement shows: tax records, ledger entries and the balance"""
+    farmer = services.farmer_model.collection.find_one({'_id': ObjectId(farmer_id)}, {'password': 0})
+    if not farmer:
+        return None
+    # Tax years arrive from JSON bodies as numbers or strings
+    records = services.tax_record_model.collection.find(
+        {'user_id': farmer_id, 'tax_year': {'$in': [tax_year, str(tax_year)]}}).sort('created_at', ASCENDING)
+    payments = services.payment_model
+    entries = payments.ledger.find({'farmer_id': farmer_id, 'tax_year': tax_year}).sort('_id', ASCENDING)
+    balance = payments.balances.find_one({'_id': f'{farmer_id}:{tax_year}'}) or {}
+    return {
+        'farmer': _farmer(farmer),
+        'tax_year': tax_year,
+        'records': [_record(record) for record in records],
+        'entries': [{
+            'date': _date(entry['created_at']),
+            'type': entry['type'],
+            'amount': to_rupees(entry['amount_paise']),
+            'balance_after': to_rupees(entry.get('balance_after_paise', 0)),
+            'details': entry.get('note') or entry.get('reference') or entry.get('method') or ''
+        } for entry in entries.limit(STATEMENT_MAX_ENTRIES)],
+        'balance': {key: present(balance).get(key, 0) for key in ('assessed', 'paid', 'balance')}
+    }
+
+def load_source(services, kind, farmer_id, params):
+    """Source data of a document: receipt params {record_id}, statement params {tax_year}"""
+    if kind == 'receipt':
+        return receipt_source(services, farmer_id, params['record_id'])
+    return statement_source(services, farmer_id, int(params['tax_year']))
+
+def content_hash(kind, file_format, source):
+    """Address of a rendered document: same data, template version and format give the same file"""
+    canonical = json.dumps([RENDER_VERSION, kind, file_format, source], sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def cache_path(cache_dir, digest, file_format):
+    # Two-character fan-out keeps directories small
+    return os.path.join(cache_dir, digest[:2], f'{digest}.{file_format}')
+
+def download_name(kind, file_format, source):
+    if kind == 'receipt':
+        return f"receipt-{source['record']['record_id']}.{file_format}"
+    return f"statement-{source['tax_year']}-{source['farmer']['pan_card'] or source['farmer']['farmer_id']}.{file_format}"
+
+_env = Environment(autoescape=True)
+_env.filters['money'] = _money
+
+_HTML = {
+    'receipt': _env.from_string('''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Tax receipt {{ record.record_id }}</title>
+<style>body{font-family:sans-serif;max-width:40em;margin:2em auto}td{padding:.2em 1em}td+td{text-align:right}</style>
+</head><body>
+<h1>TaxerPay tax receipt</h1>
+<p>{{ farmer.name }}<br>PAN {{ farmer.pan_card }}</p>
+<table>
+<tr><td>Receipt</td><td>{{ record.record_id }}</td></tr>
+<tr><td>Tax year</td><td>{{ record.tax_year }}</td></tr>
+<tr><td>Tax type</td><td>{{ record.tax_type }}</td></tr>
+<tr><td>Filed on</td><td>{{ record.filed_on }}</td></tr>
+<tr><td>Income</td><td>{{ record.income|money }}</td></tr>
+<tr><td>Deductions</td><td>{{ record.deductions|money }}</td></tr>
+<tr><td>Taxable income</td><td>{{ record.taxable_income|money }}</td></tr>
+<tr><th>Tax</th><th>{{ record.calculated_tax|money }}</th></tr>
+</table>
+</body></html>
+'''),
+    'statement': _env.from_string('''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Tax statement {{ tax_year }}</title>
+<style>body{font-family:sans-serif;max-width:50em;margin:2em auto}td,th{padding:.2em 1em;text-align:left}</style>
+</head><body>
+<h1>TaxerPay annual statement {{ tax_year }}</h1>
+<p>{{ farmer.name }}<br>PAN {{ farmer.pan_card }}</p>
+<h2>Tax records</h2>
+<table>
+<tr><th>Filed on</th><th>Type</th><th>Income</th><th>Deductions</th><th>Tax</th></tr>
+{% for record in records %}<tr><td>{{ record.filed_on }}</td><td>{{ record.tax_type }}</td><td>{{ record.income|money }}</td><td>{{ record.deductions|money }}</td><td>{{ record.calculated_tax|money }}</td></tr>
+{% else %}<tr><td colspan="5">No tax records</td></tr>
+{% endfor %}</table>
+<h2>Assessments and payments</h2>
+<table>
+<tr><th>Date</th><th>Entry</th><th>Details</th><th>Amount</th><th>Balance</th></tr>
+{% for entry in entries %}<tr><td>{{ entry.date }}</td><td>{{ entry.type }}</td><td>{{ entry.details }}</td><td>{{ entry.amount|money }}</td><td>{{ entry.balance_after|money }}</td></tr>
+{% else %}<tr><td colspan="5">No ledger entries</td></tr>
+{% endfor %}</table>
+<p>Assessed {{ balance.assessed|money }} &middot; Paid {{ balance.paid|money }} &middot; <strong>Outstanding {{ balance.balance|money }}</strong></p>
+</body></html>
+''')
+}
+
+def _pdf_lines(kind, source):
+    farmer = source['farmer']
+    if kind == 'receipt':
+        record = source['record']
+        yield 'title', 'TaxerPay tax receipt'
+        yield 'body', f"{farmer['name']}, PAN {farmer['pan_card']}"
+        yield 'body', ''
+        for label, value in (('Receipt', record['record_id']), ('Tax year', record['tax_year']),
+                             ('Tax type', record['tax_type']), ('Filed on', record['filed_on']),
+                             ('Income', _money(record['income'])), ('Deductions', _money(record['deductions'])),
+                             ('Taxable income', _money(record['taxable_income']))):
+            yield 'body', f'{label}: {value}'
+        yield 'bold', f"Tax: {_money(record['calculated_tax'])}"
+        return
+
+    yield 'title', f"TaxerPay annual statement {source['tax_year']}"
+    yield 'body', f"{farmer['name']}, PAN {farmer['pan_card']}"
+    yield 'body', ''
+    yield 'bold', 'Tax records'
+    for record in source['records']:
+        yield 'body', (f"{record['filed_on']}  {record['tax_type']}  income {_money(record['income'])}  "
+                       f"deductions {_money(record['deductions'])}  tax {_money(record['calculated_tax'])}")
+    if not source['records']:
+        yield 'body', 'No tax records'
+    yield 'body', ''
+    yield 'bold', 'Assessments and payments'
+    for entry in source['entries']:
+        yield 'body', (f"{entry['date']}  {entry['type']}  {_money(entry['amount'])}  "
+                       f"balance {_money(entry['balance_after'])}  {entry['details']}")
+    if not source['entries']:
+        yield 'body', 'No ledger entries'
+    yield 'body', ''
+    balance = source['balance']
+    yield 'bold', (f"Assessed {_money(balance['assessed'])}   Paid {_money(balance['paid'])}   "
+                   f"Outstanding {_money(balance['balance'])}")
+
+def pdf_can_render(kind, source):
+    """Whether every line of the PDF version can be shown by its built-in fonts (Windows-1252 only)"""
+    return all(can_encode(text) for _, text in _pdf_lines(kind, source))
+
+def render(kind, file_format, source):
+    """Rendered document bytes"""
+    if file_format == 'html':
+        return _HTML[kind].render(**source).encode('utf-8')
+    title = 'Tax receipt' if kind == 'receipt' else f"Tax statement {source['tax_year']}"
+    return text_pdf(_pdf_lines(kind, source), title=title)
+
+def store(cache_dir, digest, file_format, content):
+    """Write a rendered document under its content address; a concurrent writer of the same file is harmless"""
+    path = cache_path(cache_dir, digest, file_format)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = f'{path}.{os.getpid()}-{threading.get_ident()}.part'
+    with open(partial, 'wb') as f:
+        f.write(content)
+    os.replace(partial, path)
+    return path
@@ -0,0 +1,218 @@
+import re
+import csv
+import json
+import codecs
+import logging
+import shutil
+import tempfile
+from pymongo.errors import BulkWriteError
+from utils.passwords import hash_passwords
+
+logger = logging.getLogger(__name__)
+
+# Excel uploads need the optional openpyxl package; CSV always works
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+XLSX_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+# Excel bodies sent without multipart are copied to a temporary file, in memory up to this many bytes
+SPOOL_SIZE = 1024 * 1024
+
+PAN_PATTERN = re.compile(r'^[A-Z]{5}[0-9]{4}[A-Z]$')
+REQUIRED_FIELDS = ('pan_card', 'password', 'first_name', 'last_name')
+TEXT_FIELDS = ('first_name', 'last_name', 'phone', 'email')
+# Nested documents arrive as JSON objects in one cell, the way export_farmers writes them
+DOCUMENT_FIELDS = ('address', 'land_details', 'bank_details')
+# Every column the import reads; anything else in the upload is ignored
+COLUMNS = REQUIRED_FIELDS + ('phone', 'email') + DOCUMENT_FIELDS
+
+CREATED, DUPLICATE, INVALID, FAILED = 'created', 'duplicate', 'invalid', 'failed'
+
+def _column(name):
+    return str(name or '').strip().lower().replace(' ', '_')
+
+def _cell(value):
+    # Excel hands back numbers for phone-like columns: 9876543210.0 -> '9876543210'
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def is_excel(filename='', content_type=''):
+    return (filename or '').lower().endswith('.xlsx') or content_type == XLSX_TYPE
+
+def _seekable(stream):
+    """The stream itself if it can seek, else a copy spooled to disk past SPOOL_SIZE
+
+    An .xlsx file is a zip archive, read from its end; a raw request body can only be read forwards.
+    """
+    try:
+        if stream.seekable():
+            return stream
+    except AttributeError:
+        pass
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    shutil.copyfileobj(stream, spooled)
+    spooled.seek(0)
+    return spooled
+
+def read_rows(stream, excel=False):
+    """(row number, row dict) pairs of an upload, read lazily
+
+    Checks the header straight away and raises ValueError for an unreadable file
+    or missing columns. Row numbers count the header as row 1, like a spreadsheet.
+    """
+    if excel:
+        if openpyxl is None:
+            raise ValueError('Excel uploads need the openpyxl package; upload a CSV file instead')
+        try:
+            workbook = openpyxl.load_workbook(_seekable(stream), read_only=True, data_only=True)
+        except Exception:
+            raise ValueError('Could not read the Excel file')
+        rows = workbook.active.iter_rows(values_only=True)
+    else:
+        workbook = None
+        # Decode line by line so the upload is never read into memory as a whole
+        rows = csv.reader(codecs.iterdecode(stream, 'utf-8-sig'))
+
+    header = [_column(name) for name in next(rows, None) or []]
+    missing = [field for field in REQUIRED_FIELDS if field not in header]
+    if missing:
+        if workbook is not None:
+            workbook.close()
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    return _rows(header, rows, workbook)
+
+def _rows(header, rows, workbook):
+    try:
+        for number, values in enumerate(rows, start=2):
+            values = [_cell(value) for value in values]
+            if not any(value.strip() for value in values):
+                continue
+            yield number, dict(zip(header, values))
+    finally:
+        if workbook is not None:
+            workbook.close()
+
+def validate_row(row):
+    """Farmer document for an upload row, plus the problems found with it"""
+    errors = [f'{field} is required' for field in REQUIRED_FIELDS if not (row.get(field) or '').strip()]
+    farmer = {'pan_card': (row.get('pan_card') or '').strip().upper(), 'password': row.get('password') or ''}
+    if farmer['pan_card'] and not PAN_PATTERN.match(farmer['pan_card']):
+        errors.append('pan_card must look like ABCDE1234F')
+    for field in TEXT_FIELDS:
+        farmer[field] = (row.get(field) or '').strip()
+    for field in DOCUMENT_FIELDS:
+        value = (row.get(field) or '').strip()
+        try:
+            farmer[field] = json.loads(value) if value else {}
+        except ValueError:
+            farmer[field] = None
+        if not isinstance(farmer[field], dict):
+            errors.append(f'{field} must be a JSON object')
+    return farmer, errors
+
+class FarmerImport:
+    """Registers the farmers of an upload in two steps and keeps a per-row report
+
+    stage() runs in the upload request and checks each row as it is read: invalid
+    rows and PAN cards repeated within the file are reported straight away, and
+    only the remaining rows are kept. run() is the import_farmers job: per chunk
+    it makes one $in query for PAN cards that are already registered, runs bcrypt
+    on a thread pool and calls insert_many once.
+    """
+
+    def __init__(self, farmer_model, chunk_size=500, max_rows=5000, hash_threads=None):
+        self.farmer_model = farmer_model
+        self.chunk_size = chunk_size
+        self.max_rows = max_rows
+        self.hash_threads = hash_threads
+        self.results = []
+        self.truncated = False
+
+    def stage(self, rows):
+        """Validate an upload's (row number, row) pairs, up to max_rows; returns what the job needs
+
+        {'results': reports of rejected rows, 'farmers': [row number, farmer] pairs
+        to register, 'truncated': bool}. The farmers still hold their passwords, so
+        this goes in the job's (encrypted) secret parameters. Errors reading the
+        upload (ValueError, csv.Error, UnicodeDecodeError) propagate.
+        """
+        farmers, seen, count = [], set(), 0
+        for number, row in rows:
+            if count >= self.max_rows:
+                self.truncated = True
+                break
+            count += 1
+            farmer, errors = validate_row(row)
+            result = {'row': number, 'pan_card': farmer['pan_card']}
+            if errors:
+                self.results.append({**result, 'status': INVALID, 'errors': errors})
+            elif farmer['pan_card'] in seen:
+                self.results.append({**result, 'status': DUPLICATE, 'errors': ['pan_card appears earlier in this file']})
+            else:
+                seen.add(farmer['pan_card'])
+                farmers.append([number, farmer])
+        return {'results': self.results, 'farmers': farmers, 'truncated': self.truncated}
+
+    def run(self, staged, progress=None):
+        """Register the farmers stage() accepted; returns the report for every row of the upload
+
+        progress, if given, is called with the number of rows done after each chunk.
+        """
+        self.results = list(staged.get('results') or [])
+        self.truncated = bool(staged.get('truncated'))
+        farmers = staged.get('farmers') or []
+        for start in range(0, len(farmers), self.chunk_size):
+            self._import_chunk(farmers[start:start + self.chunk_size])
+            if progress:
+                progress(len(self.results))
+        return self.report()
+
+    def report(self):
+        results = sorted(self.results, key=lambda result: result['row'])
+        summary = {'rows': len(results), 'truncated': self.truncated}
+        for status in (CREATED, DUPLICATE, INVALID, FAILED):
+            summary[status] = sum(1 for result in results if result['status'] == status)
+        return {'summary': summary, 'results': results}
+
+    def _import_chunk(self, chunk):
+        results, pending = [], []
+        existing = self.farmer_model.existing_pans(farmer['pan_card'] for _, farmer in chunk)
+        for number, farmer in chunk:
+            result = {'row': number, 'pan_card': farmer['pan_card']}
+            results.append(result)
+            if farmer['pan_card'] in existing:
+                result.update(status=DUPLICATE, errors=['Farmer with this PAN card already exists'])
+            else:
+                pending.append((result, farmer))
+
+        if pending:
+            hashes = hash_passwords((farmer['password'] for _, farmer in pending), self.hash_threads)
+            for (_, farmer), hashed in zip(pending, hashes):
+                farmer['password'] = hashed
+            self._insert(pending)
+
+        self.results.extend(results)
+    def _insert(self, pending):
+        farmers = [farmer for _, farmer in pending]
+        failed = {}
+        try:
+            self.farmer_model.create_farmers(farmers)
+        except BulkWriteError as e:
+            # Unordered insert: every document without a write error was stored
+            failed = {error['index']: error.get('errmsg', 'Could not be saved')
+                      for error in e.details.get('writeErrors', [])}
+        except Exception as e:
+            logger.error("Error inserting imported farmers: %s", e)
+            failed = {index: 'Could not be saved' for index in range(len(farmers))}
+
+        for index, (result, farmer) in enumerate(pending):
+            if index in failed:
+                result.update(status=FAILED, errors=[failed[index]])
+            else:
+                # insert_many assigns the ids client-side
+                result.update(status=CREATED, farmer_id=str(farmer['_id']))
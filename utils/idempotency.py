@@ -0,0 +1,267 @@
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, jsonify, request
+from pymongo.errors import DuplicateKeyError
+from utils.services import get_services
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+class IdempotencyStore:
+    """Idempotency keys and the responses they produced, in a TTL'd MongoDB collection
+
+    The key document's _id is (scope, caller, key), so the unique _id index turns
+    concurrent retries into a single claim. The first request inserts the claim,
+    runs, and stores its response; replays read that response back.
+    """
+
+    def __init__(self, database, ttl=86400, lock_timeout=30, collection_name='idempotency_keys'):
+        self.database = database
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.collection_name = collection_name
+        self._indexed = False
+
+    @property
+    def collection(self):
+        collection = self.database.get_collection(self.collection_name)
+        if not self._indexed:
+            # Keys (and their stored responses) disappear once clients stop retrying
+            collection.create_index('expires_at', expireAfterSeconds=0)
+            self._indexed = True
+        return collection
+
+    def _claim_document(self, key_id, fingerprint, now):
+        return {
+            '_id': key_id,
+            'fingerprint': fingerprint,
+            'status': 'in_progress',
+            'locked_until': now + timedelta(seconds=self.lock_timeout),
+            'created_at': now,
+            'expires_at': now + timedelta(seconds=self.ttl)
+        }
+
+    def _takeover(self, existing, fingerprint, now):
+        """(filter, update) taking over a stale claim by the same request, or None if it can't be taken"""
+        if existing['status'] == 'in_progress' and existing['fingerprint'] == fingerprint and existing['locked_until'] < now:
+            return (
+                {'_id': existing['_id'], 'status': 'in_progress', 'locked_until': existing['locked_until']},
+                {'$set': {'locked_until': now + timedelta(seconds=self.lock_timeout)}}
+            )
+        return None
+
+    @staticmethod
+    def _completed(status, body, content_type):
+        return {
+            '$set': {
+                'status': 'completed',
+                'response': {'status': status, 'body': body, 'content_type': content_type},
+                'completed_at': datetime.utcnow()
+            },
+            '$unset': {'locked_until': ''}
+        }
+
+    def claim(self, key_id, fingerprint):
+        """Claim a key for this request; returns None if claimed, else the existing key document"""
+        now = datetime.utcnow()
+        try:
+            self.collection.insert_one(self._claim_document(key_id, fingerprint, now))
+            return None
+        except DuplicateKeyError:
+            existing = self.collection.find_one({'_id': key_id})
+
+        if existing is None:
+            # Expired between the insert and the read; the retry will claim it
+            return {'status': 'in_progress', 'fingerprint': fingerprint}
+        # Take over a claim whose request died without completing or releasing it
+        takeover = self._takeover(existing, fingerprint, now)
+        if takeover and self.collection.update_one(*takeover).modified_count:
+            return None
+        return existing
+
+    def complete(self, key_id, status, body, content_type):
+        """Store the response a claimed key produced"""
+        self.collection.update_one({'_id': key_id}, self._completed(status, body, content_type))
+
+    def release(self, key_id):
+        """Drop a claim whose request failed, so a retry can run it again"""
+        self.collection.delete_one({'_id': key_id, 'status': 'in_progress'})
+
+class AsyncIdempotencyStore(IdempotencyStore):
+    """IdempotencyStore for the Quart app, on a Motor database (same collection and documents)"""
+
+    async def _collection(self):
+        collection = self.database.get_collection(self.collection_name)
+        if not self._indexed:
+            await collection.create_index('expires_at', expireAfterSeconds=0)
+            self._indexed = True
+        return collection
+
+    async def claim(self, key_id, fingerprint):
+        now = datetime.utcnow()
+        collection = await self._collection()
+        try:
+            await collection.insert_one(self._claim_document(key_id, fingerprint, now))
+            return None
+        except DuplicateKeyError:
+            existing = await collection.find_one({'_id': key_id})
+
+        if existing is None:
+            return {'status': 'in_progress', 'fingerprint': fingerprint}
+        takeover = self._takeover(existing, fingerprint, now)
+        if takeover and (await collection.update_one(*takeover)).modified_count:
+            return None
+        return existing
+
+    async def complete(self, key_id, status, body, content_type):
+        collection = await self._collection()
+        await collection.update_one({'_id': key_id}, self._completed(status, body, content_type))
+
+    async def release(self, key_id):
+        collection = await self._collection()
+        await collection.delete_one({'_id': key_id, 'status': 'in_progress'})
+
+def fingerprint(method, path, body):
+    """Hash of what the key promises to repeat: method, path and body"""
+    digest = hashlib.sha256()
+    digest.update(f'{method} {path}\n'.encode('utf-8'))
+    digest.update(body)
+    return digest.hexdigest()
+
+def request_fingerprint():
+    return fingerprint(request.method, request.path, request.get_data(cache=True))
+
+def _key_id(scope, req, auth_utils):
+    """(key_id, None) to deduplicate, (None, None) to run the view as usual, or (None, error)"""
+    key = req.headers.get(HEADER)
+    if not key:
+        return None, None
+    if len(key) > MAX_KEY_LENGTH:
+        return None, (f'{HEADER} must be at most {MAX_KEY_LENGTH} characters', 400)
+    auth_header = req.headers.get('Authorization', '')
+    payload = auth_utils.verify_token(auth_header[7:]) if auth_header.startswith('Bearer ') else None
+    if not payload:
+        # The view answers 401 itself
+        return None, None
+    return f"{scope}:{payload['user_id']}:{key}", None
+
+def _claim_error(existing, request_hash):
+    """Error for a key claimed by another request, or None when its stored response can be replayed"""
+    if existing.get('fingerprint') != request_hash:
+        return f'{HEADER} was already used for a different request', 422
+    if existing.get('status') != 'completed':
+        return 'A request with this Idempotency-Key is still being processed', 409
+    return None
+
+def _error(message, status, make_json=jsonify):
+    response = make_json({'success': False, 'error': message})
+    if status == 409:
+        response.headers['Retry-After'] = '1'
+    return response, status
+
+def _replay(response_class, stored):
+    response = response_class(stored['body'], status=stored['status'], content_type=stored['content_type'])
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def idempotent(scope):
+    """Honour an Idempotency-Key header on a POST route: run it once per key, replay the stored response after
+
+    Keys are per authenticated caller; requests without a key, or without a valid
+    token (the view answers 401), run as before. Only 2xx responses are stored;
+    on errors the claim is released so the client can retry with the same key.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            services = get_services()
+            key_id, error = _key_id(scope, request, services.auth_utils)
+            if error:
+                return _error(*error)
+            if not key_id:
+                return view(*args, **kwargs)
+
+            store = services.idempotency
+            request_hash = request_fingerprint()
+            try:
+                existing = store.claim(key_id, request_hash)
+            except Exception as e:
+                # Without the key store a retry could not be recognised, so do not run the write
+                logger.error("Idempotency key store unavailable: %s", e)
+                return _error('Service temporarily unavailable, please retry', 503)
+
+            if existing is not None:
+                error = _claim_error(existing, request_hash)
+                if error:
+                    return _error(*error)
+                return _replay(current_app.response_class, existing['response'])
+
+            try:
+                response = current_app.make_response(view(*args, **kwargs))
+            except Exception:
+                store.release(key_id)
+                raise
+
+            try:
+                if 200 <= response.status_code < 300:
+                    store.complete(key_id, response.status_code, response.get_data(), response.content_type)
+                else:
+                    store.release(key_id)
+            except Exception as e:
+                # The write went through; a lost key only means a retry is not deduplicated
+                logger.error("Could not store idempotent response for %s: %s", scope, e)
+            return response
+
+        return wrapper
+    return decorator
+
+def async_idempotent(scope):
+    """idempotent() for the Quart app, whose key store is app.extensions['idempotency'] (see asgi.py)"""
+    from quart import current_app as quart_app, request as quart_request, jsonify as quart_jsonify
+    from utils.auth import auth_utils
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(*args, **kwargs):
+            key_id, error = _key_id(scope, quart_request, auth_utils)
+            if error:
+                return _error(*error, make_json=quart_jsonify)
+            if not key_id:
+                return await view(*args, **kwargs)
+
+            store = quart_app.extensions['idempotency']
+            request_hash = fingerprint(quart_request.method, quart_request.path, await quart_request.get_data())
+            try:
+                existing = await store.claim(key_id, request_hash)
+            except Exception as e:
+                logger.error("Idempotency key store unavailable: %s", e)
+                return _error('Service temporarily unavailable, please retry', 503, make_json=quart_jsonify)
+
+            if existing is not None:
+                error = _claim_error(existing, request_hash)
+                if error:
+                    return _error(*error, make_json=quart_jsonify)
+                return _replay(quart_app.response_class, existing['response'])
+
+            try:
+                response = await quart_app.make_response(await view(*args, **kwargs))
+            except Exception:
+                await store.release(key_id)
+                raise
+
+            try:
+                if 200 <= response.status_code < 300:
+                    await store.complete(key_id, response.status_code, await response.get_data(),
+                                         response.content_type)
+                else:
+                    await store.release(key_id)
+            except Exception as e:
+                logger.error("Could not store idempotent response for %s: %s", scope, e)
+            return response
+
+        return wrapper
+    return decorator
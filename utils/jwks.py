@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import logging
+import threading
+import urllib.request
+import jwt
+
+logger = logging.getLogger(__name__)
+
+# Algorithms signed with a private key and verified with the published public key
+ASYMMETRIC_ALGORITHMS = ('RS256', 'ES256', 'EdDSA')
+
+def _load_crypto():
+    """cryptography is only needed for asymmetric signing"""
+    try:
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+    except ImportError:
+        raise ValueError("Asymmetric JWT signing requires cryptography: pip install cryptography")
+    return serialization, ec, ed25519, rsa
+
+def key_algorithm(key):
+    """JWT algorithm for a private or public key object"""
+    _, ec, ed25519, rsa = _load_crypto()
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return 'RS256'
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)):
+        return 'ES256'
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return 'EdDSA'
+    raise ValueError(f"Unsupported key type {type(key).__name__}")
+
+def generate_private_key(algorithm='RS256'):
+    """New private key for an algorithm, as PEM bytes"""
+    serialization, ec, ed25519, rsa = _load_crypto()
+    if algorithm == 'RS256':
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    elif algorithm == 'ES256':
+        key = ec.generate_private_key(ec.SECP256R1())
+    elif algorithm == 'EdDSA':
+        key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        raise ValueError(f"Unsupported algorithm {algorithm}")
+    return key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+
+def public_jwk(kid, algorithm, public_key):
+    """JWK dict for a public key"""
+    jwk = jwt.get_algorithm_by_name(algorithm).to_jwk(public_key, as_dict=True)
+    jwk.update({'kid': kid, 'alg': algorithm, 'use': 'sig'})
+    return jwk
+
+class KeySet:
+    """Signing keys and a kid-indexed cache of verification keys
+
+    Signing nodes load PEM keys from a directory (one file per key, named <kid>.pem);
+    the active key signs, older ones stay published until tokens they signed expire.
+    Verify-only nodes load public keys from a JWKS URL, re-fetched when the cache
+    expires or a token names a kid that is not cached yet.
+    """
+
+    def __init__(self, keys_dir=None, active_kid=None, jwks_url=None, cache_ttl=300, min_refresh_interval=30):
+        self.keys_dir = keys_dir
+        self.active_kid = active_kid
+        self.jwks_url = jwks_url
+        self.cache_ttl = cache_ttl
+        self.min_refresh_interval = min_refresh_interval
+
+        self._private = {}
+        self._public = {}
+        self._remote = {}
+        self._fetched_at = None
+        self._lock = threading.Lock()
+
+        if keys_dir:
+            self._load_dir(keys_dir)
+
+    @classmethod
+    def from_config(cls, config):
+        """KeySet from JWT_* settings (an app config or os.environ)"""
+        return cls(
+            keys_dir=config.get('JWT_KEYS_DIR'),
+            active_kid=config.get('JWT_ACTIVE_KID'),
+            jwks_url=config.get('JWT_JWKS_URL'),
+            cache_ttl=float(config.get('JWKS_CACHE_TTL') or 300)
+        )
+
+    def _load_dir(self, keys_dir):
+        serialization, _, _, _ = _load_crypto()
+        for name in sorted(os.listdir(keys_dir)):
+            if not name.endswith('.pem'):
+                continue
+            with open(os.path.join(keys_dir, name), 'rb') as f:
+                data = f.read()
+            kid = name[:-len('.pem')]
+            if b'PRIVATE KEY' in data:
+                key = serialization.load_pem_private_key(data, password=None)
+                self._private[kid] = (key_algorithm(key), key)
+                key = key.public_key()
+            else:
+                key = serialization.load_pem_public_key(data)
+            self._public[kid] = (key_algorithm(key), key)
+
+        # Key ids are sortable (e.g. dates), so the newest private key signs unless one is pinned
+        if not self.active_kid and self._private:
+            self.active_kid = sorted(self._private)[-1]
+
+    def signing_key(self):
+        """(kid, algorithm, private key) used for new tokens"""
+        if self.active_kid not in self._private:
+            raise ValueError("No private JWT signing key available (set JWT_KEYS_DIR / JWT_ACTIVE_KID)")
+        algorithm, key = self._private[self.active_kid]
+        return self.active_kid, algorithm, key
+
+    def verification_key(self, kid):
+        """(algorithm, public key) for a kid, fetching the remote key set if it is unknown or stale"""
+        if kid in self._public:
+            return self._public[kid]
+        if self.jwks_url:
+            stale = self._fetched_at is None or time.monotonic() - self._fetched_at > self.cache_ttl
+            if kid not in self._remote or stale:
+                self._refresh(force=kid not in self._remote)
+            return self._remote.get(kid)
+        return None
+
+    def _refresh(self, force=False):
+        """Re-fetch the remote JWKS (at most once per min_refresh_interval for unknown kids)"""
+        with self._lock:
+            now = time.monotonic()
+            if self._fetched_at is not None:
+                age = now - self._fetched_at
+                if age < self.min_refresh_interval or (not force and age <= self.cache_ttl):
+                    return
+            try:
+                with urllib.request.urlopen(self.jwks_url, timeout=5) as response:
+                    document = json.load(response)
+                keys = {}
+                for jwk in document.get('keys', []):
+                    if jwk.get('use', 'sig') != 'sig' or 'kid' not in jwk:
+                        continue
+                    parsed = jwt.PyJWK(jwk)
+                    keys[jwk['kid']] = (jwk.get('alg') or key_algorithm(parsed.key), parsed.key)
+                self._remote = keys
+            except Exception as e:
+                # Keep serving the cached keys; tokens with unknown kids fail until the next fetch
+                logger.warning("Could not fetch JWKS from %s: %s", self.jwks_url, e)
+            self._fetched_at = now
+
+    def jwks(self):
+        """Public keys of this node in JWKS format"""
+        return {'keys': [public_jwk(kid, algorithm, key) for kid, (algorithm, key) in sorted(self._public.items())]}
@@ -0,0 +1,222 @@
+import sys
+import copy
+import json
+import time
+import uuid
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+from datetime import datetime, timezone
+
+# Attributes every LogRecord has; anything else was passed via `extra=` and is emitted as a field
+_STANDARD_ATTRS = set(logging.LogRecord('', 0, '', 0, '', (), None).__dict__) | {'message', 'asctime'}
+
+# Request context copied onto records in the emitting thread (the queue listener runs elsewhere)
+CONTEXT_FIELDS = ('request_id', 'route', 'method', 'user_type', 'user_id')
+
+_listener = None
+_setup_lock = threading.Lock()
+
+# One record per request, from the before/after request hooks
+request_logger = logging.getLogger('taxerpay.request')
+
+def active_request():
+    """(g, request) of the Flask or Quart request being handled, or None outside a request"""
+    try:
+        from flask import g, has_request_context, request
+        if has_request_context():
+            return g, request
+    except ImportError:
+        pass
+    # Only a process serving the async app has imported Quart; importing it here would not be free
+    if 'quart' in sys.modules:
+        from quart import g, has_request_context, request
+        if has_request_context():
+            return g, request
+    return None
+
+class RequestContextFilter(logging.Filter):
+    """Adds the current request's id, route and caller to each record"""
+
+    def filter(self, record):
+        context = active_request()
+        if context:
+            g, request = context
+            record.request_id = g.get('request_id')
+            record.route = request.url_rule.rule if request.url_rule else request.path
+            record.method = request.method
+            record.user_type = g.get('user_type')
+            record.user_id = g.get('user_id')
+        return True
+
+class SamplingFilter(logging.Filter):
+    """Rate-limits repetitive records: `burst` per message template per window, then 1 in `every`"""
+
+    def __init__(self, burst=10, window=60.0, every=100):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.every = every
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window_start, seen, suppressed = self._counters.get(key, (now, 0, 0))
+            if now - window_start >= self.window:
+                window_start, seen = now, 0
+            seen += 1
+            keep = seen <= self.burst or seen % self.every == 0
+            if keep:
+                # Tell the reader how many similar records were dropped since the last one
+                if suppressed:
+                    record.suppressed = suppressed
+                suppressed = 0
+            else:
+                suppressed += 1
+            self._counters[key] = (window_start, seen, suppressed)
+        return keep
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that keeps the traceback apart from the message
+
+    The stock prepare() formats the record, which appends the traceback to the
+    message, and then clears exc_info, so the JSON `exception` field was lost.
+    Here the message is only merged with its args (they may not pickle or may
+    change before the listener runs) and the traceback is rendered into exc_text,
+    which both formatters read.
+    """
+
+    _traceback_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or self._traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the request context and any `extra` fields"""
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Rendered in the emitting thread by ContextQueueHandler
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        context = ' '.join(f'{field}={getattr(record, field)}' for field in CONTEXT_FIELDS
+                           if getattr(record, field, None))
+        return f'{line} [{context}]' if context else line
+
+def setup_logging(level='INFO', fmt='json', sampled_loggers=('utils.auth',), burst=10, window=60.0, every=100):
+    """Route all logging through a non-blocking queue to stdout (once per process)"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+
+        # Request threads only enqueue records; formatting and I/O happen on the listener thread
+        log_queue = queue.SimpleQueue()
+        queue_handler = ContextQueueHandler(log_queue)
+        queue_handler.addFilter(RequestContextFilter())
+
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+
+        root = logging.getLogger()
+        root.setLevel(level.upper() if isinstance(level, str) else level)
+        root.addHandler(queue_handler)
+
+        # High-volume paths such as token verification failures are sampled
+        for name in sampled_loggers:
+            logging.getLogger(name).addFilter(SamplingFilter(burst=burst, window=window, every=every))
+
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_stop_listener)
+        return _listener
+
+def _stop_listener():
+    """Flush the queue at exit; QueueListener.stop() raises if the listener was already stopped"""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+def _configure_from(config):
+    setup_logging(
+        level=config.get('LOG_LEVEL', 'INFO'),
+        fmt=config.get('LOG_FORMAT', 'json'),
+        burst=int(config.get('LOG_SAMPLE_BURST', 10)),
+        window=float(config.get('LOG_SAMPLE_WINDOW', 60)),
+        every=int(config.get('LOG_SAMPLE_EVERY', 100))
+    )
+
+def _start_request(g, request):
+    # Reuse the id from the load balancer when present so logs correlate across hops
+    g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+    g.log_start = time.perf_counter()
+
+def _finish_request(config, g, request, response):
+    response.headers['X-Request-ID'] = g.get('request_id', '')
+    start = g.get('log_start')
+    if start is not None and config.get('LOG_REQUESTS', True):
+        request_logger.info('%s %s %s', request.method, request.path, response.status_code, extra={
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - start) * 1000, 2)
+        })
+    return response
+
+def init_request_logging(app):
+    """Configure logging from the app config and log one structured record per request"""
+    _configure_from(app.config)
+
+    from flask import g, request
+
+    @app.before_request
+    def assign_request_id():
+        _start_request(g, request)
+
+    @app.after_request
+    def log_request(response):
+        return _finish_request(app.config, g, request, response)
+
+def init_async_request_logging(app):
+    """init_request_logging for the Quart app (asgi.py)"""
+    _configure_from(app.config)
+
+    from quart import g, request
+
+    @app.before_request
+    async def assign_request_id():
+        _start_request(g, request)
+
+    @app.after_request
+    async def log_request(response):
+        return _finish_request(app.config, g, request, response)
@@ -0,0 +1,146 @@
+import os
+import time
+from flask import Response, g, request
+from pymongo import monitoring
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+)
+
+# Metrics are process-global (one set per worker). When PROMETHEUS_MULTIPROC_DIR is set
+# before the workers start, each worker writes to that directory and /metrics sums them.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_COUNT = Counter(
+    'taxerpay_http_requests_total', 'HTTP requests handled',
+    ['blueprint', 'endpoint', 'method', 'status']
+)
+REQUEST_LATENCY = Histogram(
+    'taxerpay_http_request_duration_seconds', 'HTTP request latency',
+    ['blueprint', 'endpoint', 'method'], buckets=LATENCY_BUCKETS
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'taxerpay_http_requests_in_progress', 'HTTP requests currently being handled',
+    ['blueprint', 'endpoint'], multiprocess_mode='livesum'
+)
+MONGO_COMMAND_DURATION = Histogram(
+    'taxerpay_mongo_command_duration_seconds', 'MongoDB command duration',
+    ['command', 'outcome'], buckets=LATENCY_BUCKETS
+)
+BCRYPT_DURATION = Histogram(
+    'taxerpay_bcrypt_duration_seconds', 'bcrypt hash/check duration',
+    ['operation'], buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+LOGIN_THROTTLED = Counter(
+    'taxerpay_login_throttled_total', 'Login attempts rejected by the rate limiter',
+    ['scope', 'limit']
+)
+RESPONSE_BYTES = Counter(
+    'taxerpay_http_response_bytes_total', 'Compressed response body bytes before and after encoding',
+    ['encoding', 'stage']
+)
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener recording per-command durations"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND_DURATION.labels(event.command_name, 'success').observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        MONGO_COMMAND_DURATION.labels(event.command_name, 'failure').observe(event.duration_micros / 1e6)
+
+def _route_labels(req):
+    """Low-cardinality labels for a request (route template, not the raw path)"""
+    blueprint = req.blueprint or 'app'
+    endpoint = req.url_rule.rule if req.url_rule else 'unmatched'
+    return blueprint, endpoint
+
+def collect_metrics():
+    """Render all metrics in the Prometheus text format, merged across workers if configured"""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+def _start_timer(g, req):
+    g.metrics_start = time.perf_counter()
+    g.metrics_labels = _route_labels(req)
+    REQUESTS_IN_PROGRESS.labels(*g.metrics_labels).inc()
+
+def _record(g, req, response):
+    labels = g.get('metrics_labels')
+    if labels:
+        REQUEST_COUNT.labels(labels[0], labels[1], req.method, str(response.status_code)).inc()
+        REQUEST_LATENCY.labels(labels[0], labels[1], req.method).observe(time.perf_counter() - g.metrics_start)
+    return response
+
+def _finish(g):
+    labels = g.pop('metrics_labels', None)
+    if labels:
+        REQUESTS_IN_PROGRESS.labels(*labels).dec()
+
+def _authorized(config, req):
+    token = config.get('METRICS_TOKEN')
+    return not token or req.headers.get('Authorization') == f'Bearer {token}'
+
+def init_metrics(app, database):
+    """Instrument an app's requests and its MongoDB client, and expose GET /metrics"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    # Listeners are read when the client connects, so register before first use
+    database.event_listeners.append(MongoCommandMetrics())
+
+    @app.before_request
+    def start_request_timer():
+        _start_timer(g, request)
+
+    @app.after_request
+    def record_request(response):
+        return _record(g, request, response)
+
+    @app.teardown_request
+    def finish_request(exc):
+        _finish(g)
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """Prometheus metrics endpoint"""
+        if not _authorized(app.config, request):
+            return Response('Unauthorized\n', status=401)
+        return Response(collect_metrics(), mimetype=CONTENT_TYPE_LATEST)
+
+def init_async_metrics(app, database):
+    """init_metrics for the Quart app (asgi.py) and its Motor client"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    from quart import Response as AsyncResponse, g as async_g, request as async_request
+
+    # Motor reads its listeners when AsyncDatabase connects, on the first request
+    database.event_listeners.append(MongoCommandMetrics())
+
+    @app.before_request
+    async def start_request_timer():
+        _start_timer(async_g, async_request)
+
+    @app.after_request
+    async def record_request(response):
+        return _record(async_g, async_request, response)
+
+    @app.teardown_request
+    async def finish_request(exc):
+        _finish(async_g)
+
+    @app.route('/metrics', methods=['GET'])
+    async def metrics():
+        """Prometheus metrics endpoint"""
+        if not _authorized(app.config, async_request):
+            return AsyncResponse('Unauthorized\n', status=401)
+        return AsyncResponse(collect_metrics(), mimetype=CONTENT_TYPE_LATEST)
@@ -0,0 +1,149 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from bson import ObjectId
+from utils.metrics import BCRYPT_DURATION
+
+logger = logging.getLogger(__name__)
+
+# bcrypt's own default; every extra round doubles the hashing time
+DEFAULT_ROUNDS = 12
+MAX_ROUNDS = 31
+
+# Work factor for new hashes. Process-wide, since it is a property of the hardware
+_rounds = DEFAULT_ROUNDS
+_calibrated = {}
+_calibration_lock = threading.Lock()
+
+def get_rounds():
+    return _rounds
+
+def set_rounds(rounds):
+    """Use this bcrypt cost for new hashes (and as the target for rehash-on-login)"""
+    global _rounds
+    if not 4 <= int(rounds) <= MAX_ROUNDS:
+        raise ValueError(f"bcrypt rounds must be between 4 and {MAX_ROUNDS}, got {rounds}")
+    _rounds = int(rounds)
+
+def calibrate_rounds(target_ms=250, min_rounds=10, max_rounds=16):
+    """Highest cost whose hash time on this machine stays within target_ms (never below min_rounds)"""
+    key = (target_ms, min_rounds, max_rounds)
+    with _calibration_lock:
+        if key in _calibrated:
+            return _calibrated[key]
+
+        # Best of a few runs at the minimum cost, then extrapolate: each round doubles the work
+        salt = bcrypt.gensalt(rounds=min_rounds)
+        duration = float('inf')
+        for _ in range(3):
+            start = time.perf_counter()
+            bcrypt.hashpw(b'calibration-password', salt)
+            duration = min(duration, time.perf_counter() - start)
+
+        rounds = min_rounds
+        while rounds < max_rounds and duration * 2 * 1000 <= target_ms:
+            rounds += 1
+            duration *= 2
+
+        logger.info("Calibrated bcrypt cost %d (%.0f ms per hash, budget %s ms)", rounds, duration * 1000, target_ms)
+        _calibrated[key] = rounds
+        return rounds
+
+def resolve_rounds(setting, target_ms=250, min_rounds=10):
+    """Turn a BCRYPT_ROUNDS setting (a number or 'auto') into a cost"""
+    if str(setting).strip().lower() == 'auto':
+        return calibrate_rounds(float(target_ms), int(min_rounds))
+    return int(setting)
+
+def init_password_hashing(app):
+    """Set the bcrypt cost from the app config (BCRYPT_ROUNDS, or 'auto' to fit BCRYPT_TARGET_MS)"""
+    set_rounds(resolve_rounds(
+        app.config.get('BCRYPT_ROUNDS', DEFAULT_ROUNDS),
+        app.config.get('BCRYPT_TARGET_MS', 250),
+        app.config.get('BCRYPT_MIN_ROUNDS', 10)
+    ))
+
+def hash_password(password):
+    """Hash a plain-text password with bcrypt at the configured cost"""
+    start = time.perf_counter()
+    try:
+        salt = bcrypt.gensalt(rounds=_rounds)
+        return bcrypt.hashpw(password.encode('utf-8'), salt)
+    finally:
+        BCRYPT_DURATION.labels('hash').observe(time.perf_counter() - start)
+
+def hash_passwords(passwords, threads=None):
+    """Hash many passwords on a thread pool (bcrypt releases the GIL); hashes come back in input order"""
+    passwords = list(passwords)
+    if len(passwords) <= 1:
+        return [hash_password(password) for password in passwords]
+    threads = min(threads or os.cpu_count() or 4, len(passwords))
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='bcrypt') as pool:
+        return list(pool.map(hash_password, passwords))
+
+def check_password(password, stored_password):
+    """Check a plain-text password against a stored bcrypt hash (bytes or str)"""
+    # Convert stored password to bytes if it's a string
+    if isinstance(stored_password, str):
+        stored_password = stored_password.encode('utf-8')
+
+    start = time.perf_counter()
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), stored_password)
+    finally:
+        BCRYPT_DURATION.labels('check').observe(time.perf_counter() - start)
+
+def hash_rounds(stored_password):
+    """Cost a stored hash was created with ($2b$12$... -> 12), or None if unreadable"""
+    if isinstance(stored_password, bytes):
+        stored_password = stored_password.decode('utf-8', 'replace')
+    try:
+        return int(stored_password.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+def needs_rehash(stored_password):
+    """True if a stored hash was made with a lower cost than the configured one
+
+    Never downward: with BCRYPT_ROUNDS=auto, hosts of different speed calibrate
+    different costs, and rehashing both ways would flip hashes on every login.
+    """
+    rounds = hash_rounds(stored_password)
+    return rounds is not None and rounds < _rounds
+
+def _rehash_update(document, new_hash):
+    """Filter and update replacing a verified hash with new_hash"""
+    stored_password = document['password']
+    # Keep the stored representation (bytes or str) of the existing hash
+    if isinstance(stored_password, str):
+        new_hash = new_hash.decode('utf-8')
+    # Only replace the hash we verified, so a concurrent password change wins
+    return {'_id': ObjectId(document['_id']), 'password': stored_password}, {'$set': {'password': new_hash}}
+
+def rehash_on_login(collection, document, password):
+    """After a successful login, re-hash the password at the configured cost if the stored cost is lower"""
+    if not needs_rehash(document.get('password')):
+        return False
+    try:
+        result = collection.update_one(*_rehash_update(document, hash_password(password)))
+        return result.modified_count > 0
+    except Exception as e:
+        logger.warning("Could not upgrade password hash: %s", e)
+        return False
+
+async def async_rehash_on_login(collection, document, password):
+    """rehash_on_login for a Motor collection; bcrypt runs in the default executor"""
+    if not needs_rehash(document.get('password')):
+        return False
+    try:
+        loop = asyncio.get_running_loop()
+        new_hash = await loop.run_in_executor(None, hash_password, password)
+        result = await collection.update_one(*_rehash_update(document, new_hash))
+        return result.modified_count > 0
+    except Exception as e:
+        logger.warning("Could not upgrade password hash: %s", e)
+        return False
@@ -0,0 +1,81 @@
+import zlib
+
+# A4 in points, and the text layout used on every page
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+MARGIN = 56
+FONTS = {'body': ('F1', 10, 14), 'bold': ('F2', 10, 14), 'title': ('F2', 16, 24)}
+
+# The built-in fonts use WinAnsiEncoding, which is Windows-1252
+ENCODING = 'cp1252'
+
+def can_encode(text):
+    """Whether the built-in fonts can show every character of text"""
+    try:
+        str(text).encode(ENCODING)
+        return True
+    except UnicodeEncodeError:
+        return False
+
+def _escape(text):
+    # Callers check can_encode first; anything the fonts still lack is printed as '?'.
+    # The cp1252 bytes travel through the latin-1 encoded content stream unchanged
+    text = str(text).encode(ENCODING, 'replace').decode('latin-1')
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+def _pages(lines):
+    page, y = [], PAGE_HEIGHT - MARGIN
+    for style, text in lines:
+        leading = FONTS[style][2]
+        if y - leading < MARGIN and page:
+            yield page
+            page, y = [], PAGE_HEIGHT - MARGIN
+        y -= leading
+        page.append((style, text, y))
+    yield page
+
+def _content(page):
+    ops = []
+    for style, text, y in page:
+        if not text:
+            continue
+        font, size, _ = FONTS[style]
+        ops.append(f'BT /{font} {size} Tf {MARGIN} {y} Td ({_escape(text)}) Tj ET')
+    return zlib.compress('\n'.join(ops).encode('latin-1'), 9)
+
+def text_pdf(lines, title=''):
+    """PDF of (style, text) lines on A4 pages, style being 'title', 'bold' or 'body'
+
+    Uses only the built-in Helvetica fonts and writes no timestamps or random
+    ids, so the same lines always produce the same bytes.
+    """
+    pages = list(_pages(lines))
+    # Objects: 1 catalog, 2 page tree, 3-4 fonts, 5 info, then a page and its content stream per page
+    page_ids = [6 + 2 * index for index in range(len(pages))]
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        f"<< /Type /Pages /Kids [{' '.join(f'{page_id} 0 R' for page_id in page_ids)}] "
+        f"/Count {len(pages)} >>".encode('latin-1'),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+        f'<< /Title ({_escape(title)}) /Producer (TaxerPay) >>'.encode('latin-1'),
+    ]
+    for page_id, page in zip(page_ids, pages):
+        stream = _content(page)
+        objects.append(
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+            f'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {page_id + 1} 0 R >>'.encode('latin-1')
+        )
+        objects.append(f'<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n'.encode('latin-1')
+                       + stream + b'\nendstream')
+
+    output = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f'{number} 0 obj\n'.encode('latin-1') + body + b'\nendobj\n'
+    xref = len(output)
+    output += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode('latin-1')
+    output += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode('latin-1')
+    output += (f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R /Info 5 0 R >>\n'
+               f'startxref\n{xref}\n%%EOF\n').encode('latin-1')
+    return bytes(output)
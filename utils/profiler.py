@@ -0,0 +1,191 @@
+import os
+import sys
+import hmac
+import time
+import random
+import hashlib
+import threading
+from collections import Counter
+
+# Header carrying a signed, expiring request to profile: "<expires>.<hex hmac>"
+PROFILE_HEADER = 'X-Profile-Request'
+
+def sign_profile_request(secret, ttl=300):
+    """Create a header value that forces profiling of requests until it expires"""
+    expires = str(int(time.time()) + ttl)
+    signature = hmac.new(secret.encode('utf-8'), expires.encode('utf-8'), hashlib.sha256).hexdigest()
+    return f'{expires}.{signature}'
+
+def verify_profile_request(secret, value):
+    """Check a profile header value's signature and expiry"""
+    try:
+        expires, signature = value.split('.', 1)
+        expected = hmac.new(secret.encode('utf-8'), expires.encode('utf-8'), hashlib.sha256).hexdigest()
+        return hmac.compare_digest(signature, expected) and int(expires) >= time.time()
+    except (ValueError, AttributeError):
+        return False
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})'
+
+class StackSampler(threading.Thread):
+    """Samples one thread's call stack at a fixed interval into collapsed-stack counts"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True, name='request-profiler')
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            # Don't record the request thread waiting on stop()
+            if frame is None or self._stop_event.is_set():
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(labels))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return self.stacks
+
+class ProfileStore:
+    """Aggregated collapsed stacks per route, optionally shared across workers through a directory"""
+
+    def __init__(self, profile_dir=None):
+        self.profile_dir = profile_dir
+        self.routes = {}
+        self._lock = threading.Lock()
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+
+    def add(self, route, stacks):
+        with self._lock:
+            counts = self.routes.setdefault(route, Counter())
+            counts.update(stacks)
+            if self.profile_dir:
+                # One file per route and worker, rewritten with this worker's running totals
+                path = os.path.join(self.profile_dir, f'{route}.{os.getpid()}.folded')
+                with open(path + '.tmp', 'w') as f:
+                    f.writelines(f'{stack} {count}\n' for stack, count in counts.items())
+                os.replace(path + '.tmp', path)
+
+    def _load(self):
+        """Merge the profiles of all workers (or just this process without a directory)"""
+        if not self.profile_dir:
+            with self._lock:
+                return {route: Counter(counts) for route, counts in self.routes.items()}
+
+        merged = {}
+        for name in os.listdir(self.profile_dir):
+            if not name.endswith('.folded'):
+                continue
+            route = name.rsplit('.', 2)[0]
+            counts = merged.setdefault(route, Counter())
+            with open(os.path.join(self.profile_dir, name)) as f:
+                for line in f:
+                    stack, _, count = line.rstrip('\n').rpartition(' ')
+                    if stack:
+                        counts[stack] += int(count)
+        return merged
+
+    def summary(self):
+        """Routes with their total sample counts"""
+        return {route: sum(counts.values()) for route, counts in self._load().items()}
+
+    def collapsed(self, route):
+        """Collapsed stacks for a route (input for flamegraph.pl / speedscope), or None"""
+        counts = self._load().get(route)
+        if counts is None:
+            return None
+        return ''.join(f'{stack} {count}\n' for stack, count in counts.most_common())
+
+    def clear(self):
+        with self._lock:
+            self.routes.clear()
+            if self.profile_dir:
+                for name in os.listdir(self.profile_dir):
+                    if name.endswith('.folded'):
+                        os.remove(os.path.join(self.profile_dir, name))
+
+class _ProfiledResponse:
+    """Response iterable that keeps sampling until the body has been sent"""
+
+    def __init__(self, body, finish):
+        self._body = body
+        self._finish = finish
+
+    def __iter__(self):
+        return iter(self._body)
+
+    def close(self):
+        try:
+            if hasattr(self._body, 'close'):
+                self._body.close()
+        finally:
+            self._finish()
+
+class ProfilerMiddleware:
+    """WSGI middleware profiling a sample of requests, or those carrying a signed header"""
+
+    def __init__(self, wsgi_app, flask_app, store, sample_rate=0.0, secret=None, interval=0.005):
+        self.wsgi_app = wsgi_app
+        self.flask_app = flask_app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.secret = secret
+        self.interval = interval
+
+    def _should_profile(self, environ):
+        header = environ.get('HTTP_' + PROFILE_HEADER.upper().replace('-', '_'))
+        if header and self.secret:
+            return verify_profile_request(self.secret, header)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _route(self, environ):
+        try:
+            endpoint, _ = self.flask_app.url_map.bind_to_environ(environ).match()
+            return endpoint
+        except Exception:
+            return 'unmatched'
+
+    def __call__(self, environ, start_response):
+        if not self._should_profile(environ):
+            return self.wsgi_app(environ, start_response)
+
+        route = self._route(environ)
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        sampler.start()
+
+        finished = []
+        def finish():
+            if not finished:
+                finished.append(True)
+                self.store.add(route, sampler.stop())
+
+        try:
+            return _ProfiledResponse(self.wsgi_app(environ, start_response), finish)
+        except Exception:
+            finish()
+            raise
+
+def init_profiler(app, services):
+    """Install the sampling profiler middleware when sampling or signed profiling is configured"""
+    sample_rate = float(app.config.get('PROFILE_SAMPLE_RATE') or 0)
+    secret = app.config.get('PROFILE_SECRET')
+    services.profile_store = ProfileStore(app.config.get('PROFILE_DIR'))
+
+    if sample_rate > 0 or secret:
+        app.wsgi_app = ProfilerMiddleware(
+            app.wsgi_app, app, services.profile_store,
+            sample_rate=sample_rate,
+            secret=secret,
+            interval=float(app.config.get('PROFILE_INTERVAL_MS', 5)) / 1000
+        )
@@ -0,0 +1,204 @@
+import time
+import logging
+import threading
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor
+from flask import g
+from pymongo import monitoring
+
+logger = logging.getLogger('taxerpay.slow_query')
+
+# DB accounting for the request running in the current thread/context
+_current_stats = ContextVar('taxerpay_db_stats', default=None)
+
+# Commands whose filter can be summarized and explained, and where their filter lives
+FILTER_FIELDS = {
+    'find': 'filter',
+    'count': 'query',
+    'distinct': 'query',
+    'findAndModify': 'query',
+    'aggregate': 'pipeline',
+    'update': 'updates',
+    'delete': 'deletes'
+}
+
+# Command fields that must not be forwarded into an explain
+DRIVER_FIELDS = ('lsid', 'txnNumber', 'autocommit', 'startTransaction', 'readConcern', 'writeConcern')
+
+class RequestDbStats:
+    """Database time and document counts attributed to one request"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.commands = 0
+        self.documents = 0
+        self.duration = 0.0
+
+def filter_shape(value):
+    """Replace literal values in a filter with their type names so similar queries group together"""
+    if isinstance(value, dict):
+        return {key: filter_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = [filter_shape(item) for item in value]
+        # Collapse long $in lists and bulk statements to a single representative
+        return shapes[:1] if len(shapes) > 1 and all(s == shapes[0] for s in shapes) else shapes
+    return type(value).__name__
+
+def summarize_explain(explain):
+    """Pull the winning plan stages and execution counters out of an explain result"""
+    planner = _find_key(explain, 'queryPlanner') or {}
+    stats = _find_key(explain, 'executionStats') or {}
+
+    stages = []
+    plan = planner.get('winningPlan', {})
+    while plan:
+        stage = plan.get('stage')
+        if stage:
+            stages.append(stage + (f"({plan['indexName']})" if plan.get('indexName') else ''))
+        plan = plan.get('inputStage') or (plan.get('inputStages') or [None])[0] or plan.get('queryPlan')
+
+    return {
+        'plan': ' <- '.join(stages) or 'unknown',
+        'n_returned': stats.get('nReturned'),
+        'keys_examined': stats.get('totalKeysExamined'),
+        'docs_examined': stats.get('totalDocsExamined'),
+        'execution_ms': stats.get('executionTimeMillis')
+    }
+
+def _find_key(document, key):
+    """Depth-first search for a key in nested explain output"""
+    if isinstance(document, dict):
+        if key in document:
+            return document[key]
+        values = document.values()
+    elif isinstance(document, list):
+        values = document
+    else:
+        return None
+    for value in values:
+        found = _find_key(value, key)
+        if found is not None:
+            return found
+    return None
+
+def _returned_documents(reply):
+    """Number of documents in a command reply"""
+    cursor = reply.get('cursor')
+    if isinstance(cursor, dict):
+        return len(cursor.get('firstBatch') or cursor.get('nextBatch') or [])
+    if 'n' in reply:
+        return reply['n']
+    return len(reply['values']) if isinstance(reply.get('values'), list) else 0
+
+class QueryMonitor(monitoring.CommandListener):
+    """Attributes command time to the current request and logs slow commands with their plan"""
+
+    def __init__(self, database, slow_ms=100, explain=True, explain_interval=300):
+        self.database = database
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.explain_interval = explain_interval
+
+        # Commands in flight, keyed by (connection, request id)
+        self._pending = {}
+        # Filter shapes explained recently, to avoid running explain for every slow call
+        self._explained = {}
+        self._lock = threading.Lock()
+        self._explain_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='slow-query-explain')
+        self._in_explain = threading.local()
+
+    def started(self, event):
+        if event.command_name in FILTER_FIELDS and not getattr(self._in_explain, 'active', False):
+            self._pending[(event.connection_id, event.request_id)] = event.command
+
+    def succeeded(self, event):
+        command = self._pending.pop((event.connection_id, event.request_id), None)
+        self._record(event, command, _returned_documents(event.reply))
+
+    def failed(self, event):
+        command = self._pending.pop((event.connection_id, event.request_id), None)
+        self._record(event, command, 0)
+
+    def _record(self, event, command, documents):
+        if getattr(self._in_explain, 'active', False):
+            return
+
+        duration = event.duration_micros / 1e6
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.commands += 1
+            stats.documents += documents
+            stats.duration += duration
+
+        if duration * 1000 >= self.slow_ms:
+            self._log_slow(event, command, duration, documents)
+
+    def _log_slow(self, event, command, duration, documents):
+        """Log a slow command and, for queries not explained recently, its plan"""
+        collection = command.get(event.command_name) if command else None
+        shape = filter_shape(command.get(FILTER_FIELDS[event.command_name])) if command else None
+        logger.warning(
+            "Slow MongoDB command %s on %s.%s took %.1f ms, returned %d docs, filter shape %s",
+            event.command_name, event.database_name, collection, duration * 1000, documents, shape
+        )
+
+        if not (self.explain and command):
+            return
+        shape_key = (event.command_name, collection, repr(shape))
+        now = time.monotonic()
+        with self._lock:
+            if now - self._explained.get(shape_key, -self.explain_interval) < self.explain_interval:
+                return
+            self._explained[shape_key] = now
+        self._explain_pool.submit(self._log_explain, event.database_name, event.command_name, collection, command)
+
+    def _log_explain(self, database_name, command_name, collection, command):
+        """Run explain for a slow command outside the request thread"""
+        self._in_explain.active = True
+        try:
+            explained = {key: value for key, value in command.items()
+                         if not key.startswith('$') and key not in DRIVER_FIELDS}
+            result = self.database.client[database_name].command(
+                {'explain': explained, 'verbosity': 'executionStats'}
+            )
+            logger.warning("Explain for slow %s on %s.%s: %s",
+                           command_name, database_name, collection, summarize_explain(result))
+        except Exception as e:
+            logger.warning("Could not explain slow %s on %s.%s: %s", command_name, database_name, collection, e)
+        finally:
+            self._in_explain.active = False
+
+def init_query_monitor(app, database):
+    """Attach per-request DB accounting, the slow-query log and the Server-Timing header to an app"""
+    monitor = QueryMonitor(
+        database,
+        slow_ms=float(app.config.get('SLOW_QUERY_MS', 100)),
+        explain=app.config.get('SLOW_QUERY_EXPLAIN', True)
+    )
+    database.event_listeners.append(monitor)
+
+    @app.before_request
+    def start_db_accounting():
+        g.db_stats = RequestDbStats()
+        g.db_stats_token = _current_stats.set(g.db_stats)
+
+    @app.after_request
+    def add_server_timing(response):
+        stats = g.get('db_stats')
+        if stats is not None and app.config.get('SERVER_TIMING', True):
+            total_ms = (time.perf_counter() - stats.started_at) * 1000
+            db_ms = stats.duration * 1000
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={db_ms:.1f};desc="{stats.commands} cmds, {stats.documents} docs", '
+                f'app;dur={max(total_ms - db_ms, 0):.1f}'
+            )
+        return response
+
+    @app.teardown_request
+    def stop_db_accounting(exc):
+        token = g.pop('db_stats_token', None)
+        if token is not None:
+            _current_stats.reset(token)
+
+    return monitor
@@ -0,0 +1,187 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import jsonify, request
+from pymongo import ReturnDocument
+from utils.metrics import LOGIN_THROTTLED
+
+logger = logging.getLogger(__name__)
+
+class MemoryBucketStore:
+    """Token buckets in an LRU-bounded dict; per process, so each worker limits on its own"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate, cost=1):
+        """Take `cost` tokens (0 only looks) if one is available; returns seconds until one is (0 if allowed)"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                tokens -= cost
+                retry_after = 0
+            else:
+                retry_after = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            # Least recently used buckets go first; an evicted bucket simply starts full again
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+class MongoBucketStore:
+    """Token buckets in a MongoDB collection, shared by all workers and servers"""
+
+    def __init__(self, database, collection_name='login_rate_limits'):
+        self.database = database
+        self.collection_name = collection_name
+        self._indexed = False
+
+    @property
+    def collection(self):
+        collection = self.database.get_collection(self.collection_name)
+        if not self._indexed:
+            # Idle buckets are full again after capacity / rate seconds; let MongoDB expire them
+            collection.create_index('expires_at', expireAfterSeconds=0)
+            self._indexed = True
+        return collection
+
+    def take(self, key, capacity, rate, cost=1):
+        """Refill and take `cost` tokens in one atomic update; returns seconds until a token is available"""
+        now = datetime.utcnow()
+        elapsed = {'$divide': [{'$subtract': [now, {'$ifNull': ['$updated_at', now]}]}, 1000]}
+        refilled = {'$min': [capacity, {'$add': [{'$ifNull': ['$tokens', capacity]}, {'$multiply': [elapsed, rate]}]}]}
+        bucket = self.collection.find_one_and_update(
+            {'_id': key},
+            [
+                {'$set': {'tokens': refilled, 'updated_at': now}},
+                {'$set': {'allowed': {'$gte': ['$tokens', 1]}}},
+                {'$set': {
+                    'tokens': {'$cond': ['$allowed', {'$subtract': ['$tokens', cost]}, '$tokens']},
+                    'expires_at': now + timedelta(seconds=capacity / rate)
+                }}
+            ],
+            upsert=True,
+            projection={'tokens': True, 'allowed': True},
+            return_document=ReturnDocument.AFTER
+        )
+        return 0 if bucket['allowed'] else (1 - bucket['tokens']) / rate
+
+class LoginRateLimiter:
+    """Per-account and per-IP token buckets checked before any password or database work
+
+    Every attempt spends a token from its IP's bucket. The account's bucket is
+    only charged for failed password checks (see failed()), so nobody can lock a
+    farmer out just by knowing their PAN card and sending correct-looking logins
+    faster than they do.
+    """
+
+    def __init__(self, store, account_burst=5, account_per_minute=1, ip_burst=30, ip_per_minute=30,
+                 trusted_proxies=0):
+        self.store = store
+        self.account_limit = (account_burst, account_per_minute / 60)
+        self.ip_limit = (ip_burst, ip_per_minute / 60)
+        self.trusted_proxies = trusted_proxies
+
+    def client_ip(self, req=None):
+        """Caller's address; with N trusted proxies in front, the Nth X-Forwarded-For entry from the right
+
+        req defaults to Flask's request; the Quart app passes its own.
+        """
+        req = req if req is not None else request
+        if self.trusted_proxies:
+            route = req.access_route
+            return route[-min(self.trusted_proxies, len(route))]
+        return req.remote_addr or 'unknown'
+
+    @staticmethod
+    def _account_key(scope, account):
+        return f'{scope}:account:{str(account).strip().upper()}'
+
+    def check(self, scope, account, ip=None):
+        """Seconds the caller must wait before trying to log in to `account` again (0 if allowed)
+
+        ip defaults to client_ip() of the current Flask request.
+        """
+        try:
+            retry_after = self.store.take(f'{scope}:ip:{ip or self.client_ip()}', *self.ip_limit)
+            if retry_after:
+                LOGIN_THROTTLED.labels(scope, 'ip').inc()
+                return retry_after
+
+            # Only look: the account pays for failed attempts alone
+            retry_after = self.store.take(self._account_key(scope, account), *self.account_limit, cost=0)
+            if retry_after:
+                LOGIN_THROTTLED.labels(scope, 'account').inc()
+            return retry_after
+        except Exception as e:
+            # Fail open: a limiter outage must not lock everyone out
+            logger.warning("Login rate limiter unavailable: %s", e)
+            return 0
+
+    def failed(self, scope, account):
+        """Charge a failed password check to the account's bucket"""
+        try:
+            self.store.take(self._account_key(scope, account), *self.account_limit)
+        except Exception as e:
+            logger.warning("Login rate limiter unavailable: %s", e)
+
+def throttled_response(retry_after, make_json=jsonify):
+    """429 response telling the client when to retry (the Quart app passes its own jsonify)"""
+    response = make_json({'success': False, 'error': 'Too many login attempts, please try again later'})
+    response.headers['Retry-After'] = str(max(int(retry_after + 0.999), 1))
+    return response, 429
+
+class _NoLimit:
+    """Stand-in when login rate limiting is disabled"""
+
+    def client_ip(self, req=None):
+        return None
+
+    def check(self, scope, account, ip=None):
+        return 0
+
+    def failed(self, scope, account):
+        pass
+
+def create_login_limiter(config, database):
+    """Login limiter from LOGIN_* settings (in-memory per process, or shared through MongoDB)"""
+    if not config.get('LOGIN_RATE_LIMIT', True):
+        return _NoLimit()
+
+    if config.get('LOGIN_RATE_LIMIT_BACKEND', 'memory') == 'mongo':
+        store = MongoBucketStore(database)
+    else:
+        store = MemoryBucketStore(int(config.get('LOGIN_RATE_LIMIT_MAX_KEYS', 100000)))
+
+    limits = {}
+    for setting, default in (('LOGIN_ACCOUNT_BURST', 5), ('LOGIN_ACCOUNT_PER_MINUTE', 1),
+                             ('LOGIN_IP_BURST', 30), ('LOGIN_IP_PER_MINUTE', 30)):
+        limits[setting] = float(config.get(setting, default))
+    # A zero rate would divide by zero inside the buckets, and the limiter fails open on errors,
+    # so "0 attempts per minute" would silently mean unlimited
+    for setting in ('LOGIN_ACCOUNT_BURST', 'LOGIN_IP_BURST'):
+        if limits[setting] < 1:
+            raise ValueError(f"{setting} must be at least 1 (set LOGIN_RATE_LIMIT=false to disable limiting)")
+    for setting in ('LOGIN_ACCOUNT_PER_MINUTE', 'LOGIN_IP_PER_MINUTE'):
+        if limits[setting] <= 0:
+            raise ValueError(f"{setting} must be greater than 0 (set LOGIN_RATE_LIMIT=false to disable limiting)")
+
+    return LoginRateLimiter(
+        store,
+        account_burst=limits['LOGIN_ACCOUNT_BURST'],
+        account_per_minute=limits['LOGIN_ACCOUNT_PER_MINUTE'],
+        ip_burst=limits['LOGIN_IP_BURST'],
+        ip_per_minute=limits['LOGIN_IP_PER_MINUTE'],
+        trusted_proxies=int(config.get('TRUSTED_PROXIES', 0))
+    )
+
+def init_rate_limiter(app, services):
+    """Create the app's login limiter"""
+    services.login_limiter = create_login_limiter(app.config, services.db)
+    return services.login_limiter
@@ -0,0 +1,83 @@
+import logging
+from datetime import datetime, timezone
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+class RefreshTokenStore:
+    """Single-use refresh tokens, tracked by their jti claim in MongoDB
+
+    A refresh spends its token's jti: the unique _id index lets exactly one
+    exchange win. A jti presented a second time means the token was copied, so
+    every refresh token of that account issued up to then is revoked. Nothing is
+    written when tokens are issued, which keeps logins (including the async app's)
+    free of an extra write.
+    """
+
+    def __init__(self, database, spent_collection='spent_refresh_tokens', revocation_collection='token_revocations'):
+        self.database = database
+        self.spent_collection = spent_collection
+        self.revocation_collection = revocation_collection
+        self._indexed = False
+
+    @property
+    def spent(self):
+        collection = self.database.get_collection(self.spent_collection)
+        if not self._indexed:
+            # A spent jti only needs remembering until its token would have expired anyway
+            collection.create_index('expires_at', expireAfterSeconds=0)
+            self._indexed = True
+        return collection
+
+    @property
+    def revocations(self):
+        return self.database.get_collection(self.revocation_collection)
+
+    @staticmethod
+    def _account(payload):
+        return f"{payload.get('user_type') or 'user'}:{payload.get('user_id')}"
+
+    def is_revoked(self, payload):
+        """Whether the token was issued at or before its account's last revocation"""
+        revocation = self.revocations.find_one({'_id': self._account(payload)})
+        if not revocation:
+            return False
+        revoked_before = revocation['revoked_before'].replace(tzinfo=timezone.utc).timestamp()
+        # iat has whole-second precision, so a token from the same second counts as revoked
+        return payload.get('iat', 0) <= revoked_before
+
+    def spend(self, payload):
+        """Use up a verified refresh token; False if it was revoked or already used"""
+        if not payload.get('jti') or self.is_revoked(payload):
+            return False
+        try:
+            self.spent.insert_one({
+                '_id': payload['jti'],
+                'account': self._account(payload),
+                'spent_at': datetime.utcnow(),
+                'expires_at': datetime.utcfromtimestamp(payload['exp'])
+            })
+            return True
+        except DuplicateKeyError:
+            logger.warning("Refresh token reused for %s; revoking its refresh tokens", self._account(payload))
+            self.revoke_all(payload.get('user_type'), payload.get('user_id'))
+            return False
+
+    def revoke(self, payload):
+        """Spend a token without exchanging it (logout)"""
+        if not payload.get('jti'):
+            return
+        self.spent.update_one(
+            {'_id': payload['jti']},
+            {'$setOnInsert': {'account': self._account(payload), 'spent_at': datetime.utcnow(),
+                              'expires_at': datetime.utcfromtimestamp(payload['exp'])}},
+            upsert=True
+        )
+
+    def revoke_all(self, user_type, user_id):
+        """Revoke every refresh token of an account issued until now"""
+        self.revocations.update_one(
+            {'_id': self._account({'user_type': user_type, 'user_id': user_id})},
+            {'$set': {'revoked_before': datetime.utcnow()}},
+            upsert=True
+        )
@@ -0,0 +1,34 @@
+# Request validation shared by the Flask routes and their Quart twins (api/async_*_routes.py).
+# Plain functions over the parsed JSON body, so neither framework is imported here.
+
+FARMER_REQUIRED_FIELDS = ('pan_card', 'password', 'first_name', 'last_name')
+TAX_RECORD_REQUIRED_FIELDS = ('tax_year', 'income', 'tax_type')
+
+# Fields a client may never change through the update endpoints
+FARMER_PROTECTED_FIELDS = ('password', 'pan_card', '_id')
+TAX_RECORD_PROTECTED_FIELDS = ('user_id', '_id', 'created_at')
+
+def missing_field(data, fields):
+    """First of the required fields that is absent or empty in a request body, or None"""
+    for field in fields:
+        if not (data or {}).get(field):
+            return field
+    return None
+
+def without_fields(data, fields):
+    """Request body with the given fields dropped"""
+    return {key: value for key, value in (data or {}).items() if key not in fields}
+
+def farmer_document(data):
+    """Farmer document to create from a registration body"""
+    return {
+        'pan_card': data['pan_card'].upper(),
+        'password': data['password'],
+        'first_name': data['first_name'],
+        'last_name': data['last_name'],
+        'phone': data.get('phone', ''),
+        'email': data.get('email', ''),
+        'address': data.get('address', {}),
+        'land_details': data.get('land_details', {}),
+        'bank_details': data.get('bank_details', {})
+    }
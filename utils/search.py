@@ -0,0 +1,70 @@
+import re
+import unicodedata
+
+# Fields the search endpoint returns; never the password hash
+SEARCH_PROJECTION = {'first_name': 1, 'last_name': 1, 'pan_card': 1, 'phone': 1,
+                     'address.village': 1, 'address.district': 1}
+
+# Words of these fields are matched by the text index, in this order of importance
+TEXT_WEIGHTS = {'first_name': 10, 'last_name': 10, 'address.village': 5, 'address.district': 2}
+
+MIN_QUERY_LENGTH = 2
+
+PAN_PREFIX = re.compile(r'^[A-Z]{1,5}(?:[0-9]{1,4}[A-Z]?)?$')
+
+def normalize_text(text):
+    """Lowercase, accents off Latin letters, single spaces: 'José  KUMAR' -> 'jose kumar'
+
+    Marks on non-Latin scripts (Devanagari vowel signs) are part of the letter and kept.
+    """
+    decomposed = unicodedata.normalize('NFKD', str(text or ''))
+    kept, previous = [], ''
+    for char in decomposed:
+        if unicodedata.combining(char) and previous.isascii():
+            continue
+        kept.append(char)
+        if not unicodedata.combining(char):
+            previous = char
+    return ' '.join(unicodedata.normalize('NFC', ''.join(kept)).casefold().split())
+
+def normalize_phone(phone):
+    """Digits of an Indian phone number without country code or trunk prefix: '+91-98765 43210' -> '9876543210'"""
+    digits = re.sub(r'\D', '', str(phone or ''))
+    if len(digits) > 10 and digits.startswith(('91', '0')):
+        digits = digits[-10:]
+    return digits
+
+def search_fields(first_name, last_name, phone):
+    """Normalized copies of a farmer's name and phone, stored as the document's `search` field for prefix lookups"""
+    first, last = normalize_text(first_name), normalize_text(last_name)
+    # Both orders, so 'kum' finds Ravi Kumar by surname and 'ravi k' by full name
+    names = [' '.join(filter(None, (first, last)))]
+    if first and last:
+        names.append(f'{last} {first}')
+    return {'names': [name for name in names if name], 'phone': normalize_phone(phone)}
+
+def classify(query):
+    """What a search string looks like: ('pan', 'ABCDE1'), ('phone', '98765') or ('name', 'ravi ku')"""
+    compact = re.sub(r'[\s\-+()]', '', query)
+    if query.lstrip().startswith('+91'):
+        compact = compact[2:]
+    if compact.isdigit():
+        # Mobile numbers never start with 0, so a leading 0 is the trunk prefix
+        return 'phone', normalize_phone(compact).lstrip('0')
+    # Letters then digits, as PAN cards are; a plain word is a name
+    if PAN_PREFIX.match(compact.upper()) and any(char.isdigit() for char in compact):
+        return 'pan', compact.upper()
+    return 'name', normalize_text(query)
+
+def could_be_pan(query):
+    """Whether a query is also a plausible start of a PAN card ('ABCD' or 'ABCDE1')"""
+    return bool(PAN_PREFIX.match(query.strip().upper()))
+
+def rank_name_matches(term, farmers):
+    """Exact names first, then first-name prefixes, then surname prefixes, each alphabetically"""
+    def key(farmer):
+        names = (farmer.get('search') or {}).get('names') or ['']
+        if term in names:
+            return 0, names[0]
+        return (1 if names[0].startswith(term) else 2), names[0]
+    return sorted(farmers, key=key)
@@ -0,0 +1,48 @@
+import bson
+
+# Derived keys depend on this label, so changing it makes sealed job parameters unreadable
+KEY_INFO = b'taxerpay job secret parameters'
+
+def _load_fernet():
+    try:
+        from cryptography.fernet import Fernet
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+    except ImportError:
+        raise ValueError("Job secret parameters are encrypted with cryptography: pip install cryptography")
+    return Fernet, hashes, HKDF
+
+class SecretBox:
+    """Encrypts documents (Fernet: AES-CBC plus HMAC) so secrets stored in MongoDB are unreadable without the key
+
+    Used for the secret parameters of background jobs, e.g. the passwords of an
+    uploaded farmer file, which must survive until a job worker picks them up.
+    """
+
+    def __init__(self, key):
+        Fernet, _, _ = _load_fernet()
+        self._fernet = Fernet(key)
+
+    @classmethod
+    def from_config(cls, config):
+        """SecretBox keyed by JOB_SECRET_KEY (a Fernet key), or by a key derived from JWT_SECRET_KEY
+
+        The API servers and the job workers load the same settings, so both ends
+        of a job get the same key.
+        """
+        key = config.get('JOB_SECRET_KEY')
+        if not key:
+            import base64
+            _, hashes, HKDF = _load_fernet()
+            secret = str(config.get('JWT_SECRET_KEY') or '').encode('utf-8')
+            derived = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=KEY_INFO).derive(secret)
+            key = base64.urlsafe_b64encode(derived)
+        return cls(key)
+
+    def seal(self, document):
+        """Encrypted BSON of a dict, as bytes"""
+        return self._fernet.encrypt(bson.encode(document))
+
+    def open(self, sealed):
+        """The dict a seal() call encrypted; raises cryptography's InvalidToken for a wrong key"""
+        return bson.decode(self._fernet.decrypt(bytes(sealed)))
@@ -0,0 +1,70 @@
+from flask import current_app
+from werkzeug.local import LocalProxy
+
+# Key under which each app instance stores its services in app.extensions
+EXTENSION_KEY = 'taxerpay'
+
+class Services:
+    """Database client, models, auth utilities and caches owned by one app instance"""
+
+    def __init__(self, config):
+        from config.database import Database
+        from models.farmer import Farmer
+        from models.admin import Admin
+        from models.user import User
+        from models.tax_record import TaxRecord
+        from models.payment import Payment
+        from models.job import Job
+        from utils.auth import AuthUtils
+        from utils.jwks import KeySet
+        from utils.idempotency import IdempotencyStore
+        from utils.refresh_tokens import RefreshTokenStore
+        from utils.secret_box import SecretBox
+
+        self.config = config
+        self.db = Database(config.get('MONGODB_URI'), config.get('DATABASE_NAME'), config.get('DB_BACKEND'),
+                           local_mongodb_uri=config.get('LOCAL_MONGODB_URI'))
+        self.farmer_model = Farmer(self.db)
+        self.admin_model = Admin(self.db)
+        self.user_model = User(self.db)
+        self.tax_record_model = TaxRecord(self.db)
+        self.payment_model = Payment(self.db)
+        self.job_model = Job(self.db, retention_days=int(config.get('JOB_RETENTION_DAYS', 7)),
+                             secret_box=SecretBox.from_config(config))
+        self.auth_utils = AuthUtils(
+            config.get('JWT_SECRET_KEY'), config.get('JWT_ALGORITHM'),
+            config.get('ACCESS_TOKEN_TTL'), config.get('REFRESH_TOKEN_TTL'),
+            keyset=KeySet.from_config(config), accept_hmac_until=config.get('JWT_ACCEPT_HS256_UNTIL') or ''
+        )
+        # Spent and revoked refresh token ids
+        self.refresh_tokens = RefreshTokenStore(self.db)
+        # Idempotency-Key claims and stored responses for retried POSTs
+        self.idempotency = IdempotencyStore(
+            self.db, ttl=int(config.get('IDEMPOTENCY_TTL', 86400)),
+            lock_timeout=int(config.get('IDEMPOTENCY_LOCK_TIMEOUT', 30))
+        )
+
+        # Per-instance caches, keyed by feature
+        self.caches = {}
+
+    def warm_up(self):
+        """Open the database connection ahead of the first request"""
+        return bool(self.db.client)
+
+    def close(self):
+        """Release the database connection"""
+        self.db.close()
+
+def init_services(app):
+    """Create the services for an app and register them in app.extensions"""
+    services = Services(app.config)
+    app.extensions[EXTENSION_KEY] = services
+    return services
+
+def get_services(app=None):
+    """Services of the given app (defaults to the app handling the current request)"""
+    return (app or current_app).extensions[EXTENSION_KEY]
+
+def service_proxy(name):
+    """Module-level stand-in for a per-app service, resolved on each access"""
+    return LocalProxy(lambda: getattr(get_services(), name))
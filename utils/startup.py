@@ -0,0 +1,71 @@
+import os
+import sys
+import subprocess
+
+# Code run in a fresh interpreter: import the server entry point and build the app
+STARTUP_PROBE = """
+import sys, time
+start = time.perf_counter()
+import wsgi
+elapsed = time.perf_counter() - start
+print('STARTUP_TOTAL_US %d' % (elapsed * 1e6))
+print('STARTUP_MODULES ' + ','.join(sorted(m for m in sys.modules if '.' not in m)))
+"""
+
+def parse_importtime(stderr_text):
+    """Parse `python -X importtime` output into (self_us, cumulative_us, module, depth) rows"""
+    rows = []
+    for line in stderr_text.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+            depth = (len(name) - len(name.lstrip())) // 2
+            rows.append((int(self_us), int(cumulative_us), name.strip(), depth))
+        except ValueError:
+            continue
+    return rows
+
+def run_startup_report(top=25, budget_ms=None):
+    """Measure cold import of the API server path in a fresh interpreter and print a breakdown"""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_PROBE],
+        cwd=backend_dir, capture_output=True, text=True
+    )
+
+    if result.returncode != 0:
+        print("❌ Startup probe failed:")
+        print(result.stderr[-2000:])
+        return False
+
+    total_us = 0
+    modules = []
+    for line in result.stdout.splitlines():
+        if line.startswith('STARTUP_TOTAL_US '):
+            total_us = int(line.split()[1])
+        elif line.startswith('STARTUP_MODULES '):
+            modules = line[len('STARTUP_MODULES '):].split(',')
+
+    rows = parse_importtime(result.stderr)
+    total_ms = total_us / 1000
+
+    print("⏱️  Startup import-time report (API server path)")
+    print("=" * 60)
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for self_us, cumulative_us, name, depth in sorted(rows, key=lambda r: r[1], reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {'  ' * depth}{name}")
+    print("=" * 60)
+    print(f"🎯 Total import + app factory: {total_ms:.1f} ms")
+
+    # Desktop-only dependencies must never be loaded by the server
+    heavy = [name for name in ('eel', 'gevent', 'bottle') if name in modules]
+    if heavy:
+        print(f"⚠️  Desktop-only modules imported on the server path: {', '.join(heavy)}")
+    else:
+        print("✅ No desktop-only modules (eel, gevent, bottle) on the server path")
+
+    if budget_ms is not None and total_ms > budget_ms:
+        print(f"❌ Cold start {total_ms:.1f} ms exceeds budget of {budget_ms:.0f} ms")
+        return False
+    return not heavy
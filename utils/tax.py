@@ -0,0 +1,29 @@
+def calculate_tax_amount(income, tax_type='federal'):
+    """Calculate tax for an income using the federal brackets (flat 5% for other tax types)"""
+    # Simple tax calculation (this is a basic example)
+    # In a real application, you would implement proper tax brackets and calculations
+    if tax_type == 'federal':
+        if income <= 10275:
+            tax = income * 0.10
+        elif income <= 41775:
+            tax = 1027.50 + (income - 10275) * 0.12
+        elif income <= 89075:
+            tax = 4807.50 + (income - 41775) * 0.22
+        elif income <= 170050:
+            tax = 15213.50 + (income - 89075) * 0.24
+        elif income <= 215950:
+            tax = 34647.50 + (income - 170050) * 0.32
+        elif income <= 539900:
+            tax = 49335.50 + (income - 215950) * 0.35
+        else:
+            tax = 162718 + (income - 539900) * 0.37
+    else:
+        # Default to 5% for other tax types
+        tax = income * 0.05
+
+    return {
+        'income': income,
+        'tax_type': tax_type,
+        'calculated_tax': round(tax, 2),
+        'effective_rate': round((tax / income) * 100, 2) if income > 0 else 0
+    }
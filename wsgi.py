@@ -0,0 +1,13 @@
+"""
+WSGI entry point for production servers
+The one module that builds the app at import time; importing app.py only defines the factory.
+Usage: gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+from app import create_app
+
+app = create_app()
+
+if __name__ == '__main__':
+    from app import start_flask_only
+    start_flask_only(app)